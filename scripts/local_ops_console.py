@@ -13,27 +13,42 @@
 from __future__ import annotations
 
 import argparse
+import calendar
+import hashlib
 import json
+import mmap
 import os
 import platform
+import random
 import re
 import secrets
 import socket
+import signal
 import socketserver
+import struct
 import subprocess
 import sys
 import tempfile
 import threading
 import time
+import traceback
+import tracemalloc
 import urllib.request
 import urllib.error
 import urllib.parse
 import webbrowser
+import zlib
+from collections import deque
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from pathlib import Path
 from shutil import which
 from typing import Any, Dict, List, Optional, Tuple
 
+try:
+    import fcntl
+except ImportError:  # Windows: the probe worker falls back to pid checks
+    fcntl = None  # type: ignore[assignment]
+
 
 ROOT_DIR = Path(__file__).resolve().parent.parent
 HOME_COMPOSE_FILE = ROOT_DIR / "deploy" / "docker-compose.home.yml"
@@ -44,6 +59,8 @@ RUNTIME_DIR = ROOT_DIR / ".naibao_runtime"
 TUN_PID = RUNTIME_DIR / "cloudflared_api.pid"
 TUN_LOG = RUNTIME_DIR / "cloudflared_api.log"
 TUN_CFG = RUNTIME_DIR / "cloudflared_named.yml"
+TUN_METRICS = RUNTIME_DIR / "cloudflared_api.metrics"
+TUN_STANDBY_CFG = RUNTIME_DIR / "cloudflared_named.standby.yml"
 NAMED_INIT_PID = RUNTIME_DIR / "named_tunnel_init.pid"
 NAMED_INIT_LOG = RUNTIME_DIR / "named_tunnel_init.log"
 OPS_PID = RUNTIME_DIR / "ops_console.pid"
@@ -51,6 +68,16 @@ OPS_PORT = RUNTIME_DIR / "ops_console.port"
 ALERTS_ENV_FILE = RUNTIME_DIR / "alerts.env"
 ALERTS_STATE_FILE = RUNTIME_DIR / "alerts_state.json"
 ALERTS_LOG = RUNTIME_DIR / "alerts.log"
+ALERTS_OUTBOX = RUNTIME_DIR / "alerts_outbox.jsonl"
+ALERT_RULES_FILE = RUNTIME_DIR / "alert_rules.json"
+OPS_HISTORY = RUNTIME_DIR / "ops_history.jsonl"
+BACKEND_BUILD_STATE = RUNTIME_DIR / "backend_build.json"
+OPS_ACCESS_LOG = RUNTIME_DIR / "ops_access.jsonl"
+OPS_SLOW_LOG = RUNTIME_DIR / "ops_slow_requests.jsonl"
+PROBE_SNAPSHOT_FILE = RUNTIME_DIR / "probe_snapshot.mmap"
+PROBE_DEMAND_FILE = RUNTIME_DIR / "probe_demand.json"
+PROBE_WORKER_LOCK = RUNTIME_DIR / "probe_worker.lock"
+PROBE_WORKER_LOG = RUNTIME_DIR / "probe_worker.log"
 
 FRONTEND_DIR = ROOT_DIR / "frontend"
 MOBILE_PREVIEW_URL = FRONTEND_DIR / "mobile-preview.url"
@@ -60,6 +87,9 @@ MOBILE_PREVIEW_DEV_PID = FRONTEND_DIR / "dev-h5.pid"
 MOBILE_PREVIEW_DEV_LOG = FRONTEND_DIR / "dev-h5.log"
 MOBILE_PREVIEW_START_PID = RUNTIME_DIR / "mobile_preview_start.pid"
 MOBILE_PREVIEW_START_LOG = RUNTIME_DIR / "mobile_preview_start.log"
+BACKEND_CAPTURE_LOG = RUNTIME_DIR / "backend_container.log"
+LOG_INDEX_DIR = RUNTIME_DIR / "log_index"
+LOG_INDEX_META = LOG_INDEX_DIR / "meta.json"
 
 DEFAULT_BACKEND_HOST_PORT = 18080
 
@@ -67,20 +97,30 @@ _CACHE: Dict[str, Tuple[float, Any]] = {}
 
 # /api/status can be "slow by nature" (docker + dns + https checks). If it ever blocks,
 # the ops UI becomes a blank page. We therefore compute status in background and serve
-# a cached snapshot immediately.
+# a cached snapshot immediately. Each section (see STATUS_SECTIONS) has its own snapshot
+# and refresh thread, so a slow section never delays the others.
 _STATUS_LOCK = threading.Lock()
-_STATUS_THREAD: Optional[threading.Thread] = None
-_STATUS: Dict[str, Any] = {
-    "ts": 0.0,
-    "data": None,  # last successful payload (dict) or None
-    "updating": False,
-    "last_ok": False,
-    "last_error": "",
-    "last_duration_ms": 0,
-}
+_STATUS_SECTION_STATE: Dict[str, Dict[str, Any]] = {}
 STATUS_CACHE_MAX_AGE_S = 2.0
 
 
+def _status_section_state(name: str) -> Dict[str, Any]:
+    # Caller holds _STATUS_LOCK.
+    st = _STATUS_SECTION_STATE.get(name)
+    if st is None:
+        st = {
+            "ts": 0.0,
+            "data": None,  # last successful section payload (dict) or None
+            "updating": False,
+            "thread": None,
+            "last_ok": False,
+            "last_error": "",
+            "last_duration_ms": 0,
+        }
+        _STATUS_SECTION_STATE[name] = st
+    return st
+
+
 def humanize_error(msg: str) -> str:
     s = (msg or "").strip()
     if not s:
@@ -130,39 +170,50 @@ def cached(key: str, ttl_s: int, fn) -> Any:
     return v
 
 
-def _status_meta(now: Optional[float] = None) -> Dict[str, Any]:
+def _status_meta_entry(st: Dict[str, Any], now: float) -> Dict[str, Any]:
+    # Caller holds _STATUS_LOCK.
+    ts = float(st.get("ts") or 0.0)
+    th = st.get("thread")
+    return {
+        "has_data": bool(isinstance(st.get("data"), dict) and st.get("data")),
+        "updating": bool(st.get("updating") or (th and th.is_alive())),
+        "age_s": int(max(0.0, now - ts)) if ts > 0 else 0,
+        "last_ok": bool(st.get("last_ok", False)),
+        "last_error": str(st.get("last_error") or ""),
+        "last_duration_ms": int(st.get("last_duration_ms") or 0),
+    }
+
+
+def _status_meta(sections: List[str], now: Optional[float] = None) -> Dict[str, Any]:
     n = float(now if now is not None else time.time())
     with _STATUS_LOCK:
-        ts = float(_STATUS.get("ts") or 0.0)
-        data = _STATUS.get("data")
-        updating = bool(_STATUS.get("updating", False))
-        last_ok = bool(_STATUS.get("last_ok", False))
-        last_error = str(_STATUS.get("last_error") or "")
-        last_dur = int(_STATUS.get("last_duration_ms") or 0)
-        th = _STATUS_THREAD
-
-    age_s = int(max(0.0, n - ts)) if ts > 0 else 0
-    th_alive = bool(th and th.is_alive())
+        per = {name: _status_meta_entry(_status_section_state(name), n) for name in sections}
+    return _status_meta_merge(per)
+
+
+def _status_meta_merge(per: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    vals = list(per.values())
+    errors = [v["last_error"] for v in vals if v["last_error"]]
     return {
-        "has_data": bool(isinstance(data, dict) and data),
-        "updating": bool(updating or th_alive),
-        "age_s": int(age_s),
-        "last_ok": bool(last_ok),
-        "last_error": last_error,
-        "last_duration_ms": int(last_dur),
+        "has_data": all(v["has_data"] for v in vals),
+        "updating": any(v["updating"] for v in vals),
+        "age_s": max([v["age_s"] for v in vals] or [0]),
+        "last_ok": all(v["last_ok"] for v in vals),
+        "last_error": errors[0] if errors else "",
+        "last_duration_ms": max([v["last_duration_ms"] for v in vals] or [0]),
+        "sections": per,
     }
 
 
-def _status_update_worker() -> None:
-    global _STATUS_THREAD
+def _status_update_worker(name: str) -> None:
     t0 = time.time()
     ok = True
     err = ""
     data: Optional[Dict[str, Any]] = None
     try:
-        payload = status_payload()
+        payload = STATUS_SECTIONS[name]["fn"](probe_context())
         if not isinstance(payload, dict):
-            raise ValueError("status_payload 返回格式异常")
+            raise ValueError(f"状态分区 {name} 返回格式异常")
         data = payload
     except Exception as e:
         ok = False
@@ -171,66 +222,221 @@ def _status_update_worker() -> None:
 
     dur_ms = int(max(0.0, (time.time() - t0) * 1000.0))
     with _STATUS_LOCK:
-        _STATUS["updating"] = False
-        _STATUS["last_ok"] = bool(ok)
-        _STATUS["last_error"] = str(err or "")
-        _STATUS["last_duration_ms"] = int(dur_ms)
+        st = _status_section_state(name)
+        st["updating"] = False
+        st["last_ok"] = bool(ok)
+        st["last_error"] = str(err or "")
+        st["last_duration_ms"] = int(dur_ms)
         # Only replace cached snapshot when we have a valid dict.
         if ok and isinstance(data, dict) and data:
-            _STATUS["data"] = data
-            _STATUS["ts"] = float(data.get("ts") or time.time())
-        _STATUS_THREAD = None
+            st["data"] = data
+            st["ts"] = time.time()
+        st["thread"] = None
 
 
-def ensure_status_update(force: bool = False) -> None:
+def ensure_status_update(force: bool = False, sections: Optional[List[str]] = None) -> None:
     """
     Best-effort background refresh for /api/status.
     - force: refresh even if cache is fresh
+    - sections: only these sections (default: all)
     """
-    global _STATUS_THREAD
     now = time.time()
+    names = sections if sections is not None else list(STATUS_SECTIONS)
     with _STATUS_LOCK:
-        ts = float(_STATUS.get("ts") or 0.0)
-        th = _STATUS_THREAD
-        th_alive = bool(th and th.is_alive())
-        fresh = (ts > 0) and ((now - ts) <= float(STATUS_CACHE_MAX_AGE_S))
-        if th_alive:
-            _STATUS["updating"] = True
-            return
-        if (not force) and fresh:
-            return
-        _STATUS["updating"] = True
-        _STATUS_THREAD = threading.Thread(target=_status_update_worker, daemon=True)
-        _STATUS_THREAD.start()
+        for name in names:
+            st = _status_section_state(name)
+            ts = float(st.get("ts") or 0.0)
+            th = st.get("thread")
+            ttl = float(STATUS_SECTIONS[name].get("ttl_s") or STATUS_CACHE_MAX_AGE_S)
+            fresh = (ts > 0) and ((now - ts) <= ttl) and not st.get("dirty")
+            if th and th.is_alive():
+                st["updating"] = True
+                continue
+            if (not force) and fresh:
+                continue
+            st["updating"] = True
+            st["dirty"] = False
+            st["thread"] = threading.Thread(target=_status_update_worker, args=(name,), daemon=True)
+            st["thread"].start()
 
 
-def status_payload_cached() -> Dict[str, Any]:
+def status_invalidate(sections: Optional[List[str]] = None) -> None:
+    # Keep the snapshot (UI never goes blank) but refresh it on the next request.
+    names = sections if sections is not None else list(STATUS_SECTIONS)
+    if _PROBE_WORKER is not None:
+        _PROBE_WORKER.invalidate(names)
+    with _STATUS_LOCK:
+        for name in names:
+            _status_section_state(name)["dirty"] = True
+
+
+def status_payload_cached(sections: Optional[List[str]] = None) -> Dict[str, Any]:
     """
-    Return a cached snapshot immediately; trigger a background update when stale.
+    Return a cached snapshot immediately; trigger a background update for stale sections.
+    Sections that were never requested are never computed.
     """
-    ensure_status_update(force=False)
-    meta = _status_meta()
-    with _STATUS_LOCK:
-        data = _STATUS.get("data")
-    if isinstance(data, dict) and data:
-        out = dict(data)
-    else:
-        # Minimal placeholder: UI will show a loading card when has_data=false.
+    names = sections if sections is not None else list(STATUS_SECTIONS)
+    ensure_status_update(force=False, sections=names)
+    meta = _status_meta(names)
+    try:
+        out = status_base(probe_context())
+    except Exception:
         out = {"ts": 0, "root_dir": str(ROOT_DIR)}
+    oldest = 0.0
+    with _STATUS_LOCK:
+        for name in names:
+            st = _status_section_state(name)
+            data = st.get("data")
+            if isinstance(data, dict) and data:
+                out.update(data)
+                ts = float(st.get("ts") or 0.0)
+                oldest = ts if not oldest else min(oldest, ts)
+    if names:
+        # Minimal placeholder when nothing is ready yet: UI will show a loading card when has_data=false.
+        out["ts"] = int(oldest)
+    out["probes"] = probes_summary(probe_snapshot())
+    meta["scheduler"] = scheduler_summary()
     out["_meta"] = meta
     return out
 
 
-def _sh(cmd: List[str], timeout_s: int = 120, check: bool = False) -> subprocess.CompletedProcess:
-    return subprocess.run(
+# Action output kept for the result detail: the first HEAD and the last TAIL bytes (a noisy
+# `docker compose up --build` can print megabytes; the full stream is in the job's progress log).
+ACTION_OUTPUT_HEAD_BYTES = 16 * 1024
+ACTION_OUTPUT_TAIL_BYTES = 48 * 1024
+
+# The background job running on this thread (see job_submit); _sh(stream=True) reports into it.
+_JOB_LOCAL = threading.local()
+
+# The HTTP request being served on this thread (see Handler.handle_one_request): slow work done on
+# its behalf (probe runs, waits on a probe another thread is running, subprocesses) is recorded as
+# spans, so the slow-request log can say what a request was waiting on.
+_REQ_LOCAL = threading.local()
+
+
+def req_span_add(kind: str, name: str, seconds: float) -> None:
+    spans = getattr(_REQ_LOCAL, "spans", None)
+    if spans is not None and seconds > 0:
+        spans.append((str(kind), str(name)[:120], float(seconds)))
+
+
+class req_span:  # noqa: N801 - used like a function: `with req_span("probe", name): ...`
+    __slots__ = ("kind", "name", "t0")
+
+    def __init__(self, kind: str, name: str) -> None:
+        self.kind = kind
+        self.name = name
+        self.t0 = 0.0
+
+    def __enter__(self) -> "req_span":
+        self.t0 = time.time()
+        return self
+
+    def __exit__(self, *exc: Any) -> bool:
+        req_span_add(self.kind, self.name, time.time() - self.t0)
+        return False
+
+
+def _cmd_label(cmd: List[str]) -> str:
+    return " ".join([Path(str(cmd[0])).name] + [str(c) for c in cmd[1:3]]) if cmd else ""
+
+
+class _OutputCap:
+    """Keeps the first head_bytes and the last tail_bytes of a text stream; the middle is only counted."""
+
+    def __init__(self, head_bytes: int = ACTION_OUTPUT_HEAD_BYTES, tail_bytes: int = ACTION_OUTPUT_TAIL_BYTES) -> None:
+        self.head_max = int(head_bytes)
+        self.tail_max = int(tail_bytes)
+        self.head: List[str] = []
+        self.head_n = 0
+        self.tail: deque = deque()
+        self.tail_n = 0
+        self.dropped = 0
+
+    def add(self, chunk: str) -> None:
+        n = len(chunk.encode("utf-8", errors="replace"))
+        if not self.tail and self.head_n + n <= self.head_max:
+            self.head.append(chunk)
+            self.head_n += n
+            return
+        self.tail.append((chunk, n))
+        self.tail_n += n
+        while self.tail_n > self.tail_max and len(self.tail) > 1:
+            _, k = self.tail.popleft()
+            self.tail_n -= k
+            self.dropped += k
+
+    def text(self) -> str:
+        mid = f"\n……（中间省略 {self.dropped} 字节，完整过程见任务进度）……\n" if self.dropped else ""
+        return "".join(self.head) + mid + "".join(c for c, _ in self.tail)
+
+
+def cap_output(text: str, head_bytes: int = ACTION_OUTPUT_HEAD_BYTES, tail_bytes: int = ACTION_OUTPUT_TAIL_BYTES) -> str:
+    raw = text or ""
+    if len(raw) * 4 <= head_bytes + tail_bytes:  # fast path: can't exceed the caps even as 4-byte UTF-8
+        return raw
+    cap = _OutputCap(head_bytes, tail_bytes)
+    for ln in raw.splitlines(True):
+        cap.add(ln)
+    return cap.text()
+
+
+def _run_streamed(cmd: List[str], timeout_s: float, env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+    """
+    subprocess.run() for action jobs: lines go to the job progress log as they are printed, and only
+    a capped head + tail is kept in memory for the returned stdout.
+    """
+    job = getattr(_JOB_LOCAL, "job", None)
+    proc = subprocess.Popen(
         cmd,
         cwd=str(ROOT_DIR),
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
         text=True,
-        timeout=timeout_s,
-        check=check,
+        errors="replace",
+        bufsize=1,
+        env=env,
     )
+    cap = _OutputCap()
+
+    def _pump() -> None:
+        _JOB_LOCAL.job = job
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            cap.add(line)
+            job_log(line.rstrip("\n"))
+
+    t = threading.Thread(target=_pump, daemon=True)
+    t.start()
+    try:
+        proc.wait(timeout=timeout_s)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        t.join(2)
+        raise subprocess.TimeoutExpired(cmd, timeout_s, output=cap.text())
+    # A leftover grandchild may keep the pipe open; don't wait for it.
+    t.join(5)
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout=cap.text())
+
+
+def _sh(cmd: List[str], timeout_s: float = 120, check: bool = False, stream: bool = False) -> subprocess.CompletedProcess:
+    # stream=True: long action commands; inside a background job the output is shown live.
+    with req_span("subprocess", _cmd_label(cmd)):
+        if stream and getattr(_JOB_LOCAL, "job", None) is not None:
+            res = _run_streamed(cmd, timeout_s)
+            if check:
+                res.check_returncode()
+            return res
+        return subprocess.run(
+            cmd,
+            cwd=str(ROOT_DIR),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            timeout=timeout_s,
+            check=check,
+        )
 
 
 def ensure_runtime_dir() -> None:
@@ -252,8 +458,18 @@ def ensure_alerts_env_file() -> None:
         "\n"
         "ALERT_ENABLED=0\n"
         "ALERT_INTERVAL_S=30\n"
+        "# 兜底全量检查间隔（秒）；探测结果变化/容器退出会立即触发检查\n"
+        "ALERT_SWEEP_S=120\n"
         "ALERT_REPEAT_MINUTES=30\n"
         "ALERT_SEND_RECOVERY=1\n"
+        "# 聚合窗口（秒）：连锁故障合并成一条消息（0=不聚合）\n"
+        "ALERT_DIGEST_WINDOW_S=15\n"
+        "# 每日小结发送时间（如 09:00；留空=不发）\n"
+        "ALERT_DAILY_SUMMARY_AT=\n"
+        "# 防抖：连续 N 次异常才告警 / 连续 N 次正常才算恢复；窗口内切换次数达到阈值视为“反复波动”，合并成一条\n"
+        "ALERT_TRIP_COUNT=1\n"
+        "ALERT_CLEAR_COUNT=2\n"
+        "ALERT_FLAP_FLIPS=6\n"
         "# 是否把“上线配置未完成（DNS/Pages/固定外网初始化）”也当成告警\n"
         "ALERT_INCLUDE_SETUP=0\n"
         "\n"
@@ -272,6 +488,14 @@ def ensure_alerts_env_file() -> None:
         "# iOS 推送（更高效）：Bark（填你的 Bark URL 前缀）\n"
         "# 形如：https://api.day.app/<你的Key>\n"
         "ALERT_BARK_URL=\n"
+        "\n"
+        "# 发送（可选）：各渠道并发发送，互不拖慢\n"
+        "# 单渠道总时限（秒）/ 单次请求超时（秒）/ 5xx 或超时的重试次数\n"
+        "ALERT_CHANNEL_DEADLINE_S=15\n"
+        "ALERT_ATTEMPT_TIMEOUT_S=6\n"
+        "ALERT_RETRIES=2\n"
+        "# Telegram API 地址（留空=官方；可填自建反代）\n"
+        "ALERT_TG_API_BASE=\n"
     )
     ALERTS_ENV_FILE.write_text(content, encoding="utf-8")
 
@@ -576,7 +800,382 @@ def docker_ps() -> List[Dict[str, Any]]:
     return items
 
 
-def docker_up() -> Tuple[bool, str]:
+# ---------------------------------------------------------------------------
+# 就绪探测与操作历史
+#
+# “进程还活着”不等于“服务可用”：cloudflared 要注册上连接、后端要 /health 通过才算就绪。
+# 这里按指数退避轮询真实的就绪信号直到截止时间，并把就绪用时记进 ops_history.jsonl，
+# 便于看出启动是否在变慢。
+# ---------------------------------------------------------------------------
+
+BACKEND_READY_DEADLINE_S = 120
+TUNNEL_READY_DEADLINE_S = 20
+NAMED_INIT_READY_DEADLINE_S = 30
+OPS_HISTORY_MAX_BYTES = 512 * 1024
+OPS_HISTORY_KEEP = 1000
+_OPS_HISTORY_LOCK = threading.Lock()
+
+
+def wait_ready(check, deadline_s: float, first_s: float = 0.2, max_step_s: float = 2.0) -> Tuple[bool, float, str]:
+    """
+    Poll check() with exponential backoff (first_s, doubling, capped at max_step_s) until it gives
+    an answer or deadline_s passes. check() returns None while undecided, or (ok, msg) once ready
+    (or definitely failed, e.g. the process died). Returns (ok, elapsed_s, msg); msg is "" on timeout.
+    """
+    t0 = time.time()
+    step = float(first_s)
+    while True:
+        try:
+            r = check()
+        except Exception:
+            r = None
+        if r is not None:
+            return bool(r[0]), time.time() - t0, str(r[1] or "")
+        left = float(deadline_s) - (time.time() - t0)
+        if left <= 0:
+            return False, time.time() - t0, ""
+        time.sleep(min(step, left))
+        step = min(float(max_step_s), step * 2)
+
+
+def wait_backend_ready(port: int, deadline_s: float = BACKEND_READY_DEADLINE_S) -> Tuple[bool, float, str]:
+    last = {"msg": ""}
+
+    def _check() -> Optional[Tuple[bool, str]]:
+        ok, msg = http_health(f"http://127.0.0.1:{int(port)}/health", timeout_s=2)
+        last["msg"] = msg
+        return (True, msg) if ok else None
+
+    ok, elapsed, msg = wait_ready(_check, deadline_s)
+    return ok, elapsed, (msg or last["msg"])
+
+
+def ops_history_add(kind: str, **fields: Any) -> None:
+    """Append one record to ops_history.jsonl; past OPS_HISTORY_MAX_BYTES only the newest OPS_HISTORY_KEEP are kept."""
+    rec = {"ts": int(time.time()), "kind": kind, **fields}
+    try:
+        with _OPS_HISTORY_LOCK:
+            ensure_runtime_dir()
+            with OPS_HISTORY.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            if OPS_HISTORY.stat().st_size > OPS_HISTORY_MAX_BYTES:
+                lines = OPS_HISTORY.read_text(encoding="utf-8", errors="ignore").splitlines()[-OPS_HISTORY_KEEP:]
+                _write_atomic(OPS_HISTORY, "\n".join(lines) + "\n")
+    except Exception:
+        pass
+
+
+def ops_history(kind: str = "", limit: int = 50) -> List[Dict[str, Any]]:
+    """Newest first; kind filters on the record kind (e.g. "docker_up")."""
+    try:
+        lines = OPS_HISTORY.read_text(encoding="utf-8", errors="ignore").splitlines() if OPS_HISTORY.exists() else []
+    except Exception:
+        lines = []
+    out: List[Dict[str, Any]] = []
+    for line in reversed(lines):
+        try:
+            rec = json.loads(line)
+        except Exception:
+            continue
+        if kind and rec.get("kind") != kind:
+            continue
+        out.append(rec)
+        if len(out) >= int(limit):
+            break
+    return out
+
+
+# ---------------------------------------------------------------------------
+# 构建跳过
+#
+# `up -d --build` 每次都要让 Docker 重新检查构建上下文，一键修复的大半时间花在这里。
+# 这里对后端构建上下文（按 backend/.dockerignore 过滤）算一个内容哈希，和它构建出的镜像 id
+# 一起记在 backend_build.json；哈希没变、镜像还在，就只做 `up -d`。
+# ---------------------------------------------------------------------------
+
+BACKEND_CONTEXT_DIR = ROOT_DIR / "backend"
+
+
+def _dockerignore_glob_re(pat: str) -> str:
+    # .dockerignore patterns (Go filepath.Match plus "**"), anchored at the context root.
+    out = ""
+    i = 0
+    while i < len(pat):
+        if pat.startswith("**/", i):
+            out += "(?:.*/)?"
+            i += 3
+        elif pat.startswith("**", i):
+            out += ".*"
+            i += 2
+        elif pat[i] == "*":
+            out += "[^/]*"
+            i += 1
+        elif pat[i] == "?":
+            out += "[^/]"
+            i += 1
+        elif pat[i] == "[" and "]" in pat[i + 1 :]:
+            j = pat.index("]", i + 1)
+            body = pat[i + 1 : j]
+            out += "[" + ("^" + body[1:] if body.startswith("!") else body) + "]"
+            i = j + 1
+        else:
+            out += re.escape(pat[i])
+            i += 1
+    return "^" + out + "$"
+
+
+def dockerignore_rules(ctx: Path) -> List[Tuple[Any, bool]]:
+    """[(compiled pattern, is_negation)] from ctx/.dockerignore, in file order."""
+    rules: List[Tuple[Any, bool]] = []
+    try:
+        raw = (ctx / ".dockerignore").read_text(encoding="utf-8", errors="ignore")
+    except Exception:
+        return rules
+    for ln in raw.splitlines():
+        pat = ln.strip()
+        if not pat or pat.startswith("#"):
+            continue
+        neg = pat.startswith("!")
+        pat = pat[1:].strip() if neg else pat
+        pat = pat.lstrip("/").rstrip("/")
+        while pat.startswith("./"):
+            pat = pat[2:]
+        if not pat:
+            continue
+        try:
+            rules.append((re.compile(_dockerignore_glob_re(pat)), neg))
+        except re.error:
+            continue
+    return rules
+
+
+def dockerignore_excluded(rel: str, rules: List[Tuple[Any, bool]]) -> bool:
+    # Like Docker: a pattern matching a parent directory excludes everything below it; last match wins.
+    parts = rel.split("/")
+    prefixes = ["/".join(parts[: k + 1]) for k in range(len(parts))]
+    excluded = False
+    for rx, neg in rules:
+        if any(rx.match(p) for p in prefixes):
+            excluded = not neg
+    return excluded
+
+
+def backend_context_hash(ctx: Path = BACKEND_CONTEXT_DIR) -> Tuple[str, int]:
+    """sha256 over the build context (path, exec bit, content) as Docker would send it; returns (hash, files)."""
+    rules = dockerignore_rules(ctx)
+    can_prune = not any(neg for _, neg in rules)
+    h = hashlib.sha256()
+    files: List[str] = []
+    for dirpath, dirnames, filenames in os.walk(ctx):
+        rel_dir = os.path.relpath(dirpath, ctx).replace(os.sep, "/")
+        rel_dir = "" if rel_dir == "." else rel_dir + "/"
+        if can_prune:
+            dirnames[:] = [d for d in dirnames if not dockerignore_excluded(rel_dir + d, rules)]
+        for fn in filenames:
+            rel = rel_dir + fn
+            if not dockerignore_excluded(rel, rules):
+                files.append(rel)
+    for rel in sorted(files):
+        path = ctx / rel
+        try:
+            st = path.stat()
+            h.update(rel.encode("utf-8") + b"\0" + (b"x" if st.st_mode & 0o111 else b"-") + b"\0")
+            with path.open("rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+            h.update(b"\0")
+        except Exception:
+            h.update(rel.encode("utf-8") + b"\0?\0")
+    # The compose file carries the build settings (context, dockerfile, args).
+    try:
+        h.update(HOME_COMPOSE_FILE.read_bytes())
+    except Exception:
+        pass
+    return h.hexdigest(), len(files)
+
+
+def _backend_image_id() -> str:
+    try:
+        res = _sh(docker_compose_cmd(["images", "-q", "backend"]), timeout_s=20)
+        ids = [x.strip() for x in (res.stdout or "").splitlines() if x.strip()] if res.returncode == 0 else []
+        return ids[0] if ids else ""
+    except Exception:
+        return ""
+
+
+def _docker_image_exists(image_id: str) -> bool:
+    if not image_id:
+        return False
+    docker_bin = find_docker_bin()
+    try:
+        res = _sh([str(docker_bin) if docker_bin else "docker", "image", "inspect", "-f", "{{.Id}}", image_id], timeout_s=15)
+        return res.returncode == 0
+    except Exception:
+        return False
+
+
+def backend_build_plan(force: bool = False) -> Dict[str, Any]:
+    """Whether `up` needs --build: {"build": bool, "hash", "files", "reason"}."""
+    t0 = time.time()
+    digest, files = backend_context_hash()
+    plan: Dict[str, Any] = {"build": True, "hash": digest, "files": files, "hash_ms": int((time.time() - t0) * 1000)}
+    st = _load_json(BACKEND_BUILD_STATE)
+    if force:
+        plan["reason"] = "手动要求重新构建"
+    elif str(st.get("hash") or "") != digest:
+        plan["reason"] = "后端代码有变化" if st.get("hash") else "首次构建"
+    elif not _docker_image_exists(str(st.get("image_id") or "")):
+        plan["reason"] = "上次构建的镜像已不存在"
+    else:
+        plan["build"] = False
+        plan["reason"] = "后端代码未变化，跳过构建"
+    return plan
+
+
+def backend_build_record(plan: Dict[str, Any], build_s: float) -> None:
+    """After a successful --build: remember which hash produced which image, and how long it took."""
+    image_id = _backend_image_id()
+    _save_json(
+        BACKEND_BUILD_STATE,
+        {"hash": plan["hash"], "image_id": image_id, "files": plan.get("files"), "built_ts": int(time.time()), "build_s": round(build_s, 2)},
+    )
+    ops_history_add("backend_build", build_s=round(build_s, 2), hash=str(plan["hash"])[:12], image_id=image_id[:19], reason=plan.get("reason"))
+
+
+# ---------------------------------------------------------------------------
+# 启动用时（按服务）
+#
+# 每次启动/重启后，从 docker inspect 读出各服务的创建、启动、健康时间（后端没有容器健康检查，
+# 用 /health 通过的时间），记进 ops_history.jsonl；「启动性能」卡片据此显示趋势并标出变慢。
+# 断电后 Postgres 恢复变慢是主要的停机来源之一，这里能直接看出来。
+# ---------------------------------------------------------------------------
+
+STARTUP_SERVICES = ("db", "redis", "backend")
+STARTUP_REGRESSION_RATIO = 1.5
+STARTUP_REGRESSION_MIN_S = 5.0
+STARTUP_HEALTH_WAIT_S = 90
+
+
+def _docker_ts(raw: Any) -> float:
+    """Docker RFC3339 timestamps ("2024-05-01T10:00:00.123456789Z" / "+08:00") -> epoch seconds; 0 if unset."""
+    m = re.match(r"(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(\.\d+)?(Z|[+-]\d\d:\d\d)?", str(raw or ""))
+    if not m or m.group(1).startswith("0001-"):
+        return 0.0
+    ts = float(calendar.timegm(time.strptime(m.group(1), "%Y-%m-%dT%H:%M:%S")))
+    if m.group(2):
+        ts += float("0" + m.group(2)[:7])
+    tz = m.group(3) or "Z"
+    if tz != "Z":
+        sign = 1 if tz[0] == "+" else -1
+        ts -= sign * (int(tz[1:3]) * 3600 + int(tz[4:6]) * 60)
+    return ts
+
+
+def _compose_inspect() -> List[Dict[str, Any]]:
+    res = _sh(docker_compose_cmd(["ps", "-a", "-q"]), timeout_s=20)
+    ids = [x.strip() for x in (res.stdout or "").splitlines() if x.strip()] if res.returncode == 0 else []
+    if not ids:
+        return []
+    docker_bin = find_docker_bin()
+    res = _sh([str(docker_bin) if docker_bin else "docker", "inspect", *ids], timeout_s=20)
+    try:
+        data = json.loads(res.stdout or "[]") if res.returncode == 0 else []
+    except Exception:
+        data = []
+    return [c for c in data if isinstance(c, dict)]
+
+
+def compose_startup_timings(op_start_ts: float, backend_ready_ts: float = 0.0) -> Dict[str, Dict[str, Any]]:
+    """
+    Per service: start_s (operation start -> container started), ready_s (started -> healthy) and
+    total_s. Services whose container was not (re)started by this operation are marked restarted=False.
+    Waits up to STARTUP_HEALTH_WAIT_S for health checks still in "starting".
+    """
+    containers: List[Dict[str, Any]] = []
+
+    def _settled() -> Optional[Tuple[bool, str]]:
+        nonlocal containers
+        containers = _compose_inspect()
+        starting = [c for c in containers if str(((c.get("State") or {}).get("Health") or {}).get("Status") or "") == "starting"]
+        return None if starting else (True, "")
+
+    wait_ready(_settled, STARTUP_HEALTH_WAIT_S, first_s=0.5)
+    out: Dict[str, Dict[str, Any]] = {}
+    for c in containers:
+        svc = str(((c.get("Config") or {}).get("Labels") or {}).get("com.docker.compose.service") or "")
+        if svc not in STARTUP_SERVICES or svc in out:
+            continue
+        state = c.get("State") or {}
+        created = _docker_ts(c.get("Created"))
+        started = _docker_ts(state.get("StartedAt"))
+        if not started or started < op_start_ts - 1:
+            out[svc] = {"restarted": False}
+            continue
+        healthy = 0.0
+        for e in (state.get("Health") or {}).get("Log") or []:  # oldest first
+            end = _docker_ts(e.get("End"))
+            if int(e.get("ExitCode", 1)) == 0 and end >= started:
+                healthy = end
+                break
+        if svc == "backend" and not healthy and backend_ready_ts >= started:
+            healthy = backend_ready_ts
+        out[svc] = {
+            "restarted": True,
+            "recreated": created >= op_start_ts - 1,
+            "start_s": round(started - op_start_ts, 2),
+            "ready_s": round(healthy - started, 2) if healthy else None,
+            "total_s": round((healthy or started) - op_start_ts, 2),
+        }
+    return out
+
+
+def startup_record(op: str, op_start_ts: float, backend_ready_ts: float = 0.0) -> Dict[str, Dict[str, Any]]:
+    try:
+        timings = compose_startup_timings(op_start_ts, backend_ready_ts)
+    except Exception:
+        return {}
+    if any(t.get("restarted") for t in timings.values()):
+        ops_history_add("startup", op=op, services=timings)
+        job_log("[ops] 启动用时：" + "，".join(f"{k} {v['total_s']}s" for k, v in timings.items() if v.get("restarted")))
+    return timings
+
+
+def startup_summary(limit: int = 30) -> Dict[str, Any]:
+    """Latest vs median of earlier runs per service; a run is a regression if it is both 1.5x and 5s slower."""
+    runs = ops_history("startup", limit)
+    services: Dict[str, Any] = {}
+    for svc in STARTUP_SERVICES:
+        vals = [
+            float(r["services"][svc]["total_s"])
+            for r in runs
+            if isinstance((r.get("services") or {}).get(svc), dict) and r["services"][svc].get("restarted")
+        ]
+        if not vals:
+            continue
+        prev = sorted(vals[1:])
+        median = prev[len(prev) // 2] if prev else None
+        latest = vals[0]
+        services[svc] = {
+            "latest_s": latest,
+            "median_s": median,
+            "runs": len(vals),
+            "regressed": bool(
+                median is not None and latest > median * STARTUP_REGRESSION_RATIO and latest - median >= STARTUP_REGRESSION_MIN_S
+            ),
+            "trend": list(reversed(vals[:10])),
+        }
+    return {
+        "ok": True,
+        "last_ts": int(runs[0]["ts"]) if runs else 0,
+        "last_op": str(runs[0].get("op") or "") if runs else "",
+        "services": services,
+        "recent": [{"ts": r.get("ts"), "op": r.get("op"), "services": r.get("services")} for r in runs[:10]],
+        "ready_trend": [r.get("ready_s") for r in reversed(ops_history("docker_up", 10)) if r.get("ok")],
+    }
+
+
+def docker_up(force_build: bool = False) -> Tuple[bool, str, str]:
+    """Start (building only when needed) and wait for /health; returns (ok, message, detail)."""
     try:
         # 端口冲突是“最常见、最让非技术同学崩溃”的问题；这里做一次自动避让。
         ensure_home_env_file()
@@ -597,13 +1196,41 @@ def docker_up() -> Tuple[bool, str]:
                 comment="本机后端端口（宿主机端口映射到容器 8080）。macOS 下 OrbStack 可能占用 8080，建议用 18080。",
             )
 
-        res = _sh(docker_compose_cmd(["up", "-d", "--build"]), timeout_s=600)
+        plan = backend_build_plan(force=force_build)
+        job_log(f"[ops] {plan['reason']}（{plan['files']} 个文件，哈希用时 {plan['hash_ms']}ms）")
+        t0 = time.time()
+        res = _sh(docker_compose_cmd(["up", "-d", "--build"] if plan["build"] else ["up", "-d"]), timeout_s=600, stream=True)
+        up_s = time.time() - t0
         out = res.stdout or ""
-        if res.returncode == 0 and changed:
+        if res.returncode != 0:
+            ops_history_add("docker_up", ok=False, up_s=round(up_s, 2), built=bool(plan["build"]))
+            return False, out, out
+        if plan["build"]:
+            backend_build_record(plan, up_s)
+        out = (f"{plan['reason']}\n\n" + out).strip()
+        if changed:
             out = (f"已自动选择可用端口：{chosen}（避免端口冲突）\n\n" + out).strip()
-        return res.returncode == 0, out
+
+        job_log("[ops] 等待后端就绪（/health）…")
+        ready, health_s, hmsg = wait_backend_ready(chosen)
+        ready_s = up_s + health_s
+        startup_record("docker_up", t0, (t0 + ready_s) if ready else 0.0)
+        ops_history_add(
+            "docker_up",
+            ok=ready,
+            built=bool(plan["build"]),
+            up_s=round(up_s, 2),
+            health_s=round(health_s, 2),
+            ready_s=round(ready_s, 2),
+            port=int(chosen),
+        )
+        if not ready:
+            msg = f"容器已启动，但后端 {BACKEND_READY_DEADLINE_S} 秒内未就绪（/health：{hmsg or '无响应'}）"
+            return False, msg, (msg + "\n\n" + out).strip()
+        msg = f"后端已就绪，就绪用时 {ready_s:.1f} 秒（compose {up_s:.1f} 秒 + 等待健康检查 {health_s:.1f} 秒）"
+        return True, msg, (msg + "\n\n" + out).strip()
     except Exception as e:
-        return False, humanize_error(str(e))
+        return False, humanize_error(str(e)), str(e)
 
 
 def validate_backend_host_port(port: int) -> Tuple[bool, str]:
@@ -673,9 +1300,13 @@ def set_backend_host_port(port_text: str) -> Tuple[bool, str]:
             return True, f"已生效：后端端口 {p}"
 
     try:
-        res = _sh(docker_compose_cmd(["up", "-d", "--build", "backend"]), timeout_s=600)
+        plan = backend_build_plan()
+        t0 = time.time()
+        res = _sh(docker_compose_cmd(["up", "-d", *(["--build"] if plan["build"] else []), "backend"]), timeout_s=600, stream=True)
         if res.returncode != 0:
             return False, humanize_error(res.stdout or f"exit={res.returncode}")
+        if plan["build"]:
+            backend_build_record(plan, time.time() - t0)
         return True, f"已生效：后端端口 {p}"
     except Exception as e:
         return False, humanize_error(str(e))
@@ -683,7 +1314,7 @@ def set_backend_host_port(port_text: str) -> Tuple[bool, str]:
 
 def docker_down() -> Tuple[bool, str]:
     try:
-        res = _sh(docker_compose_cmd(["down"]), timeout_s=180)
+        res = _sh(docker_compose_cmd(["down"]), timeout_s=180, stream=True)
         return res.returncode == 0, res.stdout or ""
     except Exception as e:
         return False, humanize_error(str(e))
@@ -694,12 +1325,22 @@ def docker_restart(service: str) -> Tuple[bool, str]:
     if not svc:
         return False, "缺少服务名"
     try:
-        res = _sh(docker_compose_cmd(["restart", svc]), timeout_s=180)
+        t0 = time.time()
+        res = _sh(docker_compose_cmd(["restart", svc]), timeout_s=180, stream=True)
+        if res.returncode == 0 and svc in STARTUP_SERVICES:
+            startup_record(f"docker_restart:{svc}", t0, _backend_ready_ts() if svc == "backend" else 0.0)
         return res.returncode == 0, res.stdout or ""
     except Exception as e:
         return False, humanize_error(str(e))
 
 
+def _backend_ready_ts() -> float:
+    # The backend has no container health check; /health passing is its "healthy" time.
+    env = read_env_file(HOME_ENV_FILE)
+    ok, _, _ = wait_backend_ready(backend_host_port(env))
+    return time.time() if ok else 0.0
+
+
 def docker_stop_container(name: str) -> Tuple[bool, str]:
     # 仅用于“端口被占用/栈冲突”场景的兜底恢复；不删除容器与数据。
     n = name.strip()
@@ -725,7 +1366,7 @@ def docker_logs(service: str, tail: int = 120) -> str:
         return humanize_error(str(e))
 
 
-def http_health(url: str, timeout_s: int = 3) -> Tuple[bool, str]:
+def http_health(url: str, timeout_s: float = 3) -> Tuple[bool, str]:
     try:
         # Cloudflare Bot/WAF may block default Python user agents (e.g. error code 1010),
         # causing false negatives in our health checks. Use a browser-like UA to match
@@ -763,7 +1404,7 @@ def http_health(url: str, timeout_s: int = 3) -> Tuple[bool, str]:
         return False, humanize_error(str(e))
 
 
-def _http_json_post(url: str, payload: Any, timeout_s: int = 6) -> Tuple[bool, str]:
+def _http_json_post(url: str, payload: Any, timeout_s: float = 6) -> Tuple[bool, str]:
     try:
         raw = json.dumps(payload, ensure_ascii=False).encode("utf-8")
         req = urllib.request.Request(
@@ -775,7 +1416,7 @@ def _http_json_post(url: str, payload: Any, timeout_s: int = 6) -> Tuple[bool, s
                 "User-Agent": "naibao-ops-alert/1.0",
             },
         )
-        with urllib.request.urlopen(req, timeout=int(timeout_s)) as r:
+        with urllib.request.urlopen(req, timeout=float(timeout_s)) as r:
             code = int(getattr(r, "status", 0) or 0)
             return (code >= 200 and code < 300), (f"HTTP {code}" if code else "ok")
     except urllib.error.HTTPError as e:
@@ -785,7 +1426,7 @@ def _http_json_post(url: str, payload: Any, timeout_s: int = 6) -> Tuple[bool, s
         return False, humanize_error(str(e))
 
 
-def alert_send_wecom(webhook_url: str, title: str, body: str) -> Tuple[bool, str]:
+def alert_send_wecom(webhook_url: str, title: str, body: str, timeout_s: float = 6) -> Tuple[bool, str]:
     url = (webhook_url or "").strip()
     if not url:
         return False, "缺少企业微信 Webhook"
@@ -794,25 +1435,32 @@ def alert_send_wecom(webhook_url: str, title: str, body: str) -> Tuple[bool, str
     # WeCom markdown is widely supported and readable on phone.
     content = f"**{t}**\n\n{b}".strip()
     payload = {"msgtype": "markdown", "markdown": {"content": content}}
-    return _http_json_post(url, payload, timeout_s=6)
+    return _http_json_post(url, payload, timeout_s=timeout_s)
 
 
-def alert_send_telegram(bot_token: str, chat_id: str, title: str, body: str) -> Tuple[bool, str]:
+def alert_send_telegram(
+    bot_token: str,
+    chat_id: str,
+    title: str,
+    body: str,
+    timeout_s: float = 8,
+    api_base: str = "https://api.telegram.org",
+) -> Tuple[bool, str]:
     token = (bot_token or "").strip()
     cid = (chat_id or "").strip()
     if not token or not cid:
         return False, "缺少 Telegram token/chat_id"
     text = (f"{(title or '').strip()}\n{(body or '').strip()}").strip()
-    api = f"https://api.telegram.org/bot{token}/sendMessage"
+    api = f"{(api_base or 'https://api.telegram.org').strip().rstrip('/')}/bot{token}/sendMessage"
     payload = {
         "chat_id": cid,
         "text": text,
         "disable_web_page_preview": True,
     }
-    return _http_json_post(api, payload, timeout_s=8)
+    return _http_json_post(api, payload, timeout_s=timeout_s)
 
 
-def alert_send_bark(bark_url_prefix: str, title: str, body: str) -> Tuple[bool, str]:
+def alert_send_bark(bark_url_prefix: str, title: str, body: str, timeout_s: float = 6) -> Tuple[bool, str]:
     prefix = (bark_url_prefix or "").strip().rstrip("/")
     if not prefix:
         return False, "缺少 Bark URL"
@@ -827,7 +1475,7 @@ def alert_send_bark(bark_url_prefix: str, title: str, body: str) -> Tuple[bool,
             method="GET",
             headers={"User-Agent": "naibao-ops-alert/1.0"},
         )
-        with urllib.request.urlopen(req, timeout=6) as r:
+        with urllib.request.urlopen(req, timeout=float(timeout_s)) as r:
             code = int(getattr(r, "status", 0) or 0)
             return (code >= 200 and code < 300), (f"HTTP {code}" if code else "ok")
     except urllib.error.HTTPError as e:
@@ -953,6 +1601,26 @@ def is_pid_alive(pid: int) -> bool:
         return False
 
 
+def pid_cmdline(pid: int) -> str:
+    """Command line of a running process ("" if unknown); /proc on Linux, ps elsewhere."""
+    try:
+        raw = Path(f"/proc/{int(pid)}/cmdline").read_bytes()
+        if raw:
+            return raw.replace(b"\0", b" ").decode("utf-8", errors="ignore").strip()
+    except Exception:
+        pass
+    ok, out = _safe_cmd(["ps", "-o", "command=", "-p", str(int(pid))], timeout_s=3)
+    return out if ok else ""
+
+
+def tunnel_on_standby() -> bool:
+    """True if the connector in TUN_PID runs on TUN_STANDBY_CFG, i.e. public traffic is on the standby backend."""
+    pid = read_pid(TUN_PID)
+    if not (pid and is_pid_alive(pid)):
+        return False
+    return str(TUN_STANDBY_CFG) in pid_cmdline(pid)
+
+
 def stop_tunnel() -> Tuple[bool, str]:
     pid = read_pid(TUN_PID)
     if not pid:
@@ -993,8 +1661,11 @@ def start_tunnel(env: Dict[str, str]) -> Tuple[bool, str]:
     hostname = (env.get("NB_TUNNEL_HOSTNAME") or "api.naibao.me").strip()
     local_port = backend_host_port(env)
 
+    # Local metrics server: /ready answers 200 once a connection to Cloudflare is registered.
+    metrics_port = free_local_port()
+    metrics = ["--metrics", f"127.0.0.1:{metrics_port}"] if metrics_port else []
     if mode == "quick":
-        cmd = [str(bin_path), "tunnel", "--no-autoupdate", "--url", f"http://127.0.0.1:{int(local_port)}"]
+        cmd = [str(bin_path), "tunnel", "--no-autoupdate", *metrics, "--url", f"http://127.0.0.1:{int(local_port)}"]
     else:
         # named tunnel：需要用户自行完成 cloudflared login + create + route dns
         if TUN_CFG.exists():
@@ -1002,24 +1673,21 @@ def start_tunnel(env: Dict[str, str]) -> Tuple[bool, str]:
             # 避免“后端已改端口但 tunnel 仍指向旧端口”的隐蔽故障。
             try:
                 raw = TUN_CFG.read_text(encoding="utf-8", errors="ignore")
-                patched = re.sub(
-                    r"(service:\\s*http://127\\.0\\.0\\.1:)\\d+",
-                    lambda m: m.group(1) + str(int(local_port)),
-                    raw,
-                )
+                patched = patch_tunnel_config_port(raw, int(local_port))
                 if patched != raw:
                     TUN_CFG.write_text(patched, encoding="utf-8")
             except Exception:
                 pass
             # 使用项目运行时目录的 config（不污染 ~/.cloudflared/config.yml）
-            cmd = [str(bin_path), "tunnel", "--no-autoupdate", "--config", str(TUN_CFG), "run", name]
+            cmd = [str(bin_path), "tunnel", "--no-autoupdate", *metrics, "--config", str(TUN_CFG), "run", name]
         else:
-            cmd = [str(bin_path), "tunnel", "--no-autoupdate", "run", name]
+            cmd = [str(bin_path), "tunnel", "--no-autoupdate", *metrics, "run", name]
 
     with TUN_LOG.open("a", encoding="utf-8") as f:
         f.write("\n")
         f.write(f"[ops] starting cloudflared: {' '.join(cmd)}\n")
         f.flush()
+        log_offset = f.tell()
         try:
             p = subprocess.Popen(
                 cmd,
@@ -1032,16 +1700,296 @@ def start_tunnel(env: Dict[str, str]) -> Tuple[bool, str]:
             return False, humanize_error(str(e))
 
     TUN_PID.write_text(str(p.pid), encoding="utf-8")
+    try:
+        TUN_METRICS.write_text(str(metrics_port or ""), encoding="utf-8")
+    except Exception:
+        pass
 
-    # Wait a bit and check if process exited quickly
-    time.sleep(0.6)
-    if not is_pid_alive(p.pid):
+    job_log("[ops] 等待外网通道连上 Cloudflare…")
+    ready, ready_s, how = wait_ready(lambda: tunnel_ready_check(p, metrics_port, log_offset), TUNNEL_READY_DEADLINE_S)
+    alive = p.poll() is None
+    ops_history_add("tunnel_start", ok=bool(ready), ready_s=round(ready_s, 2), mode=mode, via=how or ("timeout" if alive else "exited"))
+    if not alive:
         tail = tail_file(TUN_LOG, 40)
         return False, f"外网通道启动失败（请查看通道日志）：\n{tail}"
 
+    if ready:
+        state = f"已连上 Cloudflare，就绪用时 {ready_s:.1f} 秒"
+    else:
+        state = f"进程已启动，但 {TUNNEL_READY_DEADLINE_S} 秒内还没连上 Cloudflare（会自动重试，稍后刷新查看）"
     if mode == "quick":
-        return True, "已启动（临时外网）。外网链接会从日志中自动识别。"
-    return True, f"已启动（固定外网）。预期域名：https://{hostname}"
+        return True, f"已启动（临时外网）。{state}。外网链接会从日志中自动识别。"
+    return True, f"已启动（固定外网）。{state}。预期域名：https://{hostname}"
+
+
+def patch_tunnel_config_port(raw: str, port: int) -> str:
+    """Point the named tunnel's local service (service: http://127.0.0.1:<port>) at `port`."""
+    return re.sub(r"(service:\s*http://127\.0\.0\.1:)\d+", lambda m: m.group(1) + str(int(port)), raw)
+
+
+def free_local_port() -> int:
+    """A currently free 127.0.0.1 port (0 if none could be reserved)."""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind(("127.0.0.1", 0))
+            return int(s.getsockname()[1])
+    except Exception:
+        return 0
+
+
+def tunnel_ready_check(proc: subprocess.Popen, metrics_port: int, log_offset: int) -> Optional[Tuple[bool, str]]:
+    """Ready signal for cloudflared: metrics /ready == 200, or a "Registered tunnel connection" log line."""
+    if proc.poll() is not None:
+        return False, "exited"
+    if metrics_port:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{int(metrics_port)}/ready", timeout=1) as r:
+                if int(getattr(r, "status", 0) or 0) == 200:
+                    return True, "metrics"
+        except Exception:
+            pass
+    try:
+        with TUN_LOG.open("rb") as f:
+            f.seek(int(log_offset))
+            if b"Registered tunnel connection" in f.read(1 << 20):
+                return True, "log"
+    except Exception:
+        pass
+    return None
+
+
+def tunnel_connected(pid: int) -> Optional[bool]:
+    """
+    Whether the running connector is registered with Cloudflare, from its metrics /ready (port in TUN_METRICS).
+    None when unknown (not running, or started without a metrics port).
+    """
+    if not (pid and is_pid_alive(pid)):
+        return None
+    try:
+        port = int(TUN_METRICS.read_text(encoding="utf-8").strip() or "0")
+    except Exception:
+        return None
+    if not port:
+        return None
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=1) as r:
+            return int(getattr(r, "status", 0) or 0) == 200
+    except Exception:
+        # /ready answers 503 until a connection is registered.
+        return False
+
+
+# ---------------------------------------------------------------------------
+# 后端滚动重启（固定外网）
+#
+# 原地重启会让外网请求失败好几秒（家人记录喂奶时正好赶上就会报错）。滚动重启：
+# 1) 用同一镜像在备用端口起一个临时后端，等 /health 通过；
+# 2) 再起一个指向备用端口的 cloudflared 连接器（同一 tunnel 可以有多个连接器），连上后停掉旧连接器；
+# 3) 原地重启正式后端，等它 /health 通过后把流量切回（同样先连新、再停旧），最后删掉临时后端。
+# 全程每 0.25 秒探一次外网 /api/health，结果里报告实际不可用的时长。
+# ---------------------------------------------------------------------------
+
+ROLLING_STANDBY_NAME = "naibao-backend-standby"
+ROLLING_PROBE_INTERVAL_S = 0.25
+
+
+class _DowntimeMonitor:
+    """Polls a health URL in the background; reports failed samples and the longest outage."""
+
+    def __init__(self, url: str, interval_s: float = ROLLING_PROBE_INTERVAL_S) -> None:
+        self.url = url
+        self.interval_s = float(interval_s)
+        self.samples: List[Tuple[float, bool]] = []
+        self._stop = threading.Event()
+        self._t = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            t = time.time()
+            ok, _ = http_health(self.url, timeout_s=2)
+            self.samples.append((t, bool(ok)))
+            self._stop.wait(max(0.0, self.interval_s - (time.time() - t)))
+
+    def start(self) -> "_DowntimeMonitor":
+        self._t.start()
+        return self
+
+    def stop(self) -> Dict[str, Any]:
+        self._stop.set()
+        self._t.join(3)
+        longest = 0.0
+        fail_start: Optional[float] = None
+        for t, ok in self.samples:
+            if not ok and fail_start is None:
+                fail_start = t
+            elif ok and fail_start is not None:
+                longest = max(longest, t - fail_start)
+                fail_start = None
+        if fail_start is not None and self.samples:
+            longest = max(longest, self.samples[-1][0] - fail_start + self.interval_s)
+        return {
+            "url": self.url,
+            "samples": len(self.samples),
+            "failed": sum(1 for _, ok in self.samples if not ok),
+            "downtime_ms": int(longest * 1000),
+        }
+
+
+def _tunnel_connector_start(bin_path: Path, name: str, cfg: Path) -> Tuple[Optional[subprocess.Popen], str]:
+    """Start one more cloudflared connector for the named tunnel and wait until it is registered."""
+    metrics_port = free_local_port()
+    metrics = ["--metrics", f"127.0.0.1:{metrics_port}"] if metrics_port else []
+    cmd = [str(bin_path), "tunnel", "--no-autoupdate", *metrics, "--config", str(cfg), "run", name]
+    with TUN_LOG.open("a", encoding="utf-8") as f:
+        f.write("\n")
+        f.write(f"[ops] starting cloudflared: {' '.join(cmd)}\n")
+        f.flush()
+        log_offset = f.tell()
+        try:
+            p = subprocess.Popen(cmd, cwd=str(ROOT_DIR), stdout=f, stderr=subprocess.STDOUT, text=True)
+        except Exception as e:
+            return None, humanize_error(str(e))
+    ready, ready_s, _ = wait_ready(lambda: tunnel_ready_check(p, metrics_port, log_offset), TUNNEL_READY_DEADLINE_S)
+    if not ready:
+        try:
+            p.terminate()
+        except Exception:
+            pass
+        return None, f"新的外网连接 {TUNNEL_READY_DEADLINE_S} 秒内没有连上 Cloudflare"
+    job_log(f"[ops] 新连接已就绪（{ready_s:.1f} 秒，pid={p.pid}）")
+    try:
+        TUN_METRICS.write_text(str(metrics_port or ""), encoding="utf-8")
+    except Exception:
+        pass
+    return p, ""
+
+
+def _tunnel_connector_switch(bin_path: Path, name: str, cfg: Path) -> Tuple[bool, str]:
+    """Make-before-break: start a connector on cfg, then stop the one in TUN_PID."""
+    new, err = _tunnel_connector_start(bin_path, name, cfg)
+    if new is None:
+        return False, err
+    old = read_pid(TUN_PID)
+    TUN_PID.write_text(str(new.pid), encoding="utf-8")
+    if old and old != new.pid and is_pid_alive(old):
+        try:
+            os.kill(old, 15)
+        except Exception:
+            pass
+    return True, ""
+
+
+def backend_rolling_restart(env: Dict[str, str]) -> Tuple[bool, str, str]:
+    mode = (env.get("NB_TUNNEL_MODE") or "named").strip().lower()
+    name = (env.get("NB_TUNNEL_NAME") or "naibao-api").strip()
+    hostname = (env.get("NB_TUNNEL_HOSTNAME") or "api.naibao.me").strip()
+    port = backend_host_port(env)
+    if mode == "quick" or not TUN_CFG.exists():
+        return False, "滚动重启只支持固定外网（临时外网每次启动都会换地址），请用「重启后端」", ""
+    pid = read_pid(TUN_PID)
+    bin_path = find_cloudflared_bin()
+    if not (pid and is_pid_alive(pid)) or not bin_path:
+        return False, "外网通道未运行，滚动重启没有意义，请直接用「重启后端」", ""
+    on_standby = tunnel_on_standby()
+    ok0, msg0 = http_health(f"http://127.0.0.1:{int(port)}/health", timeout_s=3)
+    if not ok0 and on_standby:
+        return False, (
+            f"外网流量仍由上次滚动重启留下的临时后端（{ROLLING_STANDBY_NAME}）承接，而正式后端不健康（{msg0}）；"
+            "先修好正式后端（查看后端日志 / 「重启后端」），再滚动重启"
+        ), ""
+    if not ok0:
+        return False, f"后端当前不健康（{msg0}），滚动重启需要先有一个可用的后端，请用「重启后端」或「一键启动/修复」", ""
+
+    docker_bin = find_docker_bin()
+    docker_exe = str(docker_bin) if docker_bin else "docker"
+    steps: List[str] = []
+
+    def _step(line: str) -> None:
+        steps.append(line)
+        job_log("[ops] " + line)
+
+    alt = 0
+    for cand in range(int(port) + 1, int(port) + 20):
+        if is_tcp_port_free(cand):
+            alt = cand
+            break
+    if not alt:
+        return False, "找不到可用的备用端口", ""
+
+    state = {"standby_serving": False}
+
+    def _run() -> Tuple[bool, str]:
+        if on_standby:
+            # A previous run left traffic on the standby. Move it back first: the
+            # "rm -f" below would otherwise delete the only backend serving the public.
+            _step("0/5 上次滚动重启未完成，外网流量仍在临时后端上，先切回正式后端")
+            state["standby_serving"] = True
+            switched, err = _tunnel_connector_switch(bin_path, name, TUN_CFG)
+            if not switched:
+                return False, f"{err}；外网流量仍由临时后端承接，未做任何改动"
+            state["standby_serving"] = False
+        _sh([docker_exe, "rm", "-f", ROLLING_STANDBY_NAME], timeout_s=30)
+        _step(f"1/5 在备用端口 {alt} 启动临时后端")
+        res = _sh(
+            docker_compose_cmd(["run", "-d", "--no-deps", "--name", ROLLING_STANDBY_NAME, "-p", f"{alt}:8080", "backend"]),
+            timeout_s=120,
+            stream=True,
+        )
+        if res.returncode != 0:
+            _step("临时后端启动失败：" + (res.stdout or "").strip())
+            return False, "临时后端启动失败"
+        ready, ready_s, hmsg = wait_backend_ready(alt)
+        if not ready:
+            return False, f"临时后端 {BACKEND_READY_DEADLINE_S} 秒内未就绪（/health：{hmsg or '无响应'}），未做任何切换"
+        _step(f"临时后端已就绪（{ready_s:.1f} 秒）")
+
+        _step("2/5 外网流量切到临时后端")
+        raw = TUN_CFG.read_text(encoding="utf-8", errors="ignore")
+        TUN_STANDBY_CFG.write_text(patch_tunnel_config_port(raw, alt), encoding="utf-8")
+        switched, err = _tunnel_connector_switch(bin_path, name, TUN_STANDBY_CFG)
+        if not switched:
+            return False, err + "，未做任何切换"
+        state["standby_serving"] = True
+
+        _step("3/5 重启正式后端")
+        res = _sh(docker_compose_cmd(["restart", "backend"]), timeout_s=180, stream=True)
+        ready, ready_s, hmsg = wait_backend_ready(port) if res.returncode == 0 else (False, 0.0, (res.stdout or "").strip())
+        if not ready:
+            return False, f"正式后端重启后未就绪（{hmsg or '无响应'}）；外网流量仍由临时后端（端口 {alt}）承接，请查看后端日志"
+        _step(f"正式后端已就绪（{ready_s:.1f} 秒）")
+
+        _step("4/5 外网流量切回正式后端")
+        switched, err = _tunnel_connector_switch(bin_path, name, TUN_CFG)
+        if not switched:
+            return False, f"{err}；外网流量仍由临时后端（端口 {alt}）承接，稍后可再试"
+        state["standby_serving"] = False
+
+        _step("5/5 删除临时后端")
+        return True, "后端已滚动重启"
+
+    mon = _DowntimeMonitor(f"https://{hostname}/api/health").start()
+    t0 = time.time()
+    try:
+        ok, message = _run()
+    except Exception as e:
+        ok, message = False, humanize_error(str(e))
+    if not ok:
+        _step("未完成：" + message)
+    if not state["standby_serving"]:
+        try:
+            _sh([docker_exe, "rm", "-f", ROLLING_STANDBY_NAME], timeout_s=60)
+        except Exception:
+            pass
+    down = mon.stop()
+    total_s = time.time() - t0
+    ops_history_add("backend_rolling_restart", ok=ok, total_s=round(total_s, 2), alt_port=alt, **down)
+    steps.append(
+        f"外网可用性：探测 {down['samples']} 次，失败 {down['failed']} 次，最长不可用 {down['downtime_ms'] / 1000:.2f} 秒"
+        f"（总用时 {total_s:.1f} 秒）"
+    )
+    if ok:
+        message = f"后端已滚动重启（外网最长不可用 {down['downtime_ms'] / 1000:.1f} 秒）"
+    return ok, message, "\n".join(steps)
 
 
 def tail_file(path: Path, lines: int = 120) -> str:
@@ -1108,6 +2056,7 @@ def named_tunnel_init() -> Tuple[bool, str]:
         f.write("\n")
         f.write(f"[ops] starting named tunnel init: {' '.join(cmd)}\n")
         f.flush()
+        log_offset = f.tell()
         try:
             p = subprocess.Popen(
                 cmd,
@@ -1121,9 +2070,23 @@ def named_tunnel_init() -> Tuple[bool, str]:
 
     NAMED_INIT_PID.write_text(str(p.pid), encoding="utf-8")
 
-    # If it fails fast, surface a helpful message.
-    time.sleep(0.8)
+    # Ready = the script got past its pre-checks to the Cloudflare login step ("[2/4]"); if it
+    # exits first (missing tools, download failure...), surface that right away.
+    def _check() -> Optional[Tuple[bool, str]]:
+        if p.poll() is not None:
+            return False, "exited"
+        try:
+            with NAMED_INIT_LOG.open("rb") as lf:
+                lf.seek(log_offset)
+                if "[2/4]".encode("utf-8") in lf.read(1 << 20):
+                    return True, "login"
+        except Exception:
+            pass
+        return None
+
+    ready, ready_s, _ = wait_ready(_check, NAMED_INIT_READY_DEADLINE_S)
     rc = p.poll()
+    ops_history_add("named_tunnel_init", ok=rc is None or int(rc) == 0, ready_s=round(ready_s, 2), reached_login=bool(ready))
     if rc is not None:
         tail = tail_file(NAMED_INIT_LOG, 80)
         try:
@@ -1233,19 +2196,622 @@ def mobile_preview_logs() -> str:
     return "\n".join([p for p in parts if p.strip()]) or "暂无日志"
 
 
-def get_lan_ip() -> str:
-    # best-effort: get outbound interface IP
-    try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        ip = s.getsockname()[0]
-        s.close()
-        return ip
-    except Exception:
-        return ""
+# ---------------------------------------------------------------------------
+# 日志全文检索（/api/logs/search）
+#
+# 用户反馈“同步失败”时，需要在多份日志里找同一时间点的报错。这里维护一个轻量倒排索引：
+# - 每个日志文件按“上次已索引的字节偏移”增量索引（不重复读历史）
+# - 每次增量写一个只读 segment（varint + 差分编码，紧凑），小 segment 会被合并
+# - segment 头信息记在 meta.json；查询按时间先筛 segment，再 mmap 二分查词典，只解码命中的 posting，
+#   最后回源文件按偏移读取原始行
+# - 索引在后台线程里增量更新（检索时顺带触发），查询本身不持有索引锁
+# ---------------------------------------------------------------------------
+
+_LOG_INDEX_LOCK = threading.Lock()  # held by the (background) indexer; queries read meta + segments without it
+_LOG_SEG_MAPS: Dict[str, mmap.mmap] = {}  # segment name -> open read-only map, least recently used first
+_LOG_SEG_MAPS_LOCK = threading.Lock()
+_LOG_SEG_MAGIC = b"NBLX2\n"
+_LOG_SEG_CKPT = struct.Struct(">IQq")  # table pos, offset, ts before the line
+_LOG_TOKEN_RE = re.compile("[a-z0-9_]{2,32}|[\u4e00-\u9fff]")
+_LOG_TS_RE = re.compile(
+    r"^\[?(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:\.(\d+))?(Z|[+-]\d{2}:?\d{2})?"
+)
+LOG_INDEX_VERSION = 2
+LOG_INDEX_SEGMENT_MAX_LINES = 50000
+LOG_INDEX_MAX_SEGMENTS = 8
+LOG_INDEX_TRASH_S = 60  # retired segments are deleted this long after leaving meta.json
+LOG_SEG_CKPT_EVERY = 128
+LOG_SEG_MAPS_MAX = 256
+LOG_SEARCH_MAX_RESULTS = 2000
+LOG_SEARCH_INDEX_WAIT_S = 1.0
+
+
+def log_search_sources() -> Dict[str, Path]:
+    src: Dict[str, Path] = {
+        "tunnel": TUN_LOG,
+        "named_init": NAMED_INIT_LOG,
+        "alerts": ALERTS_LOG,
+        "mobile_preview_start": MOBILE_PREVIEW_START_LOG,
+        "mobile_preview_tunnel": MOBILE_PREVIEW_TUN_LOG,
+        "mobile_preview_dev": MOBILE_PREVIEW_DEV_LOG,
+    }
+    if BACKEND_CAPTURE_LOG.exists():
+        src["backend"] = BACKEND_CAPTURE_LOG
+    return src
 
 
-def pick_free_port(bind: str) -> int:
+def _docker_ts_key(stamp: str) -> Optional[Tuple[int, int]]:
+    """
+    RFC3339Nano stamp from `docker logs --timestamps` -> (epoch seconds, nanoseconds).
+    Docker trims trailing zeros from the fraction, so the strings don't sort lexicographically.
+    """
+    m = _LOG_TS_RE.match(stamp or "")
+    if not m or not m.group(8):
+        return None
+    try:
+        parts = [int(m.group(i)) for i in range(1, 7)]
+        sec = calendar.timegm((parts[0], parts[1], parts[2], parts[3], parts[4], parts[5], 0, 0, -1))
+    except Exception:
+        return None
+    tz = m.group(8)
+    if tz != "Z":
+        sign = -1 if tz[0] == "+" else 1
+        sec += sign * (int(tz[1:3]) * 3600 + int(tz[-2:]) * 60)
+    return int(sec), int((m.group(7) or "0")[:9].ljust(9, "0"))
+
+
+def _capture_line_hash(line: str) -> str:
+    return hashlib.sha1(line.encode("utf-8", "replace")).hexdigest()[:16]
+
+
+def capture_backend_logs(env: Dict[str, str]) -> Tuple[bool, str]:
+    """
+    Optional: append backend container logs into .naibao_runtime/backend_container.log
+    so they become searchable (enabled by NB_OPS_CAPTURE_BACKEND_LOGS=1 in deploy/.env.home).
+    """
+    if not env_bool(env, "NB_OPS_CAPTURE_BACKEND_LOGS", False):
+        return True, "未开启"
+    with _LOG_INDEX_LOCK:
+        meta = _load_json(LOG_INDEX_META)
+    last = str(meta.get("backend_capture_last") or "").strip()
+    args = ["logs", "--no-color", "--no-log-prefix", "--timestamps"]
+    args += ["--since", last] if last else ["--tail", "2000"]
+    # docker runs outside the index lock: it can take seconds and searches must not wait on it.
+    try:
+        res = _sh(docker_compose_cmd([*args, "backend"]), timeout_s=30)
+    except Exception as e:
+        return False, humanize_error(str(e))
+    if res.returncode != 0:
+        return False, humanize_error(res.stdout or f"exit={res.returncode}")
+
+    last_key = _docker_ts_key(last) if last else None
+    # --since is inclusive: lines stamped exactly `last` come back again. Skip the ones we already
+    # wrote (by content hash, counted, so repeated identical lines survive) and keep the rest.
+    seen: Dict[str, int] = {}
+    for h in meta.get("backend_capture_boundary") or []:
+        seen[str(h)] = seen.get(str(h), 0) + 1
+    fresh: List[str] = []
+    newest, newest_key = last, last_key
+    boundary: List[str] = list(meta.get("backend_capture_boundary") or [])
+    for ln in (res.stdout or "").splitlines():
+        stamp = ln.split(" ", 1)[0]
+        key = _docker_ts_key(stamp)
+        if key is None:
+            continue
+        if last_key is not None and key < last_key:
+            continue
+        h = _capture_line_hash(ln)
+        if last_key is not None and key == last_key and seen.get(h):
+            seen[h] -= 1
+            continue
+        fresh.append(ln)
+        if newest_key is None or key > newest_key:
+            newest, newest_key = stamp, key
+            boundary = [h]
+        elif key == newest_key:
+            boundary.append(h)
+    with _LOG_INDEX_LOCK:
+        if fresh:
+            ensure_runtime_dir()
+            with BACKEND_CAPTURE_LOG.open("a", encoding="utf-8") as f:
+                f.write("\n".join(fresh) + "\n")
+            # Re-read: log_index_update may have saved its own keys while docker was running.
+            meta = _load_json(LOG_INDEX_META)
+            meta["backend_capture_last"] = newest
+            meta["backend_capture_boundary"] = boundary
+            _save_json(LOG_INDEX_META, meta)
+    return True, f"新增 {len(fresh)} 行"
+
+
+def _varint_put(out: bytearray, n: int) -> None:
+    v = int(n)
+    while v >= 0x80:
+        out.append((v & 0x7F) | 0x80)
+        v >>= 7
+    out.append(v)
+
+
+def _varint_get(buf: bytes, pos: int) -> Tuple[int, int]:
+    shift = 0
+    v = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        v |= (b & 0x7F) << shift
+        if b < 0x80:
+            return v, pos
+        shift += 7
+
+
+def _log_tokens(text: str) -> List[str]:
+    return _LOG_TOKEN_RE.findall((text or "").lower())
+
+
+def _log_line_ts_ms(line: str) -> int:
+    m = _LOG_TS_RE.match(line)
+    if not m:
+        return 0
+    try:
+        parts = [int(m.group(i)) for i in range(1, 7)]
+        frac = (m.group(7) or "0")[:3].ljust(3, "0")
+        tz = m.group(8) or ""
+        tup = (parts[0], parts[1], parts[2], parts[3], parts[4], parts[5], 0, 0, -1)
+        if tz:
+            sec = calendar.timegm(tup)
+            if tz != "Z":
+                sign = -1 if tz[0] == "+" else 1
+                hh, mm = int(tz[1:3]), int(tz[-2:])
+                sec += sign * (hh * 3600 + mm * 60)
+        else:
+            sec = int(time.mktime(tup))
+        return int(sec) * 1000 + int(frac)
+    except Exception:
+        return 0
+
+
+def _log_seg_write(path: Path, source: str, start: int, lines: List[Tuple[int, int]], postings: Dict[str, List[int]]) -> Dict[str, Any]:
+    """
+    Segment layout (positions in the header are relative to the body, which starts at body_pos):
+      MAGIC | header json line | line table | postings | checkpoints | directory | directory index
+    - line table: per line (offset delta, zigzag ts delta) as varints
+    - postings: per token, delta-encoded line ordinals
+    - checkpoints: every LOG_SEG_CKPT_EVERY lines, (table pos, offset, ts) before that line, fixed width
+    - directory: tokens sorted by utf-8 bytes -> (postings pos, count)
+    - directory index: u32 position of each directory entry, so a lookup is a binary search
+    Returns the header (plus body_pos), which the index meta keeps so queries never parse it again.
+    """
+    body = bytearray()
+    ckpts = bytearray()
+    prev_off = start
+    prev_ts = 0
+    for i, (off, ts) in enumerate(lines):
+        if i % LOG_SEG_CKPT_EVERY == 0:
+            ckpts += _LOG_SEG_CKPT.pack(len(body), prev_off, prev_ts)
+        _varint_put(body, off - prev_off)
+        d = ts - prev_ts
+        _varint_put(body, (d << 1) if d >= 0 else ((-d << 1) - 1))
+        prev_off, prev_ts = off, ts
+    table_len = len(body)
+
+    entries: List[Tuple[bytes, int, int]] = []
+    for tok in sorted(postings, key=lambda t: t.encode("utf-8")):
+        ids = postings[tok]
+        pos = len(body)
+        prev = 0
+        for i in ids:
+            _varint_put(body, i - prev)
+            prev = i
+        entries.append((tok.encode("utf-8"), pos, len(ids)))
+    ckpt_pos = len(body)
+    body += ckpts
+    dir_pos = len(body)
+    index = bytearray()
+    for tb, pos, cnt in entries:
+        index += struct.pack(">I", len(body) - dir_pos)
+        _varint_put(body, len(tb))
+        body += tb
+        _varint_put(body, pos)
+        _varint_put(body, cnt)
+    idx_pos = len(body)
+    body += index
+
+    ts_vals = [ts for _, ts in lines if ts > 0]
+    header = {
+        "source": source,
+        "start": int(start),
+        "lines": len(lines),
+        "ts_min": min(ts_vals) if ts_vals else 0,
+        "ts_max": max(ts_vals) if ts_vals else 0,
+        "table_len": table_len,
+        "ckpt_pos": ckpt_pos,
+        "dir_pos": dir_pos,
+        "idx_pos": idx_pos,
+        "n_tok": len(entries),
+    }
+    head = _LOG_SEG_MAGIC + json.dumps(header, separators=(",", ":")).encode("utf-8") + b"\n"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(head + bytes(body))
+    tmp.replace(path)
+    return {"name": path.name, **header, "body_pos": len(head)}
+
+
+def _log_seg_map(name: str) -> mmap.mmap:
+    """Read-only mmap of a segment, kept open for reuse (segments never change once written)."""
+    with _LOG_SEG_MAPS_LOCK:
+        mm = _LOG_SEG_MAPS.pop(name, None)
+        if mm is not None:
+            _LOG_SEG_MAPS[name] = mm
+            return mm
+    with (LOG_INDEX_DIR / name).open("rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[: len(_LOG_SEG_MAGIC)] != _LOG_SEG_MAGIC:
+        raise ValueError(f"索引文件损坏：{name}")
+    with _LOG_SEG_MAPS_LOCK:
+        _LOG_SEG_MAPS[name] = mm
+        # Evict the least recently used; a query still holding one keeps it alive until it is done.
+        while len(_LOG_SEG_MAPS) > LOG_SEG_MAPS_MAX:
+            _LOG_SEG_MAPS.pop(next(iter(_LOG_SEG_MAPS)))
+    return mm
+
+
+def _log_seg_postings_at(mm: Any, pos: int, cnt: int) -> List[int]:
+    out: List[int] = []
+    cur = 0
+    for _ in range(cnt):
+        d, pos = _varint_get(mm, pos)
+        cur += d
+        out.append(cur)
+    return out
+
+
+def _log_seg_postings(mm: Any, seg: Dict[str, Any], tok: str) -> List[int]:
+    """Binary search the directory index for tok; decodes only that token's postings."""
+    bp = int(seg["body_pos"])
+    dir_pos = bp + int(seg["dir_pos"])
+    idx_pos = bp + int(seg["idx_pos"])
+    tb = tok.encode("utf-8")
+    lo, hi = 0, int(seg["n_tok"])
+    while lo < hi:
+        mid = (lo + hi) // 2
+        pos = dir_pos + struct.unpack_from(">I", mm, idx_pos + 4 * mid)[0]
+        ln, pos = _varint_get(mm, pos)
+        cur = mm[pos : pos + ln]
+        if cur < tb:
+            lo = mid + 1
+        elif cur > tb:
+            hi = mid
+        else:
+            ppos, pos = _varint_get(mm, pos + ln)
+            cnt, _ = _varint_get(mm, pos)
+            return _log_seg_postings_at(mm, bp + ppos, cnt)
+    return []
+
+
+def _log_seg_line(mm: Any, seg: Dict[str, Any], ordinal: int) -> Tuple[int, int]:
+    """(offset, ts) of one line: jump to the nearest checkpoint, decode at most LOG_SEG_CKPT_EVERY entries."""
+    bp = int(seg["body_pos"])
+    k = int(ordinal) // LOG_SEG_CKPT_EVERY
+    tpos, off, ts = _LOG_SEG_CKPT.unpack_from(mm, bp + int(seg["ckpt_pos"]) + k * _LOG_SEG_CKPT.size)
+    pos = bp + tpos
+    for _ in range(int(ordinal) - k * LOG_SEG_CKPT_EVERY + 1):
+        d, pos = _varint_get(mm, pos)
+        z, pos = _varint_get(mm, pos)
+        off += d
+        ts += (z >> 1) if not (z & 1) else -((z + 1) >> 1)
+    return off, ts
+
+
+def _log_seg_read_all(seg: Dict[str, Any]) -> Tuple[List[Tuple[int, int]], Dict[str, List[int]]]:
+    """Whole segment (line table + every posting list); only compaction needs this."""
+    mm = _log_seg_map(str(seg["name"]))
+    bp = int(seg["body_pos"])
+    pos = bp
+    off = int(seg.get("start") or 0)
+    ts = 0
+    table: List[Tuple[int, int]] = []
+    for _ in range(int(seg.get("lines") or 0)):
+        d, pos = _varint_get(mm, pos)
+        z, pos = _varint_get(mm, pos)
+        off += d
+        ts += (z >> 1) if not (z & 1) else -((z + 1) >> 1)
+        table.append((off, ts))
+    postings: Dict[str, List[int]] = {}
+    pos = bp + int(seg["dir_pos"])
+    for _ in range(int(seg["n_tok"])):
+        ln, pos = _varint_get(mm, pos)
+        tok = mm[pos : pos + ln].decode("utf-8")
+        ppos, pos = _varint_get(mm, pos + ln)
+        cnt, pos = _varint_get(mm, pos)
+        postings[tok] = _log_seg_postings_at(mm, bp + ppos, cnt)
+    return table, postings
+
+
+def _log_seg_drop(meta: Dict[str, Any], segs: List[Dict[str, Any]]) -> None:
+    """Retire segments: a query may still be reading them from an older meta, so delete them later."""
+    now = time.time()
+    trash = meta.setdefault("trash", [])
+    for s in segs:
+        trash.append([now, str(s["name"])])
+
+
+def _log_seg_empty_trash(meta: Dict[str, Any]) -> None:
+    keep = []
+    for ts, name in meta.get("trash") or []:
+        if time.time() - float(ts) < LOG_INDEX_TRASH_S:
+            keep.append([ts, name])
+            continue
+        with _LOG_SEG_MAPS_LOCK:
+            _LOG_SEG_MAPS.pop(str(name), None)
+        try:
+            (LOG_INDEX_DIR / str(name)).unlink()
+        except Exception:
+            pass
+    meta["trash"] = keep
+
+
+def _log_index_source(meta: Dict[str, Any], name: str, path: Path, info: Dict[str, Any]) -> Dict[str, Any]:
+    segs: List[Dict[str, Any]] = list(info.get("segments") or [])
+    offset = int(info.get("offset") or 0)
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return info
+    # Truncated / rotated: drop the old segments and re-index from the start.
+    if int(info.get("ino") or 0) != int(st.st_ino) or st.st_size < offset:
+        _log_seg_drop(meta, segs)
+        segs, offset = [], 0
+    next_seg = int(info.get("next_seg") or 0)
+    now_ms = int(time.time() * 1000)
+
+    if st.st_size > offset:
+        with path.open("rb") as f:
+            f.seek(offset)
+            while True:
+                lines: List[Tuple[int, int]] = []
+                postings: Dict[str, List[int]] = {}
+                start = offset
+                last_ts = 0
+                while len(lines) < LOG_INDEX_SEGMENT_MAX_LINES:
+                    raw = f.readline()
+                    if not raw or not raw.endswith(b"\n"):
+                        break  # keep partial trailing lines for the next run
+                    txt = raw.decode("utf-8", errors="ignore")
+                    ts = _log_line_ts_ms(txt) or last_ts or now_ms
+                    last_ts = ts
+                    ordinal = len(lines)
+                    lines.append((offset, ts))
+                    for tok in set(_log_tokens(txt)):
+                        postings.setdefault(tok, []).append(ordinal)
+                    offset += len(raw)
+                if not lines:
+                    break
+                seg_name = f"{name}.{next_seg:06d}.seg"
+                next_seg += 1
+                segs.append(_log_seg_write(LOG_INDEX_DIR / seg_name, name, start, lines, postings))
+                if len(lines) < LOG_INDEX_SEGMENT_MAX_LINES:
+                    break
+
+    if len(segs) > LOG_INDEX_MAX_SEGMENTS:
+        segs, next_seg = _log_index_compact(meta, name, segs, next_seg)
+    return {"path": str(path), "offset": offset, "ino": int(st.st_ino), "segments": segs, "next_seg": next_seg}
+
+
+def _log_index_compact(meta: Dict[str, Any], name: str, segs: List[Dict[str, Any]], next_seg: int) -> Tuple[List[Dict[str, Any]], int]:
+    # Merge runs of small neighbouring segments (lines stay ordered by offset).
+    out: List[Dict[str, Any]] = []
+    batch: List[Dict[str, Any]] = []
+    batch_lines = 0
+
+    def _flush() -> None:
+        nonlocal next_seg
+        if len(batch) <= 1:
+            out.extend(batch)
+            return
+        lines: List[Tuple[int, int]] = []
+        postings: Dict[str, List[int]] = {}
+        for s in batch:
+            table, plist = _log_seg_read_all(s)
+            base = len(lines)
+            lines.extend(table)
+            for tok, ids in plist.items():
+                postings.setdefault(tok, []).extend(base + x for x in ids)
+        seg_name = f"{name}.{next_seg:06d}.seg"
+        next_seg += 1
+        out.append(_log_seg_write(LOG_INDEX_DIR / seg_name, name, int(batch[0].get("start") or 0), lines, postings))
+        _log_seg_drop(meta, batch)
+
+    for s in segs:
+        n = int(s.get("lines") or 0)
+        if batch and batch_lines + n > LOG_INDEX_SEGMENT_MAX_LINES:
+            _flush()
+            batch, batch_lines = [], 0
+        batch.append(s)
+        batch_lines += n
+    _flush()
+    return out, next_seg
+
+
+def log_index_update() -> Dict[str, Any]:
+    """
+    Incrementally index every log source from its last indexed offset.
+    Caller must hold _LOG_INDEX_LOCK.
+    """
+    LOG_INDEX_DIR.mkdir(parents=True, exist_ok=True)
+    meta = _load_json(LOG_INDEX_META)
+    if int(meta.get("version") or 0) != LOG_INDEX_VERSION:
+        # Older segment format: start over (the logs themselves are the source of truth).
+        for p in LOG_INDEX_DIR.glob("*.seg"):
+            try:
+                p.unlink()
+            except Exception:
+                pass
+        meta["sources"] = {}
+        meta["trash"] = []
+    sources = meta.get("sources") if isinstance(meta.get("sources"), dict) else {}
+    for name, path in log_search_sources().items():
+        info = sources.get(name) if isinstance(sources.get(name), dict) else {}
+        try:
+            sources[name] = _log_index_source(meta, name, path, info)
+        except Exception as e:
+            _append_alert_log(f"日志索引失败（{name}）：" + humanize_error(str(e)))
+    meta["version"] = LOG_INDEX_VERSION
+    meta["sources"] = sources
+    _log_seg_empty_trash(meta)
+    _save_json(LOG_INDEX_META, meta)
+    return meta
+
+
+_LOG_INDEX_BG: Dict[str, Any] = {"thread": None, "capture_ts": 0.0}
+_LOG_INDEX_BG_LOCK = threading.Lock()
+BACKEND_CAPTURE_MIN_INTERVAL_S = 15.0
+
+
+def _log_index_worker(capture: bool) -> None:
+    if capture:
+        try:
+            ensure_home_env_file()
+            capture_backend_logs(read_env_file(HOME_ENV_FILE))
+        except Exception:
+            pass
+    try:
+        with _LOG_INDEX_LOCK:
+            log_index_update()
+    except Exception as e:
+        _append_alert_log("日志索引失败：" + humanize_error(str(e)))
+
+
+def log_index_kick() -> threading.Thread:
+    """
+    Bring the index up to date in the background (backend capture first, at most every
+    BACKEND_CAPTURE_MIN_INTERVAL_S). Returns the running pass; a pass already in flight is reused.
+    """
+    now = time.time()
+    with _LOG_INDEX_BG_LOCK:
+        th = _LOG_INDEX_BG.get("thread")
+        if th and th.is_alive():
+            return th
+        capture = now - float(_LOG_INDEX_BG.get("capture_ts") or 0.0) >= BACKEND_CAPTURE_MIN_INTERVAL_S
+        if capture:
+            _LOG_INDEX_BG["capture_ts"] = now
+        th = threading.Thread(target=_log_index_worker, args=(capture,), daemon=True)
+        _LOG_INDEX_BG["thread"] = th
+        th.start()
+        return th
+
+
+def parse_since_ms(raw: str, now_ms: Optional[int] = None) -> int:
+    """
+    since: epoch ms / epoch s / relative ("15m", "2h", "1d"); empty -> 0 (no limit).
+    """
+    s = (raw or "").strip().lower()
+    if not s:
+        return 0
+    now = int(now_ms if now_ms is not None else time.time() * 1000)
+    m = re.fullmatch(r"(\d+)\s*([smhd])", s)
+    if m:
+        unit = {"s": 1, "m": 60, "h": 3600, "d": 86400}[m.group(2)]
+        return max(0, now - int(m.group(1)) * unit * 1000)
+    try:
+        v = int(float(s))
+    except Exception:
+        return 0
+    return v * 1000 if v < 10**11 else v
+
+
+def log_search(query: str, since_ms: int = 0, limit: int = 200) -> Dict[str, Any]:
+    t0 = time.time()
+    q = (query or "").strip()
+    terms = sorted(set(_log_tokens(q)))
+    if not terms:
+        return {"ok": False, "msg": "请输入要搜索的关键字（至少 2 个字母/数字，或 1 个汉字）", "results": []}
+    limit = max(1, min(LOG_SEARCH_MAX_RESULTS, int(limit)))
+
+    # Indexing runs in the background; wait briefly so a search right after new lines usually sees them.
+    th = log_index_kick()
+    th.join(timeout=LOG_SEARCH_INDEX_WAIT_S)
+    indexing = th.is_alive()
+    meta = _load_json(LOG_INDEX_META)
+    if int(meta.get("version") or 0) != LOG_INDEX_VERSION:
+        meta = {}
+    results: List[Dict[str, Any]] = []
+    truncated = False
+    for name, info in (meta.get("sources") or {}).items():
+        path = Path(str(info.get("path") or ""))
+        hits: List[Dict[str, Any]] = []
+        try:
+            f = path.open("rb")
+        except Exception:
+            continue
+        with f:
+            for seg in reversed(list(info.get("segments") or [])):
+                if len(hits) >= limit:
+                    truncated = True
+                    break
+                if since_ms and int(seg.get("ts_max") or 0) and int(seg.get("ts_max") or 0) < since_ms:
+                    continue
+                try:
+                    mm = _log_seg_map(str(seg["name"]))
+                    lists = sorted((_log_seg_postings(mm, seg, t) for t in terms), key=len)
+                except Exception:
+                    continue
+                if not lists or not lists[0]:
+                    continue
+                common = set(lists[0])
+                for other in lists[1:]:
+                    common.intersection_update(other)
+                    if not common:
+                        break
+                if not common:
+                    continue
+                for ordinal in sorted(common, reverse=True):
+                    off, ts = _log_seg_line(mm, seg, ordinal)
+                    if since_ms and ts < since_ms:
+                        continue
+                    f.seek(off)
+                    line = f.readline().decode("utf-8", errors="ignore").rstrip("\r\n")
+                    low = line.lower()
+                    if not all(t in low for t in terms):
+                        continue
+                    hits.append({"file": name, "path": str(path), "offset": int(off), "ts_ms": int(ts), "line": line[:2000]})
+                    if len(hits) >= limit:
+                        truncated = True
+                        break
+        results.extend(hits)
+
+    results.sort(key=lambda r: (r["ts_ms"], r["offset"]), reverse=True)
+    if len(results) > limit:
+        truncated = True
+        results = results[:limit]
+    indexed = {
+        n: {"offset": int(i.get("offset") or 0), "segments": len(i.get("segments") or [])}
+        for n, i in (meta.get("sources") or {}).items()
+    }
+    return {
+        "ok": True,
+        "q": q,
+        "terms": terms,
+        "since_ms": int(since_ms),
+        "results": results,
+        "truncated": bool(truncated),
+        "indexed": indexed,
+        "indexing": bool(indexing),
+        "duration_ms": int((time.time() - t0) * 1000),
+    }
+
+
+def get_lan_ip() -> str:
+    # best-effort: get outbound interface IP
+    try:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.connect(("8.8.8.8", 80))
+        ip = s.getsockname()[0]
+        s.close()
+        return ip
+    except Exception:
+        return ""
+
+
+def pick_free_port(bind: str) -> int:
     # 绑定端口冲突时，给运营同学一个“永远能打开”的兜底端口
     s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     try:
@@ -1259,7 +2825,7 @@ def pick_free_port(bind: str) -> int:
 
 
 def is_ops_console_running(bind: str, port: int) -> bool:
-    url = f"http://{bind}:{int(port)}/api/status"
+    url = f"http://{bind}:{int(port)}/api/status?sections=meta"
     try:
         req = urllib.request.Request(url, method="GET")
         with urllib.request.urlopen(req, timeout=1.2) as r:
@@ -1273,7 +2839,7 @@ def is_ops_console_running(bind: str, port: int) -> bool:
         return False
 
 
-def _safe_cmd(cmd: List[str], timeout_s: int = 8) -> Tuple[bool, str]:
+def _safe_cmd(cmd: List[str], timeout_s: float = 8) -> Tuple[bool, str]:
     try:
         res = _sh(cmd, timeout_s=timeout_s)
         out = (res.stdout or "").strip()
@@ -1284,24 +2850,27 @@ def _safe_cmd(cmd: List[str], timeout_s: int = 8) -> Tuple[bool, str]:
         return False, humanize_error(str(e))
 
 
-def docker_cli_status() -> Dict[str, Any]:
+def docker_cli_status(timeout_s: float = 6) -> Dict[str, Any]:
     p = find_docker_bin()
     if not p:
         return {"ok": False, "path": "", "msg": "未检测到 Docker 命令（请先安装并启动 Docker Desktop 或 OrbStack）"}
 
-    ok, out = _safe_cmd([str(p), "version", "--format", "{{.Server.Version}}"], timeout_s=6)
+    ok, out = _safe_cmd([str(p), "version", "--format", "{{.Server.Version}}"], timeout_s=timeout_s)
     # daemon 未启动时，这里会失败；我们把详细错误文案也透出给 UI。
     if ok:
         return {"ok": True, "path": str(p), "msg": out or "ok"}
     return {"ok": False, "path": str(p), "msg": humanize_error(out or "docker daemon not reachable")}
 
 
-def docker_daemon_status() -> Dict[str, Any]:
+def docker_daemon_status(timeout_s: float = 6) -> Dict[str, Any]:
     # Avoid showing "Client:" (the first line of plain `docker info`) which is not meaningful to ops users.
     p = find_docker_bin()
     if not p:
         return {"ok": False, "msg": "未检测到 Docker 命令（请先安装并启动 Docker Desktop 或 OrbStack）"}
-    ok, out = _safe_cmd([str(p), "info", "--format", "{{.ServerVersion}} · {{.OperatingSystem}} · {{.Name}}"], timeout_s=6)
+    ok, out = _safe_cmd(
+        [str(p), "info", "--format", "{{.ServerVersion}} · {{.OperatingSystem}} · {{.Name}}"],
+        timeout_s=timeout_s,
+    )
     if ok:
         return {"ok": True, "msg": out or "ok"}
     return {"ok": False, "msg": humanize_error(out or "docker daemon not reachable")}
@@ -1530,19 +3099,22 @@ def git_file_exists_in_ref(ref: str, path: str) -> bool:
         return False
 
 
-def _git_run(args: List[str], timeout_s: int = 120) -> subprocess.CompletedProcess:
+def _git_run(args: List[str], timeout_s: int = 120, stream: bool = False) -> subprocess.CompletedProcess:
     env = os.environ.copy()
     # Avoid blocking the ops console on interactive credential prompts.
     env["GIT_TERMINAL_PROMPT"] = "0"
-    return subprocess.run(
-        args,
-        cwd=str(ROOT_DIR),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        timeout=int(timeout_s),
-        env=env,
-    )
+    with req_span("subprocess", _cmd_label(args)):
+        if stream and getattr(_JOB_LOCAL, "job", None) is not None:
+            return _run_streamed(args, int(timeout_s), env=env)
+        return subprocess.run(
+            args,
+            cwd=str(ROOT_DIR),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            timeout=int(timeout_s),
+            env=env,
+        )
 
 
 def humanize_git_error(msg: str) -> str:
@@ -1711,7 +3283,7 @@ def git_publish(paths: List[str], user_title: str, kind: str = "") -> Tuple[bool
             tmp.write(msg + "\n")
             tmp.flush()
             tmp.close()
-            c = _git_run(["git", "commit", "-F", tmp.name], timeout_s=90)
+            c = _git_run(["git", "commit", "-F", tmp.name], timeout_s=90, stream=True)
         finally:
             try:
                 if tmp and tmp.name and Path(tmp.name).exists():
@@ -1730,7 +3302,7 @@ def git_publish(paths: List[str], user_title: str, kind: str = "") -> Tuple[bool
             _add("git commit", c.stdout)
 
     # Push (even when no staged changes, HEAD may be ahead)
-    push = _git_run(["git", "push", "origin", "main"], timeout_s=180)
+    push = _git_run(["git", "push", "origin", "main"], timeout_s=180, stream=True)
     if push.returncode != 0:
         raw = (push.stdout or "").strip() or f"exit={push.returncode}"
         _add("git push", raw)
@@ -2039,7 +3611,10 @@ def open_text_file(path: Path) -> Tuple[bool, str]:
 
 def docker_restart_all() -> Tuple[bool, str]:
     try:
-        res = _sh(docker_compose_cmd(["restart"]), timeout_s=240)
+        t0 = time.time()
+        res = _sh(docker_compose_cmd(["restart"]), timeout_s=240, stream=True)
+        if res.returncode == 0:
+            startup_record("docker_restart_all", t0, _backend_ready_ts())
         return res.returncode == 0, res.stdout or ""
     except Exception as e:
         return False, humanize_error(str(e))
@@ -2050,9 +3625,9 @@ def docker_prune() -> Tuple[bool, str]:
     try:
         docker_bin = find_docker_bin()
         docker_exe = str(docker_bin) if docker_bin else "docker"
-        res1 = _sh([docker_exe, "system", "prune", "-f"], timeout_s=600)
+        res1 = _sh([docker_exe, "system", "prune", "-f"], timeout_s=600, stream=True)
         # builder prune 可能在部分环境不可用；失败不阻断主流程
-        res2 = _sh([docker_exe, "builder", "prune", "-f"], timeout_s=600)
+        res2 = _sh([docker_exe, "builder", "prune", "-f"], timeout_s=600, stream=True)
         out = (res1.stdout or "").strip()
         out2 = (res2.stdout or "").strip()
         if out2:
@@ -2062,30 +3637,422 @@ def docker_prune() -> Tuple[bool, str]:
         return False, humanize_error(str(e))
 
 
-def status_payload() -> Dict[str, Any]:
+# ---------------------------------------------------------------------------
+# 探测依赖图
+#
+# 探测之间有天然的上下游关系：Docker 引擎挂了，容器/本机 API 必然不可用；域名解析失败，
+# 外网 HTTPS 必然超时。上游失败时下游直接标记“已跳过（上游异常）”，不再白白等待超时，
+# 降级状态下的刷新因此很快。
+# ---------------------------------------------------------------------------
+
+_PROBE_LOCK = threading.Lock()
+_PROBE_RUN_LOCKS: Dict[str, threading.Lock] = {}
+_PROBE_RESULTS: Dict[str, Dict[str, Any]] = {}
+# Probe bus: every consumer (status sections, alerts) reads the same results; subscribers are
+# called as fn(name, result, prev) after each executed probe (prev is None on first run).
+_PROBE_SUBSCRIBERS: List[Any] = []
+
+
+def probe_context() -> Dict[str, Any]:
     ensure_home_env_file()
     env = read_env_file(HOME_ENV_FILE)
-    ensure_alerts_env_file()
-    alerts_env = read_env_file(ALERTS_ENV_FILE)
-    alerts_st = _load_json(ALERTS_STATE_FILE)
-
-    containers = docker_ps()
-
-    api_local_port = backend_host_port(env)
-    api_local_ok, api_local_msg = http_health(f"http://127.0.0.1:{int(api_local_port)}/health", timeout_s=2)
-    public_domain = (env.get("NB_PUBLIC_DOMAIN") or "naibao.me").strip()
-    api_public = (env.get("NB_TUNNEL_HOSTNAME") or "api.naibao.me").strip()
-    api_public_ok, api_public_msg = cached(
-        f"api_public_health:{api_public}",
-        15,
-        lambda: http_health(f"https://{api_public}/api/health", timeout_s=2),
-    )
-    frontend_ok, frontend_msg = cached(
-        f"frontend_https:{public_domain}",
-        30,
-        lambda: http_health(f"https://{public_domain}", timeout_s=2),
-    )
+    return {
+        "env": env,
+        "api_local_port": int(backend_host_port(env)),
+        "api_public": (env.get("NB_TUNNEL_HOSTNAME") or "api.naibao.me").strip(),
+        "public_domain": (env.get("NB_PUBLIC_DOMAIN") or "naibao.me").strip(),
+    }
+
+
+def _probe_docker_cli(ctx: Dict[str, Any], timeout_s: float) -> Dict[str, Any]:
+    return docker_cli_status(timeout_s=timeout_s)
+
+
+def _probe_docker_daemon(ctx: Dict[str, Any], timeout_s: float) -> Dict[str, Any]:
+    return docker_daemon_status(timeout_s=timeout_s)
+
+
+def _probe_containers(ctx: Dict[str, Any], timeout_s: float) -> Dict[str, Any]:
+    items = docker_ps()
+    failed = [i for i in items if str(i.get("Service") or "") == "docker" and str(i.get("State") or "") == "error"]
+    if failed:
+        return {"ok": False, "msg": str(failed[0].get("Status") or ""), "items": items}
+    backend = [i for i in items if str(i.get("Service") or "") == "backend"]
+    running = any(str(i.get("State") or "").lower() == "running" for i in backend)
+    if not running:
+        return {"ok": False, "msg": "后端容器未运行" if backend else "后端容器不存在", "items": items}
+    return {"ok": True, "msg": "", "items": items}
+
+
+def _probe_api_local(ctx: Dict[str, Any], timeout_s: float) -> Dict[str, Any]:
+    ok, msg = http_health(f"http://127.0.0.1:{int(ctx['api_local_port'])}/health", timeout_s=timeout_s)
+    return {"ok": bool(ok), "msg": msg}
+
+
+def _probe_port_backend_docker(ctx: Dict[str, Any], timeout_s: float) -> Dict[str, Any]:
+    return docker_port_owners(int(ctx["api_local_port"]))
+
+
+def _probe_dns_api(ctx: Dict[str, Any], timeout_s: float) -> Dict[str, Any]:
+    return resolve_hostname(str(ctx["api_public"]))
+
+
+def _probe_api_public(ctx: Dict[str, Any], timeout_s: float) -> Dict[str, Any]:
+    ok, msg = http_health(f"https://{ctx['api_public']}/api/health", timeout_s=timeout_s)
+    return {"ok": bool(ok), "msg": msg}
+
+
+def _probe_dns_frontend(ctx: Dict[str, Any], timeout_s: float) -> Dict[str, Any]:
+    return resolve_hostname(str(ctx["public_domain"]))
+
+
+def _probe_frontend(ctx: Dict[str, Any], timeout_s: float) -> Dict[str, Any]:
+    ok, msg = http_health(f"https://{ctx['public_domain']}", timeout_s=timeout_s)
+    return {"ok": bool(ok), "msg": msg}
+
+
+# name -> spec:
+# - deps: upstream probes (failed upstream => skipped)
+# - related: probes whose recovery should trigger an immediate recheck (besides deps)
+# - ttl_s: result reuse window
+# - timeout: (floor, default, ceiling) seconds; learned from latency once we have samples.
+#   None for probes whose check has its own fixed limit (they never get or report a timeout)
+# - backoff_max_s: cap of the exponential re-probe delay after repeated failures (0 = never back off)
+# - key: the config a cached result depends on (e.g. port / hostname)
+PROBES: Dict[str, Dict[str, Any]] = {
+    "docker_cli": {
+        "label": "Docker 命令",
+        "deps": [],
+        "ttl_s": 15,
+        "timeout": (1.0, 6.0, 8.0),
+        "backoff_max_s": 30,
+        "key": lambda c: "",
+        "fn": _probe_docker_cli,
+    },
+    "docker_daemon": {
+        "label": "Docker 引擎",
+        "deps": [],
+        "ttl_s": 10,
+        "timeout": (1.0, 6.0, 8.0),
+        "backoff_max_s": 30,
+        "key": lambda c: "",
+        "fn": _probe_docker_daemon,
+    },
+    "containers": {
+        "label": "后端容器",
+        "deps": ["docker_daemon"],
+        "ttl_s": 0,
+        "timeout": None,
+        "backoff_max_s": 0,
+        "key": lambda c: "",
+        "fn": _probe_containers,
+    },
+    "api_local": {
+        "label": "API 本机",
+        "deps": ["containers"],
+        "ttl_s": 0,
+        "timeout": (0.3, 2.0, 3.0),
+        "backoff_max_s": 10,
+        "key": lambda c: str(c["api_local_port"]),
+        "fn": _probe_api_local,
+    },
+    "port_backend_docker": {
+        "label": "后端端口（Docker）",
+        "deps": ["docker_daemon"],
+        "ttl_s": 5,
+        "timeout": None,
+        "backoff_max_s": 0,
+        "key": lambda c: str(c["api_local_port"]),
+        "fn": _probe_port_backend_docker,
+    },
+    "dns.api": {
+        "label": "API 域名解析",
+        "deps": [],
+        "ttl_s": 30,
+        "timeout": None,
+        "backoff_max_s": 120,
+        "key": lambda c: str(c["api_public"]),
+        "fn": _probe_dns_api,
+    },
+    "api_public": {
+        "label": "API 外网",
+        "deps": ["dns.api"],
+        "related": ["api_local"],
+        "ttl_s": 15,
+        "timeout": (0.8, 3.0, 6.0),
+        "backoff_max_s": 120,
+        "key": lambda c: str(c["api_public"]),
+        "fn": _probe_api_public,
+    },
+    "dns.frontend": {
+        "label": "前端域名解析",
+        "deps": [],
+        "ttl_s": 30,
+        "timeout": None,
+        "backoff_max_s": 300,
+        "key": lambda c: str(c["public_domain"]),
+        "fn": _probe_dns_frontend,
+    },
+    "frontend": {
+        "label": "前端",
+        "deps": ["dns.frontend"],
+        "ttl_s": 30,
+        "timeout": (0.8, 3.0, 6.0),
+        "backoff_max_s": 300,
+        "key": lambda c: str(c["public_domain"]),
+        "fn": _probe_frontend,
+    },
+}
+
+PROBE_LATENCY_SAMPLES = 64
+PROBE_LATENCY_MAX_AGE_S = 3600
+PROBE_TIMEOUT_P99_FACTOR = 3.0
+# name -> {"lat": recent ok (ts, duration s), "fails": consecutive failures, "next_ts": earliest re-probe,
+#          "widened": (ts, timeout s) raised after a probe ran into its timeout}
+_PROBE_STATS: Dict[str, Dict[str, Any]] = {}
+
+
+def probe_timeout_s(name: str) -> float:
+    """
+    Learned timeout: p99 of recent successful latencies x3, clamped to [floor, ceiling].
+    Falls back to the default until we have enough samples. After a probe hits its timeout the
+    limit is doubled (up to the ceiling), so a service that slowed down is measured, not reported down.
+    Samples and the widening expire after PROBE_LATENCY_MAX_AGE_S. 0 for probes without a timeout.
+    """
+    spec = PROBES[name]["timeout"]
+    if spec is None:
+        return 0.0
+    floor, default, ceil = spec
+    cutoff = time.time() - PROBE_LATENCY_MAX_AGE_S
+    with _PROBE_LOCK:
+        stats = _PROBE_STATS.get(name) or {}
+        lat = [d for ts, d in (stats.get("lat") or []) if ts >= cutoff]
+        widened = stats.get("widened")
+    if len(lat) < 5:
+        out = float(default)
+    else:
+        lat.sort()
+        p99 = lat[min(len(lat) - 1, int(round(0.99 * (len(lat) - 1))))]
+        out = float(max(floor, min(ceil, p99 * PROBE_TIMEOUT_P99_FACTOR)))
+    if widened and widened[0] >= cutoff:
+        out = max(out, float(widened[1]))
+    return out
+
+
+def _probe_backoff_s(spec: Dict[str, Any], fails: int) -> float:
+    cap = float(spec.get("backoff_max_s") or 0)
+    if cap <= 0 or fails < 2:
+        return 0.0
+    base = max(5.0, float(spec.get("ttl_s") or 0))
+    return float(min(cap, base * (2 ** (fails - 2))))
+
+
+def _probe_record(name: str, r: Dict[str, Any], prev_ok: bool) -> None:
+    """Update latency samples / failure backoff; a recovery fast-tracks related probes. Holds _PROBE_LOCK."""
+    spec = PROBES[name]
+    stats = _PROBE_STATS.setdefault(name, {"lat": [], "fails": 0, "next_ts": 0.0})
+    now = float(r["ts"])
+    cutoff = now - PROBE_LATENCY_MAX_AGE_S
+    stats["lat"] = [x for x in stats["lat"] if x[0] >= cutoff]
+    if r.get("ok"):
+        stats["lat"].append((now, float(r.get("duration_ms") or 0) / 1000.0))
+        del stats["lat"][:-PROBE_LATENCY_SAMPLES]
+        stats["fails"] = 0
+        stats["next_ts"] = 0.0
+        if not prev_ok:
+            for n, sp in PROBES.items():
+                if name in sp["deps"] or name in (sp.get("related") or []):
+                    st2 = _PROBE_STATS.get(n)
+                    if st2:
+                        st2["next_ts"] = 0.0
+                    _PROBE_RESULTS.pop(n, None)
+        return
+    timeout_s = float(r.get("timeout_s") or 0)
+    if timeout_s and spec["timeout"] and float(r.get("duration_ms") or 0) >= timeout_s * 1000.0 * 0.9:
+        # Ran into the limit: failures add no latency sample, so widen instead of learning nothing.
+        stats["widened"] = (now, min(float(spec["timeout"][2]), timeout_s * 2))
+    stats["fails"] = int(stats.get("fails") or 0) + 1
+    stats["next_ts"] = now + _probe_backoff_s(spec, int(stats["fails"]))
+
+
+def probe_subscribe(fn) -> None:
+    with _PROBE_LOCK:
+        if fn not in _PROBE_SUBSCRIBERS:
+            _PROBE_SUBSCRIBERS.append(fn)
+
+
+def probe_invalidate(names: List[str]) -> None:
+    """Drop cached results (and failure backoff) so the next run re-probes right away."""
+    with _PROBE_LOCK:
+        for n in names:
+            _PROBE_RESULTS.pop(n, None)
+            st = _PROBE_STATS.get(n)
+            if st:
+                st["next_ts"] = 0.0
+
+
+def _probe_exec(name: str, ctx: Dict[str, Any], force: bool = False, max_age_s: Optional[float] = None) -> Dict[str, Any]:
+    spec = PROBES[name]
+    key = str(spec["key"](ctx))
+    with _PROBE_LOCK:
+        run_lock = _PROBE_RUN_LOCKS.setdefault(name, threading.Lock())
+    # One probe runs at a time; concurrent callers wait and reuse the fresh result.
+    t_wait = time.time()
+    with run_lock:
+        req_span_add("probe_wait", name, time.time() - t_wait)
+        now = time.time()
+        with _PROBE_LOCK:
+            prev = _PROBE_RESULTS.get(name)
+            next_ts = float((_PROBE_STATS.get(name) or {}).get("next_ts") or 0.0)
+        same_key = bool(prev and prev.get("key") == key)
+        reuse_s = float(spec["ttl_s"]) if max_age_s is None else float(max_age_s)
+        if prev and not force and same_key and (now - float(prev.get("ts") or 0)) < reuse_s:
+            return dict(prev)
+        # Persistently failing: keep serving the negative result until the backoff expires.
+        if prev and not force and same_key and not prev.get("ok") and now < next_ts:
+            out = dict(prev)
+            out["backoff"] = True
+            out["retry_in_s"] = int(next_ts - now)
+            return out
+
+        timeout_s = probe_timeout_s(name)
+        t0 = time.time()
+        try:
+            with req_span("probe", name):
+                r = spec["fn"](ctx, timeout_s)
+            r = dict(r) if isinstance(r, dict) else {"ok": False, "msg": "探测返回格式异常"}
+        except Exception as e:
+            r = {"ok": False, "msg": humanize_error(str(e))}
+        r["ok"] = bool(r.get("ok"))
+        r["skipped"] = False
+        r["ts"] = time.time()
+        r["duration_ms"] = int(max(0.0, (r["ts"] - t0) * 1000.0))
+        if spec["timeout"] is not None:
+            r["timeout_s"] = round(float(timeout_s), 2)
+        r["key"] = key
+        with _PROBE_LOCK:
+            _probe_record(name, r, bool(prev and prev.get("ok")) if same_key else True)
+            _PROBE_RESULTS[name] = r
+            subs = list(_PROBE_SUBSCRIBERS)
+        for fn in subs:
+            try:
+                fn(name, dict(r), dict(prev) if prev else None)
+            except Exception:
+                pass
+        return dict(r)
+
+
+def probe_run(
+    names: List[str],
+    ctx: Optional[Dict[str, Any]] = None,
+    force: bool = False,
+    max_age_s: Optional[float] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Run the given probes (and their upstream probes) in dependency order.
+    A probe whose upstream failed is not executed: it is reported as skipped right away.
+    Skipped results are never cached, so recovery upstream is picked up on the next run.
+    max_age_s: reuse any shared result at most this old instead of each probe's ttl_s.
+    """
+    c = ctx if ctx is not None else probe_context()
+    out: Dict[str, Dict[str, Any]] = {}
+
+    def _visit(n: str) -> Dict[str, Any]:
+        if n in out:
+            return out[n]
+        spec = PROBES[n]
+        for d in spec["deps"]:
+            _visit(d)
+        down = [d for d in spec["deps"] if not out[d].get("ok")]
+        if down:
+            labels = "、".join(str(PROBES[d].get("label") or d) for d in down)
+            out[n] = {
+                "ok": False,
+                "skipped": True,
+                "upstream": down,
+                "msg": f"已跳过（上游异常：{labels}）",
+                "ts": time.time(),
+                "duration_ms": 0,
+            }
+        else:
+            out[n] = _probe_exec(n, c, force=force, max_age_s=max_age_s)
+        return out[n]
+
+    for n in names:
+        _visit(n)
+    return out
+
+
+def probes_summary(results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        n: {
+            "ok": bool(r.get("ok")),
+            "skipped": bool(r.get("skipped")),
+            "msg": str(r.get("msg") or ""),
+            "duration_ms": int(r.get("duration_ms") or 0),
+            **({"timeout_s": float(r["timeout_s"])} if "timeout_s" in r else {}),
+            "retry_in_s": int(r.get("retry_in_s") or 0),
+            "age_s": int(max(0.0, time.time() - float(r.get("ts") or 0))),
+        }
+        for n, r in results.items()
+    }
+
+
+def _status_section_docker(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    probes = probe_run(["docker_cli", "docker_daemon", "containers", "port_backend_docker"], ctx=ctx)
+    containers = probes["containers"].get("items")
+    if not isinstance(containers, list):
+        containers = [{"Service": "docker", "State": "error", "Status": str(probes["containers"].get("msg") or "")}]
+
+    api_local_port = int(ctx["api_local_port"])
+    docker_cli = {k: probes["docker_cli"].get(k) for k in ("ok", "path", "msg")}
+    docker_daemon = {k: probes["docker_daemon"].get(k) for k in ("ok", "msg")}
+    port_backend_docker = {k: probes["port_backend_docker"].get(k) for k in ("ok", "msg")}
+    port_backend_docker["port"] = int(api_local_port)
+    port_backend_docker["owners"] = probes["port_backend_docker"].get("owners") or []
+    port_backend_host = cached(f"port_backend_host:{int(api_local_port)}", 5, lambda: host_port_listeners(int(api_local_port)))
+    return {
+        "docker": {"cli": docker_cli, "daemon": docker_daemon},
+        "ports": {"backend": {"port": int(api_local_port), "docker": port_backend_docker, "host": port_backend_host}},
+        "containers": containers,
+    }
 
+
+def _status_section_api(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    probes = probe_run(["api_local", "api_public"], ctx=ctx)
+    api_local_port = int(ctx["api_local_port"])
+    api_public = str(ctx["api_public"])
+    return {
+        "api": {
+            "local": {
+                "ok": bool(probes["api_local"].get("ok")),
+                "msg": str(probes["api_local"].get("msg") or ""),
+                "port": int(api_local_port),
+                "url": f"http://127.0.0.1:{int(api_local_port)}/health",
+            },
+            "public": {
+                "ok": bool(probes["api_public"].get("ok")),
+                "msg": str(probes["api_public"].get("msg") or ""),
+                "url": f"https://{api_public}",
+            },
+        },
+    }
+
+
+def _status_section_frontend(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    probes = probe_run(["frontend"], ctx=ctx)
+    return {
+        "frontend": {
+            "ok": bool(probes["frontend"].get("ok")),
+            "msg": str(probes["frontend"].get("msg") or ""),
+            "url": f"https://{ctx['public_domain']}",
+        },
+    }
+
+
+def _status_section_tunnel(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    env = ctx["env"]
+    api_public = str(ctx["api_public"])
     tunnel_pid = read_pid(TUN_PID)
     tunnel_alive = bool(tunnel_pid and is_pid_alive(tunnel_pid))
     tunnel_mode = (env.get("NB_TUNNEL_MODE") or "named").strip().lower()
@@ -2102,23 +4069,6 @@ def status_payload() -> Dict[str, Any]:
     cert_ok = bool((Path.home() / ".cloudflared" / "cert.pem").exists())
     config_ok = bool(TUN_CFG.exists() and (named_cfg.get("tunnel_id") or "").strip() and cred_ok)
 
-    host_disk = disk_usage(ROOT_DIR)
-    host_mem = mem_usage()
-    host_cpu = cpu_load()
-    host_uptime = host_uptime_s()
-    docker_cli = cached("docker_cli", 15, docker_cli_status)
-    docker_daemon = cached("docker_daemon", 10, docker_daemon_status)
-    api_dns = cached(f"dns_resolve:{api_public}", 30, lambda: resolve_hostname(api_public))
-
-    zone_ns = cached(f"dns_ns:{public_domain}", 300, lambda: dns_resolve(public_domain, "NS", timeout_s=2))
-    zone_a = cached(f"dns_a:{public_domain}", 300, lambda: dns_resolve(public_domain, "A", timeout_s=2))
-    www_cname = cached(
-        f"dns_cname:www.{public_domain}",
-        300,
-        lambda: dns_resolve(f"www.{public_domain}", "CNAME", timeout_s=2),
-    )
-    api_cname = cached(f"dns_cname:{api_public}", 300, lambda: dns_resolve(api_public, "CNAME", timeout_s=2))
-
     cf_bin = find_cloudflared_bin()
     cf_ok = bool(cf_bin)
     cf_ver = cached(
@@ -2129,17 +4079,60 @@ def status_payload() -> Dict[str, Any]:
     if isinstance(cf_ver, tuple):
         ok, out = cf_ver
         cf_ver = (out.splitlines()[0] if out else "").strip() if ok else (out or "").strip()
-    port_backend_docker = cached(f"port_backend_docker:{int(api_local_port)}", 5, lambda: docker_port_owners(int(api_local_port)))
-    port_backend_host = cached(f"port_backend_host:{int(api_local_port)}", 5, lambda: host_port_listeners(int(api_local_port)))
 
-    mobile_url = read_first_line(MOBILE_PREVIEW_URL)
-    mobile_tun_pid = read_pid(MOBILE_PREVIEW_TUN_PID)
-    mobile_tun_alive = bool(mobile_tun_pid and is_pid_alive(mobile_tun_pid))
-    mobile_dev_pid = read_pid(MOBILE_PREVIEW_DEV_PID)
-    mobile_dev_alive = bool(mobile_dev_pid and is_pid_alive(mobile_dev_pid))
-    mobile_start_pid = read_pid(MOBILE_PREVIEW_START_PID)
-    mobile_start_alive = bool(mobile_start_pid and is_pid_alive(mobile_start_pid))
+    return {
+        "cloudflared": {"ok": cf_ok, "path": str(cf_bin) if cf_bin else "", "version": cf_ver},
+        "tunnel": {
+            "pid": tunnel_pid or 0,
+            "alive": tunnel_alive,
+            "connected": tunnel_connected(tunnel_pid or 0),
+            "mode": tunnel_mode,
+            "name": tunnel_name,
+            "hostname": api_public,
+            "url": tunnel_url,
+            "config": tunnel_cfg,
+        },
+        "named_init": {
+            "pid": named_pid or 0,
+            "alive": named_alive,
+            "log": str(NAMED_INIT_LOG),
+            "config": str(TUN_CFG) if TUN_CFG.exists() else "",
+            "config_ok": config_ok,
+            "tunnel_id": (named_cfg.get("tunnel_id") or "").strip(),
+            "credentials_file": cred_raw,
+            "credentials_ok": cred_ok,
+            "cert_ok": cert_ok,
+        },
+    }
+
+
+def _status_section_dns(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    probes = probe_run(["dns.api"], ctx=ctx)
+    public_domain = str(ctx["public_domain"])
+    api_public = str(ctx["api_public"])
+    api_dns = {k: probes["dns.api"].get(k) for k in ("ok", "hostname", "ips", "msg")}
+    api_dns["hostname"] = api_dns.get("hostname") or api_public
+    api_dns["ips"] = api_dns.get("ips") or []
+
+    zone_ns = cached(f"dns_ns:{public_domain}", 300, lambda: dns_resolve(public_domain, "NS", timeout_s=2))
+    zone_a = cached(f"dns_a:{public_domain}", 300, lambda: dns_resolve(public_domain, "A", timeout_s=2))
+    www_cname = cached(
+        f"dns_cname:www.{public_domain}",
+        300,
+        lambda: dns_resolve(f"www.{public_domain}", "CNAME", timeout_s=2),
+    )
+    api_cname = cached(f"dns_cname:{api_public}", 300, lambda: dns_resolve(api_public, "CNAME", timeout_s=2))
+    return {
+        "dns": {
+            "api": api_dns,
+            "zone": {"domain": public_domain, "ns": zone_ns, "a": zone_a, "cloudflare": looks_like_cloudflare_ns(zone_ns.get("answers") or [])},
+            "www": {"hostname": f"www.{public_domain}", "cname": www_cname},
+            "api_record": {"hostname": api_public, "cname": api_cname},
+        },
+    }
+
 
+def _status_section_git(ctx: Dict[str, Any]) -> Dict[str, Any]:
     origin = git_remote_origin()
     github = parse_github_repo_from_remote(origin)
     branch = git_branch()
@@ -2157,12 +4150,52 @@ def status_payload() -> Dict[str, Any]:
         "frontend/.npmrc",
     ]
     changes_frontend = git_change_summary(frontend_scope, max_files=8)
+    return {
+        "git": {
+            "commit": git_commit(),
+            "origin": origin,
+            "github": github,
+            "branch": branch,
+            "ahead": int(ahead),
+            "behind": int(behind),
+            "dirty": bool(changes_all.get("count") or 0),
+            "scopes": {
+                "all": changes_all,
+                "workflow": {
+                    **changes_workflow,
+                    "path": workflow_path,
+                    "on_origin": bool(workflow_on_origin),
+                },
+                "frontend": {**changes_frontend, "paths": frontend_scope},
+            },
+        },
+    }
 
+
+def _status_section_host(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "host": {
+            "platform": platform.platform(),
+            "python": sys.version.split()[0],
+            "cpu_count": int(os.cpu_count() or 0),
+            "disk": disk_usage(ROOT_DIR),
+            "mem": mem_usage(),
+            "cpu": cpu_load(),
+            "uptime": host_uptime_s(),
+        },
+        "lan": {"ip": get_lan_ip()},
+    }
+
+
+def _status_section_startup(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    return {"startup": startup_summary()}
+
+
+def _status_section_alerts(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    ensure_alerts_env_file()
+    alerts_env = read_env_file(ALERTS_ENV_FILE)
+    alerts_st = alerts_state()
     return {
-        "ts": int(time.time()),
-        "root_dir": str(ROOT_DIR),
-        "compose_file": str(HOME_COMPOSE_FILE),
-        "env_file": str(HOME_ENV_FILE),
         "alerts": {
             "env_file": str(ALERTS_ENV_FILE),
             "enabled": env_bool(alerts_env, "ALERT_ENABLED", False),
@@ -2180,6 +4213,16 @@ def status_payload() -> Dict[str, Any]:
                 "telegram": bool(str(alerts_env.get("ALERT_TG_BOT_TOKEN") or "").strip() and str(alerts_env.get("ALERT_TG_CHAT_ID") or "").strip()),
                 "bark": bool(str(alerts_env.get("ALERT_BARK_URL") or "").strip()),
             },
+            "channel_stats": alerts_channel_stats(),
+            "outbox": alerts_outbox_summary(),
+            "rules": _alert_rules_summary(),
+            "slo": slo_summary(alerts_env),
+            "trigger": {
+                "reason": str(_ALERTS_TRIGGER.get("reason") or ""),
+                "last_eval_ts": int(_ALERTS_TRIGGER.get("last_eval_ts") or 0),
+                "last_eval_ms": int(_ALERTS_TRIGGER.get("last_eval_ms") or 0),
+                "detect_ms": int(_ALERTS_TRIGGER.get("detect_ms") or 0),
+            },
             "last": {
                 "level": str(alerts_st.get("last_level") or "ok"),
                 "signature": str(alerts_st.get("last_signature") or ""),
@@ -2190,87 +4233,206 @@ def status_payload() -> Dict[str, Any]:
             "state_file": str(ALERTS_STATE_FILE),
             "log": str(ALERTS_LOG),
         },
-        "git": {
-            "commit": git_commit(),
-            "origin": origin,
-            "github": github,
-            "branch": branch,
-            "ahead": int(ahead),
-            "behind": int(behind),
-            "dirty": bool(changes_all.get("count") or 0),
-            "scopes": {
-                "all": changes_all,
-                "workflow": {
-                    **changes_workflow,
-                    "path": workflow_path,
-                    "on_origin": bool(workflow_on_origin),
-                },
-                "frontend": {**changes_frontend, "paths": frontend_scope},
-            },
-        },
-        "host": {
-            "platform": platform.platform(),
-            "python": sys.version.split()[0],
-            "cpu_count": int(os.cpu_count() or 0),
-            "disk": host_disk,
-            "mem": host_mem,
-            "cpu": host_cpu,
-            "uptime": host_uptime,
-        },
-        "docker": {"cli": docker_cli, "daemon": docker_daemon},
-        "cloudflared": {"ok": cf_ok, "path": str(cf_bin) if cf_bin else "", "version": cf_ver},
-        "ports": {"backend": {"port": int(api_local_port), "docker": port_backend_docker, "host": port_backend_host}},
-        "containers": containers,
-        "api": {
-            "local": {"ok": api_local_ok, "msg": api_local_msg, "port": int(api_local_port), "url": f"http://127.0.0.1:{int(api_local_port)}/health"},
-            "public": {"ok": api_public_ok, "msg": api_public_msg, "url": f"https://{api_public}"},
-        },
-        "frontend": {"ok": frontend_ok, "msg": frontend_msg, "url": f"https://{public_domain}"},
+    }
+
+
+def _status_section_mobile_preview(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    mobile_url = read_first_line(MOBILE_PREVIEW_URL)
+    mobile_tun_pid = read_pid(MOBILE_PREVIEW_TUN_PID)
+    mobile_dev_pid = read_pid(MOBILE_PREVIEW_DEV_PID)
+    mobile_start_pid = read_pid(MOBILE_PREVIEW_START_PID)
+    return {
         "mobile_preview": {
             "ok": bool(mobile_url),
             "url": mobile_url,
             "url_file": str(MOBILE_PREVIEW_URL),
             "starter_pid": mobile_start_pid or 0,
-            "starter_alive": mobile_start_alive,
+            "starter_alive": bool(mobile_start_pid and is_pid_alive(mobile_start_pid)),
             "frontend_pid": mobile_dev_pid or 0,
-            "frontend_alive": mobile_dev_alive,
+            "frontend_alive": bool(mobile_dev_pid and is_pid_alive(mobile_dev_pid)),
             "tunnel_pid": mobile_tun_pid or 0,
-            "tunnel_alive": mobile_tun_alive,
-        },
-        "tunnel": {
-            "pid": tunnel_pid or 0,
-            "alive": tunnel_alive,
-            "mode": tunnel_mode,
-            "name": tunnel_name,
-            "hostname": api_public,
-            "url": tunnel_url,
-            "config": tunnel_cfg,
-        },
-        "named_init": {
-            "pid": named_pid or 0,
-            "alive": named_alive,
-            "log": str(NAMED_INIT_LOG),
-            "config": str(TUN_CFG) if TUN_CFG.exists() else "",
-            "config_ok": config_ok,
-            "tunnel_id": (named_cfg.get("tunnel_id") or "").strip(),
-            "credentials_file": cred_raw,
-            "credentials_ok": cred_ok,
-            "cert_ok": cert_ok,
-        },
-        "dns": {
-            "api": api_dns,
-            "zone": {"domain": public_domain, "ns": zone_ns, "a": zone_a, "cloudflare": looks_like_cloudflare_ns(zone_ns.get("answers") or [])},
-            "www": {"hostname": f"www.{public_domain}", "cname": www_cname},
-            "api_record": {"hostname": api_public, "cname": api_cname},
+            "tunnel_alive": bool(mobile_tun_pid and is_pid_alive(mobile_tun_pid)),
         },
+    }
+
+
+# /api/status is split into sections so each card group can be computed, cached and
+# fetched on its own (/api/status?sections=docker,api or /api/status/git).
+# ttl_s: how long a computed section is served before a background refresh is triggered.
+# probes: shared probes the section reads; a change in their ok state marks the section stale.
+STATUS_SECTIONS: Dict[str, Dict[str, Any]] = {
+    "docker": {
+        "fn": _status_section_docker,
+        "ttl_s": 2.0,
+        "probes": ["docker_cli", "docker_daemon", "containers", "port_backend_docker"],
+    },
+    "api": {"fn": _status_section_api, "ttl_s": 2.0, "probes": ["api_local", "api_public"]},
+    "frontend": {"fn": _status_section_frontend, "ttl_s": 5.0, "probes": ["frontend"]},
+    "tunnel": {"fn": _status_section_tunnel, "ttl_s": 2.0},
+    "alerts": {"fn": _status_section_alerts, "ttl_s": 2.0},
+    "mobile_preview": {"fn": _status_section_mobile_preview, "ttl_s": 2.0},
+    "host": {"fn": _status_section_host, "ttl_s": 10.0},
+    "dns": {"fn": _status_section_dns, "ttl_s": 30.0, "probes": ["dns.api"]},
+    "git": {"fn": _status_section_git, "ttl_s": 60.0},
+    "startup": {"fn": _status_section_startup, "ttl_s": 30.0},
+}
+
+
+STATUS_CORE_SECTIONS = ["docker", "api", "frontend", "tunnel", "alerts", "mobile_preview"]
+
+
+def parse_status_sections(raw: str) -> Tuple[List[str], List[str]]:
+    """
+    "docker,api" -> (["docker", "api"], []); "" / "all" -> every section; "meta" -> none (base fields only).
+    Unknown names are returned second, so the caller can reject the request instead of answering with nothing.
+    """
+    s = (raw or "").strip().lower()
+    if not s or s == "all":
+        return list(STATUS_SECTIONS), []
+    out: List[str] = []
+    unknown: List[str] = []
+    for part in s.split(","):
+        p = part.strip()
+        if not p or p == "meta":
+            continue
+        if p not in STATUS_SECTIONS:
+            if p not in unknown:
+                unknown.append(p)
+        elif p not in out:
+            out.append(p)
+    return out, unknown
+
+
+def status_unknown_sections_error(unknown: List[str]) -> Dict[str, Any]:
+    """400 body for both /api/status/<name> and /api/status?sections=... ."""
+    return {"ok": False, "msg": f"未知状态分区：{', '.join(unknown)}", "unknown": list(unknown), "sections": list(STATUS_SECTIONS)}
+
+
+def status_base(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "ts": int(time.time()),
+        "root_dir": str(ROOT_DIR),
+        "compose_file": str(HOME_COMPOSE_FILE),
+        "env_file": str(HOME_ENV_FILE),
         "links": {
-            "frontend": f"https://{public_domain}",
-            "api_health": f"https://{api_public}/api/health",
+            "frontend": f"https://{ctx['public_domain']}",
+            "api_health": f"https://{ctx['api_public']}/api/health",
         },
-        "lan": {"ip": get_lan_ip()},
     }
 
 
+def _status_on_probe(name: str, r: Dict[str, Any], prev: Optional[Dict[str, Any]]) -> None:
+    # Probes run by the alerts side show up on the dashboard without waiting for the section ttl.
+    if prev is not None and bool(prev.get("ok")) == bool(r.get("ok")):
+        return
+    status_invalidate([n for n, sec in STATUS_SECTIONS.items() if name in (sec.get("probes") or [])])
+
+
+probe_subscribe(_status_on_probe)
+
+
+def probe_snapshot() -> Dict[str, Dict[str, Any]]:
+    with _PROBE_LOCK:
+        return {n: dict(r) for n, r in _PROBE_RESULTS.items()}
+
+
+def status_payload(sections: Optional[List[str]] = None) -> Dict[str, Any]:
+    ctx = probe_context()
+    out = status_base(ctx)
+    for name in (sections if sections is not None else list(STATUS_SECTIONS)):
+        out.update(STATUS_SECTIONS[name]["fn"](ctx))
+    out["probes"] = probes_summary(probe_snapshot())
+    return out
+
+
+# Demand-driven probing: status sections are only refreshed while someone is watching
+# (a recent /api/status poll or an open stream). With zero viewers the scheduler keeps
+# just the probes the alert rules use fresh, at alert cadence, and nothing else runs.
+VIEWER_IDLE_S = 20.0
+# Fallback when the alert rules can't be loaded (see alert_rule_probes()).
+ALERT_PROBES = ["docker_daemon", "api_local", "api_public", "frontend"]
+_VIEWER_LOCK = threading.Lock()
+_VIEWERS: Dict[str, float] = {}  # client id -> last request ts
+_VIEWER_STREAMS = 0
+_VIEWER_WAKE = threading.Event()
+_SCHEDULER_STATE: Dict[str, Any] = {"mode": "idle", "since": 0.0, "last_probe_ts": 0.0}
+
+
+def _viewers_active_locked(now: float) -> int:
+    for k, ts in list(_VIEWERS.items()):
+        if (now - ts) > VIEWER_IDLE_S:
+            del _VIEWERS[k]
+    return len(_VIEWERS) + int(_VIEWER_STREAMS)
+
+
+def viewers_active() -> int:
+    with _VIEWER_LOCK:
+        return _viewers_active_locked(time.time())
+
+
+def viewer_touch(client: str) -> None:
+    now = time.time()
+    with _VIEWER_LOCK:
+        was_idle = _viewers_active_locked(now) == 0
+        _VIEWERS[str(client or "?")] = now
+    if was_idle:
+        _VIEWER_WAKE.set()
+
+
+def viewer_stream(delta: int) -> None:
+    """Open (+1) / close (-1) a long-lived stream; an open stream counts as a viewer."""
+    global _VIEWER_STREAMS
+    with _VIEWER_LOCK:
+        _VIEWER_STREAMS = max(0, int(_VIEWER_STREAMS) + int(delta))
+    if delta > 0:
+        _VIEWER_WAKE.set()
+
+
+def scheduler_summary() -> Dict[str, Any]:
+    n = viewers_active()
+    since = float(_SCHEDULER_STATE.get("since") or 0.0)
+    return {
+        "mode": str(_SCHEDULER_STATE.get("mode") or "idle"),
+        "viewers": int(n),
+        "since_s": int(max(0.0, time.time() - since)) if since > 0 else 0,
+    }
+
+
+def probe_scheduler(stop_event: Optional[threading.Event] = None) -> None:
+    """
+    live: viewers present -> polls drive section refresh; warm the core sections on ramp-up.
+    idle: no viewers -> only the probes alert rules read, every ALERT_INTERVAL_S (nothing when alerts are off).
+    """
+    while True:
+        if stop_event and stop_event.is_set():
+            return
+        wait_s = 60.0
+        try:
+            mode = "live" if viewers_active() > 0 else "idle"
+            if mode != _SCHEDULER_STATE.get("mode"):
+                _SCHEDULER_STATE["mode"] = mode
+                _SCHEDULER_STATE["since"] = time.time()
+                if mode == "live":
+                    ensure_status_update(sections=STATUS_CORE_SECTIONS)
+            if mode == "live":
+                # Re-check shortly so we notice when the last tab goes away.
+                wait_s = VIEWER_IDLE_S
+            else:
+                aenv = read_env_file(ALERTS_ENV_FILE)
+                interval_s = env_int(aenv, "ALERT_INTERVAL_S", 30, 10, 600)
+                if _alerts_enabled(aenv):
+                    probe_run(alert_rule_probes())
+                    _SCHEDULER_STATE["last_probe_ts"] = time.time()
+                wait_s = float(interval_s)
+        except Exception:
+            pass
+        _VIEWER_WAKE.wait(wait_s)
+        _VIEWER_WAKE.clear()
+
+
+_ALERTS_STATE_LOCK = threading.Lock()
+
+
 def _load_json(path: Path) -> Dict[str, Any]:
     try:
         if not path.exists():
@@ -2284,15 +4446,63 @@ def _load_json(path: Path) -> Dict[str, Any]:
         return {}
 
 
+def _write_atomic(path: Path, text: str, durable: bool = True) -> None:
+    # temp file + fsync + rename: readers (and a crash) see either the old or the new file, never half of one.
+    # durable=False skips the fsyncs for throwaway files that are rewritten every few seconds.
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write(text)
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(str(tmp), str(path))
+    if not durable:
+        return
+    try:
+        fd = os.open(str(path.parent), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    except Exception:
+        pass
+
+
 def _save_json(path: Path, obj: Dict[str, Any]) -> None:
     try:
         ensure_runtime_dir()
-        path.write_text(json.dumps(obj or {}, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        _write_atomic(path, json.dumps(obj or {}, ensure_ascii=False, indent=2) + "\n")
     except Exception:
         pass
 
 
+# alerts_state.json is kept in memory and written only when it changes. Fields that move on
+# every evaluation (the daily counters) are flushed at most every ALERTS_STATE_FLUSH_S.
+# The cached copy is only trusted while the file is the one we last read or wrote: deleting or
+# hand-editing alerts_state.json (or another process writing it) makes the next read reload it.
+ALERTS_STATE_VOLATILE = ("daily",)
+ALERTS_STATE_FLUSH_S = 300
+_ALERTS_STATE_MEM: Dict[str, Any] = {"state": None, "written": None, "written_ts": 0.0, "file_sig": None}
+
+
+def _alerts_state_file_sig() -> Optional[Tuple[int, int, int]]:
+    try:
+        fs = ALERTS_STATE_FILE.stat()
+    except OSError:
+        return None
+    return (int(fs.st_ino), int(fs.st_mtime_ns), int(fs.st_size))
+
+
+def _alerts_state_dumps(st: Dict[str, Any]) -> Tuple[str, str]:
+    stable = json.dumps({k: v for k, v in st.items() if k not in ALERTS_STATE_VOLATILE}, ensure_ascii=False, sort_keys=True)
+    return stable, json.dumps(st, ensure_ascii=False, sort_keys=True)
+
+
 def alerts_state() -> Dict[str, Any]:
+    mem = _ALERTS_STATE_MEM.get("state")
+    sig = _alerts_state_file_sig()
+    if isinstance(mem, dict) and sig == _ALERTS_STATE_MEM.get("file_sig"):
+        return json.loads(json.dumps(mem))
     st = _load_json(ALERTS_STATE_FILE)
     if not isinstance(st.get("seen"), dict):
         st["seen"] = {}
@@ -2301,15 +4511,65 @@ def alerts_state() -> Dict[str, Any]:
     st.setdefault("last_sent_ts", 0)
     st.setdefault("last_send_ok", True)
     st.setdefault("last_send_msg", "")
+    # What is on disk now; an unchanged state isn't written back.
+    _ALERTS_STATE_MEM["state"] = json.loads(json.dumps(st))
+    _ALERTS_STATE_MEM["file_sig"] = sig
+    _ALERTS_STATE_MEM["written"] = _alerts_state_dumps(st) if sig is not None else None
     return st
 
 
+def _alerts_state_persist(st: Dict[str, Any], force: bool = False) -> bool:
+    """Write alerts_state.json if anything but the volatile fields changed (or they are due). Caller holds _ALERTS_STATE_LOCK."""
+    _ALERTS_STATE_MEM["state"] = json.loads(json.dumps(st))
+    stable, full = _alerts_state_dumps(st)
+    now = time.time()
+    written = _ALERTS_STATE_MEM.get("written")
+    if written is not None and full == written[1]:
+        return False
+    due = (now - float(_ALERTS_STATE_MEM.get("written_ts") or 0.0)) >= ALERTS_STATE_FLUSH_S
+    if not force and written is not None and stable == written[0] and not due:
+        return False
+    try:
+        ensure_runtime_dir()
+        _write_atomic(ALERTS_STATE_FILE, json.dumps(st, ensure_ascii=False, separators=(",", ":")) + "\n")
+    except Exception:
+        return False
+    _ALERTS_STATE_MEM["written"] = (stable, full)
+    _ALERTS_STATE_MEM["written_ts"] = now
+    _ALERTS_STATE_MEM["file_sig"] = _alerts_state_file_sig()
+    return True
+
+
+def alerts_state_flush() -> None:
+    with _ALERTS_STATE_LOCK:
+        st = _ALERTS_STATE_MEM.get("state")
+        if isinstance(st, dict):
+            _alerts_state_persist(st, force=True)
+
+
 def _alerts_signature(issues: List[Dict[str, str]]) -> str:
     keys = [str(i.get("key") or "").strip() for i in (issues or []) if str(i.get("key") or "").strip()]
     keys = sorted(set(keys))
     return ",".join(keys)
 
 
+def _alerts_level(issues: List[Dict[str, Any]]) -> str:
+    if not issues:
+        return "ok"
+    return "bad" if any(str(i.get("severity") or "bad") != "warn" for i in issues) else "warn"
+
+
+def _alerts_channels_for(issues: List[Dict[str, Any]]) -> Optional[List[str]]:
+    """Union of the issues' channel lists; None (= every configured channel) if any issue doesn't restrict."""
+    out: List[str] = []
+    for i in issues:
+        chs = list(i.get("channels") or [])
+        if not chs:
+            return None
+        out += [c for c in chs if c not in out]
+    return out or None
+
+
 def _alerts_enabled(alerts_env: Dict[str, str]) -> bool:
     return env_bool(alerts_env, "ALERT_ENABLED", False)
 
@@ -2327,132 +4587,504 @@ def _alerts_any_channel_configured(alerts_env: Dict[str, str]) -> bool:
     return bool(ch.get("wecom") or ch.get("telegram") or ch.get("bark"))
 
 
+# Latency SLOs over the shared probe results. A sample is "good" when the probe succeeded
+# within the latency threshold. Burn rate = bad fraction / error budget (1 - target), computed
+# over rolling windows from per-minute buckets (fixed-size ring, constant memory).
+# Alerting follows the usual multi-window scheme: fast burn (5m and 1h both > 14.4) or
+# slow burn (30m and 6h both > 6).
+# Thresholds can be overridden in alerts.env: ALERT_SLO_<NAME>_MS / ALERT_SLO_<NAME>_TARGET.
+SLOS: Dict[str, Dict[str, Any]] = {
+    "api_local": {"label": "API 本机", "probe": "api_local", "latency_ms": 500, "target": 0.99},
+    "api_public": {"label": "API 外网", "probe": "api_public", "latency_ms": 1500, "target": 0.99},
+    "frontend": {"label": "前端", "probe": "frontend", "latency_ms": 3000, "target": 0.99},
+}
+SLO_BUCKETS = 360  # minutes kept (6h)
+SLO_BURN_WINDOWS = {"fast": ((5, 60), 14.4), "slow": ((30, 360), 6.0)}
+SLO_QUANTILE_EPOCH_S = 3600
+_SLO_LOCK = threading.Lock()
+_SLO_STATE: Dict[str, Dict[str, Any]] = {}
+
+
+class _P2Quantile:
+    """P-square streaming quantile estimator (Jain & Chlamtac): 5 markers, O(1) memory per quantile."""
+
+    def __init__(self, q: float) -> None:
+        self.q = float(q)
+        self.n = 0
+        self.h: List[float] = []  # marker heights
+        self.pos = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.want = [1.0, 1.0 + 2 * q, 1.0 + 4 * q, 3.0 + 2 * q, 5.0]
+        self.inc = [0.0, q / 2, q, (1 + q) / 2, 1.0]
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        if self.n <= 5:
+            self.h.append(float(x))
+            self.h.sort()
+            return
+        h, pos = self.h, self.pos
+        if x < h[0]:
+            h[0] = float(x)
+            k = 0
+        elif x >= h[4]:
+            h[4] = float(x)
+            k = 3
+        else:
+            k = next(i for i in range(4) if h[i] <= x < h[i + 1])
+        for i in range(k + 1, 5):
+            pos[i] += 1
+        for i in range(5):
+            self.want[i] += self.inc[i]
+        for i in (1, 2, 3):
+            d = self.want[i] - pos[i]
+            if (d >= 1 and pos[i + 1] - pos[i] > 1) or (d <= -1 and pos[i - 1] - pos[i] < -1):
+                s = 1 if d > 0 else -1
+                hp = h[i] + s / (pos[i + 1] - pos[i - 1]) * (
+                    (pos[i] - pos[i - 1] + s) * (h[i + 1] - h[i]) / (pos[i + 1] - pos[i])
+                    + (pos[i + 1] - pos[i] - s) * (h[i] - h[i - 1]) / (pos[i] - pos[i - 1])
+                )
+                if not (h[i - 1] < hp < h[i + 1]):
+                    hp = h[i] + s * (h[i + s] - h[i]) / (pos[i + s] - pos[i])
+                h[i] = hp
+                pos[i] += s
+
+    def value(self) -> float:
+        if not self.h:
+            return 0.0
+        if self.n <= 5:
+            return self.h[min(len(self.h) - 1, int(round(self.q * (len(self.h) - 1))))]
+        return self.h[2]
+
+
+def _slo_params(name: str, alerts_env: Optional[Dict[str, str]] = None) -> Tuple[int, float]:
+    spec = SLOS[name]
+    env = alerts_env or {}
+    ms = env_int(env, f"ALERT_SLO_{name.upper()}_MS", int(spec["latency_ms"]), 10, 60000)
+    try:
+        target = float(str(env.get(f"ALERT_SLO_{name.upper()}_TARGET") or spec["target"]))
+    except Exception:
+        target = float(spec["target"])
+    return int(ms), float(min(0.9999, max(0.5, target)))
+
+
+def _slo_state(name: str) -> Dict[str, Any]:
+    # Caller holds _SLO_LOCK.
+    st = _SLO_STATE.get(name)
+    if st is None:
+        st = {
+            "ring": [[0, 0, 0] for _ in range(SLO_BUCKETS)],  # [minute, good, total]
+            "epoch": 0,
+            "q": {},  # current epoch: {"p50", "p95", "p99"} estimators
+            "q_prev": {},
+        }
+        _SLO_STATE[name] = st
+    return st
+
+
+def slo_record(name: str, ok: bool, latency_ms: float, ts: Optional[float] = None, threshold_ms: Optional[int] = None) -> None:
+    t = float(ts if ts is not None else time.time())
+    limit = int(threshold_ms if threshold_ms is not None else SLOS[name]["latency_ms"])
+    good = bool(ok) and float(latency_ms) <= limit
+    minute = int(t // 60)
+    epoch = int(t // SLO_QUANTILE_EPOCH_S)
+    with _SLO_LOCK:
+        st = _slo_state(name)
+        b = st["ring"][minute % SLO_BUCKETS]
+        if b[0] != minute:
+            b[0], b[1], b[2] = minute, 0, 0
+        b[1] += 1 if good else 0
+        b[2] += 1
+        if epoch != st["epoch"]:
+            st["q_prev"] = st["q"] if epoch == st["epoch"] + 1 else {}
+            st["q"] = {}
+            st["epoch"] = epoch
+        if ok:
+            for label, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+                st["q"].setdefault(label, _P2Quantile(q)).add(float(latency_ms))
+
+
+def _slo_window_locked(st: Dict[str, Any], minutes: int, now_min: int) -> Tuple[int, int]:
+    good = total = 0
+    for m in range(now_min - minutes + 1, now_min + 1):
+        b = st["ring"][m % SLO_BUCKETS]
+        if b[0] == m:
+            good += b[1]
+            total += b[2]
+    return good, total
+
+
+def slo_status(name: str, alerts_env: Optional[Dict[str, str]] = None, now: Optional[float] = None) -> Dict[str, Any]:
+    ms, target = _slo_params(name, alerts_env)
+    budget = 1.0 - target
+    now_min = int(float(now if now is not None else time.time()) // 60)
+    burn: Dict[str, float] = {}
+    with _SLO_LOCK:
+        st = _slo_state(name)
+        for w in sorted({w for (ws, _) in SLO_BURN_WINDOWS.values() for w in ws}):
+            good, total = _slo_window_locked(st, w, now_min)
+            burn[f"{w}m"] = round(((total - good) / total) / budget, 2) if total else 0.0
+        good6, total6 = _slo_window_locked(st, SLO_BUCKETS, now_min)
+        qs = st["q"] if (st["q"].get("p95") and st["q"]["p95"].n >= 20) or not st["q_prev"] else st["q_prev"]
+        quant = {k: int(v.value()) for k, v in qs.items()}
+    burning = [
+        kind for kind, (ws, limit) in SLO_BURN_WINDOWS.items() if all(burn.get(f"{w}m", 0.0) > limit for w in ws)
+    ]
+    used = ((total6 - good6) / total6) / budget if total6 else 0.0
+    return {
+        "label": SLOS[name]["label"],
+        "probe": SLOS[name]["probe"],
+        "latency_ms": ms,
+        "target": target,
+        "samples_6h": total6,
+        "good_ratio_6h": round(good6 / total6, 4) if total6 else 1.0,
+        "budget_remaining_6h": round(1.0 - used, 3),
+        "burn": burn,
+        "burning": burning[0] if burning else "",
+        "p50_ms": quant.get("p50", 0),
+        "p95_ms": quant.get("p95", 0),
+        "p99_ms": quant.get("p99", 0),
+    }
+
+
+def slo_summary(alerts_env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    return {name: slo_status(name, alerts_env) for name in SLOS}
+
+
+def _slo_on_probe(name: str, r: Dict[str, Any], prev: Optional[Dict[str, Any]]) -> None:
+    for slo, spec in SLOS.items():
+        if spec["probe"] == name:
+            aenv = cached("slo_alerts_env", 10, lambda: read_env_file(ALERTS_ENV_FILE))
+            slo_record(
+                slo,
+                bool(r.get("ok")),
+                float(r.get("duration_ms") or 0),
+                ts=float(r.get("ts") or time.time()),
+                threshold_ms=_slo_params(slo, aenv)[0],
+            )
+
+
+probe_subscribe(_slo_on_probe)
+
+
+# Alert rules are declared in .naibao_runtime/alert_rules.json (created with the defaults below).
+# Condition forms:
+#   {"probe": "api_local", "ok": false}          last result of a shared probe
+#   {"probe": "api_public", "latency_ms_gt": 800}  last probe duration
+#   {"probe": "api_public", "p95_ms_gt": 1500}     p95 of recent successful probe latencies
+#   {"fact": "tunnel_alive", "eq": false}          facts: need_named / config_ok / cert_ok / tunnel_alive / include_setup
+#   {"ever_ok": "frontend"}                        the probe has been ok at least once
+#   {"slo": "api_public", "burning": true}         latency SLO burning its error budget (see SLOS)
+#   {"all": [...]}, {"any": [...]}, {"not": {...}}
+# Rule fields: key, title, severity ("bad" | "warn"), when, for_s (condition must hold this long),
+# detail / fix (may use {probe.<name>.msg|latency_ms|p95_ms}, {fact.<name>} and
+# {slo.<name>.summary}), channels (empty = all).
+DEFAULT_ALERT_RULES: List[Dict[str, Any]] = [
+    {
+        "key": "docker",
+        "title": "Docker 引擎不可用",
+        "when": {"probe": "docker_daemon", "ok": False},
+        "detail": "{probe.docker_daemon.msg}",
+        "fix": "打开 Docker Desktop/OrbStack，等待就绪后点「一键启动/修复」。",
+    },
+    {
+        "key": "api_local",
+        "title": "API 本机不可用",
+        "when": {"all": [{"probe": "docker_daemon", "ok": True}, {"probe": "api_local", "ok": False}]},
+        "detail": "{probe.api_local.msg}",
+        "fix": "点「一键启动/修复」；仍失败就重启后端并查看后端日志。",
+    },
+    {
+        "key": "named_init",
+        "title": "固定外网未初始化",
+        "when": {"all": [{"fact": "include_setup"}, {"fact": "need_named"}, {"not": {"fact": "config_ok"}}]},
+        "detail": "未生成 cloudflared named 配置/凭据",
+        "fix": "先完成域名 NS 接入 Cloudflare，再点「固定外网初始化（一次性）」。",
+    },
+    {
+        "key": "tunnel",
+        "title": "外网通道未运行",
+        "when": {"all": [{"fact": "need_named"}, {"fact": "config_ok"}, {"not": {"fact": "tunnel_alive"}}]},
+        "detail": "cloudflared 未在运行",
+        "fix": "点「启动外网通道」或「重启外网通道」。",
+    },
+    {
+        "key": "api_public",
+        "title": "API 外网不可用",
+        "when": {
+            "all": [
+                {"any": [{"fact": "include_setup"}, {"ever_ok": "api_public"}, {"fact": "config_ok"}]},
+                {"probe": "api_public", "ok": False},
+            ]
+        },
+        "detail": "{probe.api_public.msg}",
+        "fix": "先确保「API 本机」正常；再重启外网通道；若提示 1014 重新做固定外网初始化。",
+    },
+    {
+        "key": "frontend",
+        "title": "前端不可访问",
+        "when": {"all": [{"any": [{"fact": "include_setup"}, {"ever_ok": "frontend"}]}, {"probe": "frontend", "ok": False}]},
+        "detail": "{probe.frontend.msg}",
+        "fix": "检查 Cloudflare DNS（根域 A / www）与 GitHub Pages 域名/HTTPS 配置。",
+    },
+    {
+        "key": "slo_api_public",
+        "title": "API 外网变慢（错误预算消耗过快）",
+        "severity": "warn",
+        "when": {"slo": "api_public", "burning": True},
+        "detail": "{slo.api_public.summary}",
+        "fix": "检查本机网络与 cloudflared 日志；必要时重启外网通道。",
+    },
+    {
+        "key": "slo_frontend",
+        "title": "前端变慢（错误预算消耗过快）",
+        "severity": "warn",
+        "when": {"slo": "frontend", "burning": True},
+        "detail": "{slo.frontend.summary}",
+        "fix": "检查 GitHub Pages / Cloudflare 状态；持续变慢再排查 DNS。",
+    },
+    {
+        "key": "slo_api_local",
+        "title": "API 本机变慢（错误预算消耗过快）",
+        "severity": "warn",
+        "when": {"slo": "api_local", "burning": True},
+        "detail": "{slo.api_local.summary}",
+        "fix": "查看后端日志与主机资源（CPU/内存/磁盘）；必要时重启后端。",
+    },
+]
+
+ALERT_FACTS = {"need_named", "config_ok", "cert_ok", "tunnel_alive", "include_setup"}
+_ALERT_RULES_LOCK = threading.Lock()
+_ALERT_RULES_CACHE: Dict[str, Any] = {"sig": None, "rules": [], "probes": [], "error": ""}
+
+
+def ensure_alert_rules_file() -> None:
+    if ALERT_RULES_FILE.exists():
+        return
+    ensure_runtime_dir()
+    ALERT_RULES_FILE.write_text(
+        json.dumps({"rules": DEFAULT_ALERT_RULES}, ensure_ascii=False, indent=2) + "\n",
+        encoding="utf-8",
+    )
+
+
+def _compile_cond(c: Any) -> Tuple[Any, List[str]]:
+    """-> (fn(inputs) -> bool, input keys it reads). Raises ValueError on a malformed condition."""
+    if not isinstance(c, dict):
+        raise ValueError(f"条件格式错误：{c!r}")
+    if "all" in c or "any" in c:
+        parts = [_compile_cond(x) for x in (c.get("all") if "all" in c else c.get("any")) or []]
+        fns = [p[0] for p in parts]
+        keys = [k for p in parts for k in p[1]]
+        if "all" in c:
+            return (lambda inp: all(f(inp) for f in fns)), keys
+        return (lambda inp: any(f(inp) for f in fns)), keys
+    if "not" in c:
+        fn, keys = _compile_cond(c["not"])
+        return (lambda inp: not fn(inp)), keys
+    if "slo" in c:
+        name = str(c["slo"])
+        if name not in SLOS:
+            raise ValueError(f"未知 SLO：{name}")
+        k, want = f"slo.{name}.burning", bool(c.get("burning", True))
+        return (lambda inp: bool(inp.get(k)) == want), [k]
+    if "ever_ok" in c:
+        k = f"seen.{c['ever_ok']}"
+        return (lambda inp: bool(inp.get(k))), [k]
+    if "fact" in c:
+        name = str(c["fact"])
+        if name not in ALERT_FACTS:
+            raise ValueError(f"未知条件项 fact：{name}")
+        k = f"fact.{name}"
+        if "eq" in c:
+            want = c["eq"]
+            return (lambda inp: inp.get(k) == want), [k]
+        return (lambda inp: bool(inp.get(k))), [k]
+    if "probe" in c:
+        name = str(c["probe"])
+        if name not in PROBES:
+            raise ValueError(f"未知探测项：{name}")
+        if "ok" in c:
+            k, want = f"probe.{name}.ok", bool(c["ok"])
+            return (lambda inp: bool(inp.get(k)) == want), [k]
+        for field, key in (("latency_ms_gt", "latency_ms"), ("p95_ms_gt", "p95_ms")):
+            if field in c:
+                k, limit = f"probe.{name}.{key}", float(c[field])
+                return (lambda inp: float(inp.get(k) or 0) > limit), [k]
+    raise ValueError(f"无法识别的条件：{json.dumps(c, ensure_ascii=False)}")
+
+
+def _compile_rules(raw: Any) -> List[Dict[str, Any]]:
+    items = raw.get("rules") if isinstance(raw, dict) else raw
+    if not isinstance(items, list):
+        raise ValueError("alert_rules.json 需要 {\"rules\": [...]}")
+    out: List[Dict[str, Any]] = []
+    for r in items:
+        key = str((r or {}).get("key") or "").strip()
+        if not key:
+            raise ValueError("规则缺少 key")
+        fn, keys = _compile_cond(r.get("when"))
+        tmpl = str(r.get("detail") or "") + str(r.get("fix") or "")
+        keys += [m for m in re.findall(r"\{((?:probe|fact|slo)\.[^{}]+)\}", tmpl)]
+        out.append(
+            {
+                "key": key,
+                "title": str(r.get("title") or key),
+                "severity": "warn" if str(r.get("severity") or "bad") == "warn" else "bad",
+                "for_s": float(r.get("for_s") or 0),
+                "detail": str(r.get("detail") or ""),
+                "fix": str(r.get("fix") or ""),
+                "channels": [str(x) for x in (r.get("channels") or []) if str(x) in ALERT_CHANNEL_LABELS],
+                "cond": fn,
+                "inputs": sorted(set(keys)),
+                "memo": None,  # (input fingerprint, cond value)
+                "since": 0.0,  # when the condition became true (for for_s)
+            }
+        )
+    return out
+
+
+def alert_rules() -> Dict[str, Any]:
+    """Compiled rules; recompiled only when the rules file changes. A broken file falls back to the defaults."""
+    ensure_alert_rules_file()
+    try:
+        stt = ALERT_RULES_FILE.stat()
+        sig = (int(stt.st_mtime_ns), int(stt.st_size))
+    except Exception:
+        sig = None
+    with _ALERT_RULES_LOCK:
+        if sig is not None and sig == _ALERT_RULES_CACHE["sig"]:
+            return _ALERT_RULES_CACHE
+        err = ""
+        try:
+            rules = _compile_rules(json.loads(ALERT_RULES_FILE.read_text(encoding="utf-8")))
+        except Exception as e:
+            err = f"告警规则无效，已使用默认规则：{e}"
+            rules = _compile_rules(DEFAULT_ALERT_RULES)
+            _append_alert_log(err)
+        probes = {".".join(k.split(".")[1:-1]) for r in rules for k in r["inputs"] if k.startswith("probe.")}
+        probes |= {k[len("seen.") :] for r in rules for k in r["inputs"] if k.startswith("seen.")}
+        probes |= {SLOS[k.split(".")[1]]["probe"] for r in rules for k in r["inputs"] if k.startswith("slo.")}
+        _ALERT_RULES_CACHE.update({"sig": sig, "rules": rules, "probes": sorted(p for p in probes if p in PROBES), "error": err})
+        return _ALERT_RULES_CACHE
+
+
+def _alert_rules_summary() -> Dict[str, Any]:
+    try:
+        c = alert_rules()
+        return {"file": str(ALERT_RULES_FILE), "count": len(c["rules"]), "probes": list(c["probes"]), "error": str(c["error"] or "")}
+    except Exception as e:
+        return {"file": str(ALERT_RULES_FILE), "count": 0, "probes": [], "error": humanize_error(str(e))}
+
+
+def alert_rule_probes() -> List[str]:
+    try:
+        return list(alert_rules()["probes"]) or list(ALERT_PROBES)
+    except Exception:
+        return list(ALERT_PROBES)
+
+
+def probe_latency_p95_ms(name: str) -> int:
+    with _PROBE_LOCK:
+        cutoff = time.time() - PROBE_LATENCY_MAX_AGE_S
+        lat = sorted(d for ts, d in (_PROBE_STATS.get(name) or {}).get("lat") or [] if ts >= cutoff)
+    if not lat:
+        return 0
+    return int(lat[min(len(lat) - 1, int(0.95 * len(lat)))] * 1000.0)
+
+
+def _alert_render(tmpl: str, inputs: Dict[str, Any]) -> str:
+    return re.sub(r"\{((?:probe|fact|slo)\.[^{}]+)\}", lambda m: str(inputs.get(m.group(1), "")), tmpl).strip()
+
+
 def alerts_evaluate(alerts_env: Dict[str, str], state: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Evaluate "runtime incidents" and generate a short runbook.
-    Default is conservative (avoid spamming during initial setup).
+    Evaluate "runtime incidents" (rules from alert_rules.json) and generate a short runbook.
+    Default rules are conservative (avoid spamming during initial setup).
     """
-    ensure_home_env_file()
-    env = read_env_file(HOME_ENV_FILE)
+    ctx = probe_context()
+    env = ctx["env"]
+    compiled = alert_rules()
 
-    include_setup = env_bool(alerts_env, "ALERT_INCLUDE_SETUP", False)
     seen = state.get("seen") if isinstance(state.get("seen"), dict) else {}
-    seen_frontend_ok = bool(seen.get("frontend_ok"))
-    seen_api_public_ok = bool(seen.get("api_public_ok"))
-
-    public_domain = (env.get("NB_PUBLIC_DOMAIN") or "naibao.me").strip()
-    api_public = (env.get("NB_TUNNEL_HOSTNAME") or "api.naibao.me").strip()
-    api_local_port = backend_host_port(env)
+    public_domain = str(ctx["public_domain"])
+    api_public = str(ctx["api_public"])
+    api_local_port = int(ctx["api_local_port"])
 
-    # Core checks (local)
-    docker_daemon = docker_daemon_status()
-    docker_ok = bool(docker_daemon.get("ok"))
-    api_local_ok, api_local_msg = http_health(f"http://127.0.0.1:{int(api_local_port)}/health", timeout_s=2)
+    # Same probe results as the dashboard: reuse anything newer than one alert interval.
+    interval_s = env_int(alerts_env, "ALERT_INTERVAL_S", 30, 10, 600)
+    probes = probe_run(compiled["probes"], ctx=ctx, max_age_s=float(interval_s))
 
     # Tunnel / named config
     tunnel_mode = (env.get("NB_TUNNEL_MODE") or "named").strip().lower()
-    need_named = tunnel_mode != "quick"
     named_cfg = parse_named_tunnel_config(TUN_CFG)
     cred_raw = (named_cfg.get("credentials_file") or "").strip()
     cred_path = Path(os.path.expanduser(cred_raw)) if cred_raw else None
     cred_ok = bool(cred_path and cred_path.exists())
-    cert_ok = bool((Path.home() / ".cloudflared" / "cert.pem").exists())
-    config_ok = bool(TUN_CFG.exists() and (named_cfg.get("tunnel_id") or "").strip() and cred_ok)
-
     tunnel_pid = read_pid(TUN_PID)
-    tunnel_alive = bool(tunnel_pid and is_pid_alive(tunnel_pid))
-
-    # Public checks (only alert after it has been OK at least once, unless include_setup=1)
-    api_public_ok, api_public_msg = cached(
-        f"alerts_api_public_health:{api_public}",
-        15,
-        lambda: http_health(f"https://{api_public}/api/health", timeout_s=3),
-    )
-    frontend_ok, frontend_msg = cached(
-        f"alerts_frontend_https:{public_domain}",
-        30,
-        lambda: http_health(f"https://{public_domain}", timeout_s=3),
-    )
-
-    # Update "seen ok" flags (for future suppression).
-    if api_public_ok:
-        seen_api_public_ok = True
-    if frontend_ok:
-        seen_frontend_ok = True
-
-    issues: List[Dict[str, str]] = []
+    facts = {
+        "need_named": tunnel_mode != "quick",
+        "config_ok": bool(TUN_CFG.exists() and (named_cfg.get("tunnel_id") or "").strip() and cred_ok),
+        "cert_ok": bool((Path.home() / ".cloudflared" / "cert.pem").exists()),
+        "tunnel_alive": bool(tunnel_pid and is_pid_alive(tunnel_pid)),
+        "include_setup": env_bool(alerts_env, "ALERT_INCLUDE_SETUP", False),
+    }
 
-    if not docker_ok:
-        issues.append(
-            {
-                "key": "docker",
-                "title": "Docker 引擎不可用",
-                "detail": str(docker_daemon.get("msg") or ""),
-                "fix": "打开 Docker Desktop/OrbStack，等待就绪后点「一键启动/修复」。",
-            }
-        )
-    if docker_ok and not api_local_ok:
-        issues.append(
-            {
-                "key": "api_local",
-                "title": "API 本机不可用",
-                "detail": (api_local_msg or "").strip(),
-                "fix": "点「一键启动/修复」；仍失败就重启后端并查看后端日志。",
-            }
+    # Update "seen ok" flags (used by ever_ok conditions).
+    for n, r in probes.items():
+        if r.get("ok"):
+            seen[f"{n}_ok"] = True
+
+    inputs: Dict[str, Any] = {f"fact.{k}": v for k, v in facts.items()}
+    for n, r in probes.items():
+        msg = str(r.get("msg") or "").strip()
+        if r.get("skipped"):
+            # Name the failing upstream instead of "skipped" (e.g. backend container not running).
+            up = [probes[u] for u in (r.get("upstream") or []) if u in probes]
+            msg = str(up[0].get("msg") or msg) if up else msg
+        inputs[f"probe.{n}.ok"] = bool(r.get("ok"))
+        inputs[f"probe.{n}.msg"] = msg
+        inputs[f"probe.{n}.latency_ms"] = int(r.get("duration_ms") or 0)
+        inputs[f"probe.{n}.p95_ms"] = probe_latency_p95_ms(n)
+        inputs[f"seen.{n}"] = bool(seen.get(f"{n}_ok"))
+    for name in SLOS:
+        sl = slo_status(name, alerts_env)
+        inputs[f"slo.{name}.burning"] = sl["burning"]
+        inputs[f"slo.{name}.summary"] = (
+            f"{sl['label']} 目标 {sl['target'] * 100:g}% 请求 ≤{sl['latency_ms']}ms；"
+            f"近 6 小时达标 {sl['good_ratio_6h'] * 100:.1f}%，p95 {sl['p95_ms']}ms，"
+            f"错误预算剩余 {max(0.0, sl['budget_remaining_6h']) * 100:.0f}%"
         )
 
-    if need_named:
-        if not config_ok:
-            if include_setup:
-                issues.append(
-                    {
-                        "key": "named_init",
-                        "title": "固定外网未初始化",
-                        "detail": "未生成 cloudflared named 配置/凭据",
-                        "fix": "先完成域名 NS 接入 Cloudflare，再点「固定外网初始化（一次性）」。",
-                    }
-                )
-        else:
-            if not tunnel_alive:
-                issues.append(
-                    {
-                        "key": "tunnel",
-                        "title": "外网通道未运行",
-                        "detail": "cloudflared 未在运行",
-                        "fix": "点「启动外网通道」或「重启外网通道」。",
-                    }
-                )
-
-    # Only alert on public endpoints if it was OK before, or user explicitly includes setup.
-    if include_setup or seen_api_public_ok or config_ok:
-        if not api_public_ok:
-            issues.append(
-                {
-                    "key": "api_public",
-                    "title": "API 外网不可用",
-                    "detail": (api_public_msg or "").strip(),
-                    "fix": "先确保「API 本机」正常；再重启外网通道；若提示 1014 重新做固定外网初始化。",
-                }
-            )
-    if include_setup or seen_frontend_ok:
-        if not frontend_ok:
+    now = time.time()
+    issues: List[Dict[str, Any]] = []
+    with _ALERT_RULES_LOCK:
+        for rule in compiled["rules"]:
+            fp = tuple(inputs.get(k) for k in rule["inputs"])
+            memo = rule["memo"]
+            if memo is not None and memo[0] == fp:
+                hit = memo[1]
+            else:
+                hit = bool(rule["cond"](inputs))
+                rule["memo"] = (fp, hit)
+                rule["since"] = (rule["since"] or now) if hit else 0.0
+            if not hit or (now - float(rule["since"] or now)) < float(rule["for_s"]):
+                continue
             issues.append(
                 {
-                    "key": "frontend",
-                    "title": "前端不可访问",
-                    "detail": (frontend_msg or "").strip(),
-                    "fix": "检查 Cloudflare DNS（根域 A / www）与 GitHub Pages 域名/HTTPS 配置。",
+                    "key": rule["key"],
+                    "title": rule["title"],
+                    "severity": rule["severity"],
+                    "detail": _alert_render(rule["detail"], inputs),
+                    "fix": _alert_render(rule["fix"], inputs),
+                    "channels": list(rule["channels"]),
                 }
             )
 
-    level = "ok" if not issues else "bad"
+    level = _alerts_level(issues)
     sig = _alerts_signature(issues)
 
     # persist seen flags for suppression
-    state.setdefault("seen", {})
-    if isinstance(state["seen"], dict):
-        state["seen"]["frontend_ok"] = bool(seen_frontend_ok)
-        state["seen"]["api_public_ok"] = bool(seen_api_public_ok)
+    state["seen"] = seen
 
     return {
         "level": level,
@@ -2463,19 +5095,228 @@ def alerts_evaluate(alerts_env: Dict[str, str], state: Dict[str, Any]) -> Dict[s
             "api_health": f"https://{api_public}/api/health",
         },
         "local": {"api_port": int(api_local_port), "api_url": f"http://127.0.0.1:{int(api_local_port)}/health"},
-        "named": {"need_named": bool(need_named), "config_ok": bool(config_ok), "cert_ok": bool(cert_ok)},
+        "named": {"need_named": bool(facts["need_named"]), "config_ok": bool(facts["config_ok"]), "cert_ok": bool(facts["cert_ok"])},
     }
 
 
-def alerts_message(summary: Dict[str, Any], is_recovery: bool) -> Tuple[str, str]:
+# Per-issue hysteresis: each issue keeps a bitmask of its last ALERT_FLAP_WINDOW evaluations
+# (bit 0 = newest, 1 = bad). It trips after ALERT_TRIP_COUNT bad runs in a row, clears after
+# ALERT_CLEAR_COUNT ok runs in a row, and enters "flapping" when it flips ok<->bad too often,
+# which is reported as one summarized issue (repeated at ALERT_REPEAT_MINUTES) instead of
+# an alert + recovery per cycle.
+ALERT_FLAP_WINDOW = 20
+
+
+def _trailing_run(bits: int, n: int, bad: bool) -> int:
+    run = 0
+    for i in range(n):
+        if bool((bits >> i) & 1) != bad:
+            break
+        run += 1
+    return run
+
+
+def alerts_hysteresis(raw_issues: List[Dict[str, str]], state: Dict[str, Any], alerts_env: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Fold this evaluation into state["issues"] and return
+    {"issues": effective issues to alert on, "transitional": an issue is waiting to trip/clear}.
+    """
+    trip = env_int(alerts_env, "ALERT_TRIP_COUNT", 1, 1, 10)
+    clear = env_int(alerts_env, "ALERT_CLEAR_COUNT", 2, 1, 10)
+    flap_on = env_int(alerts_env, "ALERT_FLAP_FLIPS", 6, 3, ALERT_FLAP_WINDOW - 1)
+    flap_off = max(1, flap_on // 2)
+    mask = (1 << ALERT_FLAP_WINDOW) - 1
+
+    tracked = state.get("issues") if isinstance(state.get("issues"), dict) else {}
+    raw = {str(i.get("key") or ""): i for i in raw_issues if str(i.get("key") or "")}
+    now = int(time.time())
+    out: List[Dict[str, str]] = []
+    transitional = False
+
+    for key in sorted(set(tracked) | set(raw)):
+        it = tracked.get(key) if isinstance(tracked.get(key), dict) else {}
+        bad = key in raw
+        n = min(ALERT_FLAP_WINDOW, int(it.get("n") or 0) + 1)
+        bits = ((int(it.get("bits") or 0) << 1) | (1 if bad else 0)) & mask
+        flips = bin((bits ^ (bits >> 1)) & ((1 << (n - 1)) - 1)).count("1") if n > 1 else 0
+        bad_run = _trailing_run(bits, n, True)
+        ok_run = _trailing_run(bits, n, False)
+
+        prev = str(it.get("state") or "ok")
+        stable = max(bad_run, ok_run) >= flap_on  # settled for as long as it took to call it flapping
+        if flips >= flap_on and not stable:
+            cur = "flapping"
+        elif prev == "flapping" and flips >= flap_off and not stable:
+            cur = "flapping"
+        elif prev in ("firing", "flapping"):
+            cur = "ok" if ok_run >= clear else "firing"
+        elif bad_run >= trip:
+            cur = "firing"
+        else:
+            cur = "ok"
+
+        if bad:
+            it["last"] = {k: str(raw[key].get(k) or "") for k in ("title", "detail", "fix", "severity")}
+            it["last"]["channels"] = list(raw[key].get("channels") or [])
+        it.update({"bits": bits, "n": n, "state": cur})
+        if cur != prev:
+            it["since"] = now
+
+        if cur == "firing":
+            out.append(dict(it.get("last") or {}, key=key))
+            transitional = transitional or not bad
+        elif cur == "flapping":
+            last = dict(it.get("last") or {})
+            out.append(
+                {
+                    "key": f"{key}~flap",
+                    "title": (last.get("title") or key) + "（反复波动）",
+                    "detail": f"最近 {n} 次检查中切换 {flips} 次；当前{'异常' if bad else '正常'}",
+                    "fix": last.get("fix") or "",
+                    "severity": last.get("severity") or "bad",
+                    "channels": last.get("channels") or [],
+                }
+            )
+            transitional = True
+        else:
+            transitional = transitional or bad
+
+        if cur == "ok" and bits == 0:
+            tracked.pop(key, None)  # fully quiet again: forget it
+        else:
+            tracked[key] = it
+
+    state["issues"] = tracked
+    return {"issues": out, "transitional": bool(transitional)}
+
+
+# Digest: transitions that arrive within ALERT_DIGEST_WINDOW_S of the first one are sent as one
+# message with a timeline ("Docker 引擎不可用 → API 本机不可用（+2s）→ ..."), ordered by time and,
+# for the same evaluation, by probe dependency depth (upstream first).
+# The open window is saved in alerts_state.json ("digest") so a restart inside it still sends.
+_DIGEST: Dict[str, Any] = {"deadline": 0.0, "t0": 0.0, "events": [], "restored": False}
+
+
+def _alert_issue_depth(key: str) -> int:
+    base = key.split("~")[0]
+
+    def _depth(p: str) -> int:
+        # "related" counts as upstream too: api_public goes down because api_local did.
+        ups = list(PROBES[p]["deps"]) + list(PROBES[p].get("related") or [])
+        return 1 + max([_depth(d) for d in ups] or [0])
+
+    try:
+        for r in alert_rules()["rules"]:
+            if r["key"] == base:
+                probes = {".".join(k.split(".")[1:-1]) for k in r["inputs"] if k.startswith("probe.")}
+                return max([_depth(p) for p in probes if p in PROBES] or [0])
+    except Exception:
+        pass
+    return 0
+
+
+def alerts_digest_add(changes: List[Tuple[str, str, str]], window_s: int, now: Optional[float] = None) -> None:
+    """changes: (issue key, title, "down" | "up") seen in one evaluation."""
+    t = float(now if now is not None else time.time())
+    if not _DIGEST["deadline"]:
+        _DIGEST.update({"deadline": t + float(window_s), "t0": t, "events": []})
+    for key, title, kind in sorted(changes, key=lambda c: (_alert_issue_depth(c[0]), c[0])):
+        _DIGEST["events"].append({"ts": t, "key": key, "title": title, "kind": kind})
+
+
+def alerts_digest_restore(st: Dict[str, Any]) -> None:
+    """Once per process: reopen the window a previous run left open, or flag an unsent transition."""
+    if _DIGEST["restored"]:
+        return
+    _DIGEST["restored"] = True
+    d = st.get("digest") if isinstance(st.get("digest"), dict) else {}
+    if float(d.get("deadline") or 0) > 0:
+        _DIGEST.update({"deadline": float(d["deadline"]), "t0": float(d.get("t0") or 0), "events": list(d.get("events") or [])})
+        return
+    last = (str(st.get("last_level") or "ok"), str(st.get("last_signature") or ""))
+    notified = (str(st.get("notified_level") or last[0]), str(st.get("notified_signature") if "notified_signature" in st else last[1]))
+    if last != notified:
+        # Recorded but never announced (e.g. a state file from before the window was saved): due right away.
+        now = time.time()
+        _DIGEST.update({"deadline": now, "t0": now, "events": []})
+
+
+def alerts_digest_saved() -> Dict[str, Any]:
+    return {"deadline": float(_DIGEST["deadline"]), "t0": float(_DIGEST["t0"]), "events": list(_DIGEST["events"])}
+
+
+def alerts_digest_due(now: Optional[float] = None) -> bool:
+    t = float(now if now is not None else time.time())
+    return bool(_DIGEST["deadline"]) and t >= float(_DIGEST["deadline"])
+
+
+def alerts_digest_take() -> str:
+    """Close the window and return its timeline line ("" when nothing was collected)."""
+    events = list(_DIGEST["events"])
+    t0 = float(_DIGEST["t0"] or 0.0)
+    _DIGEST.update({"deadline": 0.0, "t0": 0.0, "events": []})
+    if len(events) < 2:
+        return ""
+    parts = []
+    for e in events:
+        label = str(e["title"] or e["key"]) + ("已恢复" if e["kind"] == "up" else "")
+        dt = int(round(float(e["ts"]) - t0))
+        parts.append(label + (f"（+{dt}s）" if dt > 0 else ""))
+    return " → ".join(parts)
+
+
+def alerts_daily_tick(st: Dict[str, Any], level: str, now: Optional[float] = None) -> None:
+    """Accumulate ok/bad time and incident count for the daily summary (compact counters in state)."""
+    t = float(now if now is not None else time.time())
+    d = st.get("daily") if isinstance(st.get("daily"), dict) else {}
+    last_ts = float(d.get("last_ts") or t)
+    prev_level = str(d.get("last_level") or "ok")
+    # Gaps longer than 10 minutes (console was off) are not counted either way.
+    dt = max(0.0, min(600.0, t - last_ts))
+    if prev_level == "ok":
+        d["ok_s"] = float(d.get("ok_s") or 0.0) + dt
+    else:
+        d["bad_s"] = float(d.get("bad_s") or 0.0) + dt
+    if prev_level == "ok" and level != "ok":
+        d["incidents"] = int(d.get("incidents") or 0) + 1
+    d.setdefault("since", int(t))
+    d["last_ts"] = t
+    d["last_level"] = level
+    st["daily"] = d
+
+
+def alerts_daily_message(st: Dict[str, Any], alerts_env: Dict[str, str]) -> Tuple[str, str]:
+    d = st.get("daily") if isinstance(st.get("daily"), dict) else {}
+    ok_s = float(d.get("ok_s") or 0.0)
+    bad_s = float(d.get("bad_s") or 0.0)
+    total = ok_s + bad_s
+    lines = [
+        f"时间：{time.strftime('%Y-%m-%d %H:%M')}",
+        f"统计自：{time.strftime('%m-%d %H:%M', time.localtime(int(d.get('since') or time.time())))}",
+        f"可用率：{(ok_s / total * 100.0) if total else 100.0:.2f}%（异常累计 {int(bad_s // 60)} 分钟）",
+        f"异常次数：{int(d.get('incidents') or 0)}",
+        f"当前状态：{'正常' if str(d.get('last_level') or 'ok') == 'ok' else '异常'}",
+    ]
+    slo_lines = []
+    for name, sl in slo_summary(alerts_env).items():
+        if sl["samples_6h"]:
+            slo_lines.append(f"- {sl['label']}：达标 {sl['good_ratio_6h'] * 100:.1f}%，p95 {sl['p95_ms']}ms")
+    if slo_lines:
+        lines += ["", "近 6 小时响应："] + slo_lines
+    return "奶宝：每日小结", "\n".join(lines)
+
+
+def alerts_message(summary: Dict[str, Any], is_recovery: bool, timeline: str = "") -> Tuple[str, str]:
     ts = time.strftime("%Y-%m-%d %H:%M")
     issues = summary.get("issues") if isinstance(summary.get("issues"), list) else []
     urls = summary.get("urls") if isinstance(summary.get("urls"), dict) else {}
     api = str(urls.get("api_health") or "").strip()
     fe = str(urls.get("frontend") or "").strip()
 
-    title = "奶宝：已恢复" if is_recovery else "奶宝：异常"
+    title = "奶宝：已恢复" if is_recovery else ("奶宝：关注" if summary.get("level") == "warn" else "奶宝：异常")
     lines: List[str] = [f"时间：{ts}"]
+    if timeline:
+        lines.append(f"过程：{timeline}")
 
     if not is_recovery:
         if issues:
@@ -2508,34 +5349,428 @@ def alerts_message(summary: Dict[str, Any], is_recovery: bool) -> Tuple[str, str
     return title, "\n".join([x for x in lines if x is not None]).strip()
 
 
-def alerts_send_all(alerts_env: Dict[str, str], title: str, body: str) -> Tuple[bool, str]:
+ALERT_CHANNEL_LABELS = {"wecom": "微信(企业微信)", "telegram": "Telegram", "bark": "Bark"}
+ALERT_LATENCY_SAMPLES = 50
+_ALERT_STATS_LOCK = threading.Lock()
+# channel -> {"sent", "failed", "retries", "last_ok", "last_msg", "last_ms", "last_ts", "lat_ms": [...]}
+_ALERT_CHANNEL_STATS: Dict[str, Dict[str, Any]] = {}
+
+
+def _alert_retryable(msg: str) -> bool:
+    # Retry 5xx and transport errors (timeouts / refused / DNS); 4xx and missing config won't get better.
+    m = (msg or "").strip()
+    if m.startswith("HTTP "):
+        return m.startswith("HTTP 5")
+    return not m.startswith("缺少")
+
+
+def _alert_channel_sender(alerts_env: Dict[str, str], channel: str):
+    if channel == "wecom":
+        url = str(alerts_env.get("ALERT_WECOM_WEBHOOK") or "").strip()
+        return lambda title, body, t: alert_send_wecom(url, title, body, timeout_s=t)
+    if channel == "telegram":
+        token = str(alerts_env.get("ALERT_TG_BOT_TOKEN") or "").strip()
+        chat_id = str(alerts_env.get("ALERT_TG_CHAT_ID") or "").strip()
+        api_base = str(alerts_env.get("ALERT_TG_API_BASE") or "").strip() or "https://api.telegram.org"
+        return lambda title, body, t: alert_send_telegram(token, chat_id, title, body, timeout_s=t, api_base=api_base)
+    prefix = str(alerts_env.get("ALERT_BARK_URL") or "").strip()
+    return lambda title, body, t: alert_send_bark(prefix, title, body, timeout_s=t)
+
+
+def _alert_deliver(send, title: str, body: str, deadline_s: float, attempt_timeout_s: float, retries: int) -> Dict[str, Any]:
+    """One channel: attempts with jittered exponential backoff, never past the channel deadline."""
+    t0 = time.time()
+    end = t0 + float(deadline_s)
+    attempts = 0
+    ok, msg = False, ""
+    while True:
+        remaining = end - time.time()
+        if remaining <= 0.05:
+            if not msg:
+                msg = "请求超时（网络较差或服务未就绪）"
+            break
+        attempts += 1
+        ok, msg = send(title, body, min(float(attempt_timeout_s), remaining))
+        if ok or attempts > int(retries) or not _alert_retryable(msg):
+            break
+        pause = min(4.0, 0.5 * (2 ** (attempts - 1))) * random.uniform(0.5, 1.5)
+        if time.time() + pause >= end:
+            break
+        time.sleep(pause)
+    return {"ok": bool(ok), "msg": str(msg or ""), "attempts": attempts, "ms": int((time.time() - t0) * 1000.0)}
+
+
+def _alert_stats_record(channel: str, r: Dict[str, Any]) -> None:
+    with _ALERT_STATS_LOCK:
+        st = _ALERT_CHANNEL_STATS.setdefault(
+            channel,
+            {"sent": 0, "failed": 0, "retries": 0, "last_ok": False, "last_msg": "", "last_ms": 0, "last_ts": 0, "lat_ms": []},
+        )
+        st["sent" if r["ok"] else "failed"] += 1
+        st["retries"] += max(0, int(r["attempts"]) - 1)
+        st["last_ok"] = bool(r["ok"])
+        st["last_msg"] = str(r["msg"])
+        st["last_ms"] = int(r["ms"])
+        st["last_ts"] = int(time.time())
+        if r["ok"]:
+            st["lat_ms"].append(int(r["ms"]))
+            del st["lat_ms"][:-ALERT_LATENCY_SAMPLES]
+
+
+def alerts_channel_stats() -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    with _ALERT_STATS_LOCK:
+        for ch, st in _ALERT_CHANNEL_STATS.items():
+            lat = sorted(st.get("lat_ms") or [])
+            out[ch] = {k: v for k, v in st.items() if k != "lat_ms"}
+            if ch in ALERT_CHANNEL_LABELS:
+                out[ch]["p50_ms"] = lat[len(lat) // 2] if lat else 0
+                out[ch]["p95_ms"] = lat[min(len(lat) - 1, int(0.95 * len(lat)))] if lat else 0
+    return out
+
+
+def alerts_send_all(alerts_env: Dict[str, str], title: str, body: str, only: Optional[List[str]] = None) -> Tuple[bool, str]:
+    """
+    Fan out to every configured channel concurrently. Each channel has its own deadline
+    (ALERT_CHANNEL_DEADLINE_S) and retry budget (ALERT_RETRIES), so a slow provider never
+    delays the others; returns once every channel finished or hit its deadline.
+    """
     ch = _alerts_channels(alerts_env)
-    results: List[str] = []
+    names = [c for c in ("wecom", "telegram", "bark") if ch.get(c) and (not only or c in only)]
+    if not names and only:
+        # Rule asked for channels that aren't configured: better any page than none.
+        names = [c for c in ("wecom", "telegram", "bark") if ch.get(c)]
+    if not names:
+        return False, "未配置任何告警渠道（alerts.env）"
+
+    deadline_s = float(env_int(alerts_env, "ALERT_CHANNEL_DEADLINE_S", 15, 2, 120))
+    attempt_timeout_s = float(env_int(alerts_env, "ALERT_ATTEMPT_TIMEOUT_S", 6, 1, 60))
+    retries = env_int(alerts_env, "ALERT_RETRIES", 2, 0, 5)
+
+    t0 = time.time()
+    results: Dict[str, Dict[str, Any]] = {}
+    first_ok: List[float] = []
+    lock = threading.Lock()
+
+    def _run(c: str) -> None:
+        try:
+            r = _alert_deliver(_alert_channel_sender(alerts_env, c), title, body, deadline_s, attempt_timeout_s, retries)
+        except Exception as e:
+            r = {"ok": False, "msg": humanize_error(str(e)), "attempts": 1, "ms": int((time.time() - t0) * 1000.0)}
+        _alert_stats_record(c, r)
+        with lock:
+            results[c] = r
+            if r["ok"]:
+                first_ok.append(time.time() - t0)
+
+    threads = [threading.Thread(target=_run, args=(c,), daemon=True) for c in names]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=max(0.0, t0 + deadline_s + 1.0 - time.time()))
+
+    lines: List[str] = []
     ok_any = False
+    for c in names:
+        with lock:
+            r = results.get(c)
+        if r is None:
+            r = {"ok": False, "msg": "请求超时（网络较差或服务未就绪）", "attempts": 0, "ms": int(deadline_s * 1000)}
+        ok_any = ok_any or bool(r["ok"])
+        extra = [str(r["msg"] or ""), f"{int(r['ms'])}ms"]
+        if int(r["attempts"]) > 1:
+            extra.append(f"重试{int(r['attempts']) - 1}次")
+        lines.append(f"{ALERT_CHANNEL_LABELS[c]}：{'成功' if r['ok'] else '失败'}（{'，'.join(x for x in extra if x)}）")
+    if first_ok:
+        with _ALERT_STATS_LOCK:
+            _ALERT_CHANNEL_STATS.setdefault("_page", {})["time_to_page_ms"] = int(min(first_ok) * 1000.0)
+    return bool(ok_any), "\n".join(lines).strip()
+
+
+# Alert outbox: append-only journal (NDJSON) so an alert that could not be delivered is retried
+# instead of waiting for ALERT_REPEAT_MINUTES, and survives a console restart.
+# Records: {"op": "enqueue", "id", "key", ...message} / {"op": "retry", "id", "next_ts", "msg"} /
+# {"op": "done", "id", "ok", "latency_ms", "msg"}. An id without "done" is pending.
+ALERTS_OUTBOX_MAX_AGE_S = 24 * 3600
+ALERTS_OUTBOX_COMPACT_BYTES = 256 * 1024
+_OUTBOX_LOCK = threading.Lock()
+_OUTBOX_WAKE = threading.Event()
+# id -> pending entry (enqueue record + "attempts" / "next_ts"); None until loaded from disk.
+_OUTBOX_PENDING: Optional[Dict[str, Dict[str, Any]]] = None
+_OUTBOX_STATS: Dict[str, Any] = {"delivered": 0, "expired": 0, "retries": 0, "last_latency_ms": 0, "last_done_ts": 0}
+
+
+def alerts_state_update(fn) -> Dict[str, Any]:
+    """
+    Read-modify-write the alerts state; the evaluation loop and the outbox sender both use it.
+    All fields changed by fn land in one (atomic) write, and only if something changed.
+    """
+    with _ALERTS_STATE_LOCK:
+        st = alerts_state()
+        fn(st)
+        _alerts_state_persist(st)
+        return st
+
+
+def alerts_record_send(ok: bool, report: str) -> None:
+    """Remember the last send result for the alerts card."""
+    if _PROBE_WORKER is not None:
+        # The probe worker owns alerts_state.json; it applies the result on its next tick.
+        _PROBE_WORKER.send_result(ok, report)
+        return
+
+    def _upd(st: Dict[str, Any]) -> None:
+        if ok:
+            st["last_sent_ts"] = int(time.time())
+        st["last_send_ok"] = bool(ok)
+        st["last_send_msg"] = str(report or "")
+
+    alerts_state_update(_upd)
+
 
-    if ch.get("wecom"):
-        ok, msg = alert_send_wecom(str(alerts_env.get("ALERT_WECOM_WEBHOOK") or "").strip(), title, body)
-        results.append(f"微信(企业微信)：{'成功' if ok else '失败'}" + (f"（{msg}）" if msg else ""))
-        ok_any = ok_any or ok
-
-    if ch.get("telegram"):
-        ok, msg = alert_send_telegram(
-            str(alerts_env.get("ALERT_TG_BOT_TOKEN") or "").strip(),
-            str(alerts_env.get("ALERT_TG_CHAT_ID") or "").strip(),
-            title,
-            body,
+def _outbox_append(rec: Dict[str, Any]) -> None:
+    ensure_runtime_dir()
+    with ALERTS_OUTBOX.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _outbox_load_locked() -> Dict[str, Dict[str, Any]]:
+    global _OUTBOX_PENDING
+    if _OUTBOX_PENDING is not None:
+        return _OUTBOX_PENDING
+    pending: Dict[str, Dict[str, Any]] = {}
+    try:
+        lines = ALERTS_OUTBOX.read_text(encoding="utf-8", errors="ignore").splitlines() if ALERTS_OUTBOX.exists() else []
+    except Exception:
+        lines = []
+    for line in lines:
+        try:
+            rec = json.loads(line)
+        except Exception:
+            continue  # torn last line after a crash
+        rid = str(rec.get("id") or "")
+        op = rec.get("op")
+        if op == "enqueue" and rid:
+            pending[rid] = dict(rec, attempts=0, next_ts=0.0)
+        elif op == "retry" and rid in pending:
+            pending[rid]["attempts"] = int(rec.get("attempts") or 0)
+            pending[rid]["next_ts"] = float(rec.get("next_ts") or 0.0)
+        elif op == "done":
+            pending.pop(rid, None)
+    _OUTBOX_PENDING = pending
+    return pending
+
+
+def _outbox_compact_locked() -> None:
+    # Rewrite the journal with only pending entries (tmp + rename, so a crash keeps the old file).
+    try:
+        if not ALERTS_OUTBOX.exists() or ALERTS_OUTBOX.stat().st_size < ALERTS_OUTBOX_COMPACT_BYTES:
+            return
+        pending = _outbox_load_locked()
+        tmp = ALERTS_OUTBOX.with_suffix(".jsonl.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            for e in sorted(pending.values(), key=lambda x: float(x.get("ts") or 0)):
+                rec = {k: v for k, v in e.items() if k not in ("attempts", "next_ts")}
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                if int(e.get("attempts") or 0):
+                    f.write(json.dumps({"op": "retry", "id": e["id"], "attempts": e["attempts"], "next_ts": e["next_ts"]}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(str(tmp), str(ALERTS_OUTBOX))
+    except Exception:
+        pass
+
+
+def alerts_outbox_enqueue(
+    key: str,
+    title: str,
+    body: str,
+    is_recovery: bool = False,
+    channels: Optional[List[str]] = None,
+) -> bool:
+    """
+    Queue one alert; returns False when an entry with the same dedupe key
+    ("signature|level|transition") is already pending.
+    """
+    with _OUTBOX_LOCK:
+        pending = _outbox_load_locked()
+        if any(e.get("key") == key for e in pending.values()):
+            return False
+        rec = {
+            "op": "enqueue",
+            "id": secrets.token_hex(6),
+            "key": str(key),
+            "ts": time.time(),
+            "title": str(title or ""),
+            "body": str(body or ""),
+            "recovery": bool(is_recovery),
+            "channels": list(channels or []),
+        }
+        _outbox_append(rec)
+        pending[rec["id"]] = dict(rec, attempts=0, next_ts=0.0)
+    _OUTBOX_WAKE.set()
+    return True
+
+
+def alerts_outbox_pending_for(key: str) -> bool:
+    with _OUTBOX_LOCK:
+        return any(
+            str(e.get("key") or "") == key or str(e.get("key") or "").startswith(key + "|") for e in _outbox_load_locked().values()
         )
-        results.append(f"Telegram：{'成功' if ok else '失败'}" + (f"（{msg}）" if msg else ""))
-        ok_any = ok_any or ok
 
-    if ch.get("bark"):
-        ok, msg = alert_send_bark(str(alerts_env.get("ALERT_BARK_URL") or "").strip(), title, body)
-        results.append(f"Bark：{'成功' if ok else '失败'}" + (f"（{msg}）" if msg else ""))
-        ok_any = ok_any or ok
 
-    if not results:
-        return False, "未配置任何告警渠道（alerts.env）"
-    return bool(ok_any), "\n".join(results).strip()
+def alerts_outbox_summary() -> Dict[str, Any]:
+    with _OUTBOX_LOCK:
+        pending = list(_outbox_load_locked().values())
+        stats = dict(_OUTBOX_STATS)
+    oldest = min([float(e.get("ts") or 0) for e in pending] or [0.0])
+    stats["pending"] = len(pending)
+    stats["oldest_pending_s"] = int(max(0.0, time.time() - oldest)) if oldest else 0
+    stats["file"] = str(ALERTS_OUTBOX)
+    return stats
+
+
+def _outbox_done(e: Dict[str, Any], ok: bool, msg: str) -> None:
+    latency_ms = int(max(0.0, time.time() - float(e.get("ts") or 0)) * 1000.0)
+    with _OUTBOX_LOCK:
+        _outbox_append({"op": "done", "id": e["id"], "ok": bool(ok), "ts": time.time(), "latency_ms": latency_ms, "msg": msg})
+        _outbox_load_locked().pop(e["id"], None)
+        _OUTBOX_STATS["delivered" if ok else "expired"] += 1
+        _OUTBOX_STATS["last_latency_ms"] = latency_ms
+        _OUTBOX_STATS["last_done_ts"] = int(time.time())
+        _outbox_compact_locked()
+
+
+def alerts_outbox_worker(stop_event: Optional[threading.Event] = None) -> None:
+    """
+    Drain the outbox strictly oldest-first; failed sends are retried with backoff, pending entries survive restarts.
+    An entry that failed (or is waiting for its retry) holds back everything younger, so a recovery or a
+    digest never reaches people before the incident message it follows.
+    """
+    while True:
+        if stop_event and stop_event.is_set():
+            return
+        wait_s = 30.0
+        try:
+            aenv = read_env_file(ALERTS_ENV_FILE)
+            with _OUTBOX_LOCK:
+                todo = sorted(_outbox_load_locked().values(), key=lambda x: float(x.get("ts") or 0))
+            now = time.time()
+            for e in todo:
+                if (now - float(e.get("ts") or 0)) > ALERTS_OUTBOX_MAX_AGE_S:
+                    _outbox_done(e, False, "超过 24 小时仍未发出，已放弃")
+                    _append_alert_log(f"告警放弃（超时）：{e.get('title')}")
+                    continue
+                if float(e.get("next_ts") or 0) > now:
+                    wait_s = min(wait_s, float(e["next_ts"]) - now)
+                    break
+                if not _alerts_any_channel_configured(aenv) or is_in_silence_window(aenv):
+                    break
+                ok, report = alerts_send_all(aenv, str(e.get("title") or ""), str(e.get("body") or ""), only=e.get("channels") or None)
+                _append_alert_log(("已发送" if ok else "发送失败") + "：\n" + report)
+                alerts_record_send(ok, report)
+                if ok:
+                    _outbox_done(e, True, report)
+                    continue
+                attempts = int(e.get("attempts") or 0) + 1
+                next_ts = time.time() + min(600.0, 15.0 * (2 ** (attempts - 1))) * random.uniform(0.8, 1.2)
+                with _OUTBOX_LOCK:
+                    _outbox_append({"op": "retry", "id": e["id"], "attempts": attempts, "next_ts": next_ts, "msg": report})
+                    cur = _outbox_load_locked().get(e["id"])
+                    if cur:
+                        cur["attempts"] = attempts
+                        cur["next_ts"] = next_ts
+                    _OUTBOX_STATS["retries"] += 1
+                wait_s = min(wait_s, next_ts - time.time())
+                break
+        except Exception as ex:
+            _append_alert_log("告警发送异常：" + humanize_error(str(ex)))
+        _OUTBOX_WAKE.wait(max(1.0, wait_s))
+        _OUTBOX_WAKE.clear()
+
+
+# Alerts are evaluated when something relevant changes (a probe flips ok/bad, a compose
+# container dies/restarts); the periodic run in alerts_worker is only a safety-net sweep.
+DOCKER_EVENT_ACTIONS = {"start", "die", "kill", "oom", "stop", "restart", "health_status"}
+_ALERTS_WAKE = threading.Event()
+_ALERTS_TRIGGER: Dict[str, Any] = {"reason": "", "ts": 0.0}
+
+
+def alerts_wake(reason: str) -> None:
+    if not _ALERTS_WAKE.is_set():
+        _ALERTS_TRIGGER["reason"] = str(reason or "")
+        _ALERTS_TRIGGER["ts"] = time.time()
+    _ALERTS_WAKE.set()
+
+
+def _alerts_on_probe(name: str, r: Dict[str, Any], prev: Optional[Dict[str, Any]]) -> None:
+    if prev is None or bool(prev.get("ok")) == bool(r.get("ok")):
+        return
+    names = alert_rule_probes()
+    relevant = set(names)
+    for n in names:
+        relevant.update(PROBES[n]["deps"])
+    if name in relevant:
+        alerts_wake(f"probe:{name}:{'ok' if r.get('ok') else 'bad'}")
+
+
+probe_subscribe(_alerts_on_probe)
+
+
+def docker_events_watcher(stop_event: Optional[threading.Event] = None) -> None:
+    """
+    Follow `docker events` for compose containers; a container dying or changing health
+    invalidates the container/API probes and wakes the alert evaluation immediately.
+    """
+    retry_s = 10.0
+    while True:
+        if stop_event and stop_event.is_set():
+            return
+        docker_bin = find_docker_bin()
+        if not docker_bin:
+            time.sleep(60)
+            continue
+        t0 = time.time()
+        try:
+            p = subprocess.Popen(
+                [
+                    str(docker_bin),
+                    "events",
+                    "--format",
+                    "{{json .}}",
+                    "--filter",
+                    "type=container",
+                    "--filter",
+                    "label=com.docker.compose.project",
+                ],
+                cwd=str(ROOT_DIR),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            )
+            for line in p.stdout or []:
+                if stop_event and stop_event.is_set():
+                    p.kill()
+                    return
+                try:
+                    ev = json.loads(line)
+                except Exception:
+                    continue
+                action = str(ev.get("Action") or ev.get("status") or "").split(":")[0].strip()
+                if action not in DOCKER_EVENT_ACTIONS:
+                    continue
+                svc = str(((ev.get("Actor") or {}).get("Attributes") or {}).get("com.docker.compose.service") or "")
+                probe_invalidate(["containers", "api_local", "port_backend_docker"])
+                status_invalidate(["docker", "api"])
+                alerts_wake(f"docker:{svc or '?'}:{action}")
+            p.wait()
+        except Exception:
+            pass
+        # Daemon not running / restarted: reconnect, backing off while it stays down.
+        retry_s = 10.0 if (time.time() - t0) > 60 else min(120.0, retry_s * 2)
+        time.sleep(retry_s)
 
 
 def alerts_worker(stop_event: Optional[threading.Event] = None) -> None:
@@ -2550,7 +5785,8 @@ def alerts_worker(stop_event: Optional[threading.Event] = None) -> None:
             interval_s = env_int(aenv, "ALERT_INTERVAL_S", 30, 10, 600)
 
             if not _alerts_enabled(aenv):
-                time.sleep(max(10, interval_s))
+                _ALERTS_WAKE.wait(max(10, interval_s))
+                _ALERTS_WAKE.clear()
                 continue
             if not _alerts_any_channel_configured(aenv):
                 _append_alert_log("告警已开启，但未配置渠道（alerts.env）")
@@ -2560,8 +5796,16 @@ def alerts_worker(stop_event: Optional[threading.Event] = None) -> None:
                 time.sleep(max(20, interval_s))
                 continue
 
+            # Clear before evaluating: a change that lands mid-evaluation triggers one more run.
+            _ALERTS_WAKE.clear()
+            t_eval = time.time()
             st = alerts_state()
+            alerts_digest_restore(st)
             summary = alerts_evaluate(aenv, st)
+            hyst = alerts_hysteresis(summary.get("issues") or [], st, aenv)
+            summary["issues"] = hyst["issues"]
+            summary["level"] = _alerts_level(hyst["issues"])
+            summary["signature"] = _alerts_signature(hyst["issues"])
             level = str(summary.get("level") or "ok")
             sig = str(summary.get("signature") or "")
 
@@ -2574,40 +5818,129 @@ def alerts_worker(stop_event: Optional[threading.Event] = None) -> None:
 
             now = int(time.time())
 
+            # transition id: bumped on every level/signature change; repeats of the same
+            # incident get their own sequence so they are not deduped away.
+            transition_id = int(st.get("transition_id") or 0)
+            repeat_seq = int(st.get("repeat_seq") or 0)
+            # What the last message told people (may lag level/signature while a digest is open).
+            notified_level = str(st.get("notified_level") or last_level)
+            notified_sig = str(st.get("notified_signature") if "notified_signature" in st else last_sig)
             should_send = False
             is_recovery = False
             if level != last_level:
+                transition_id += 1
+                repeat_seq = 0
                 if level == "ok":
                     is_recovery = True
                     should_send = bool(send_recovery)
                 else:
                     should_send = True
             elif level != "ok" and sig != last_sig:
+                transition_id += 1
+                repeat_seq = 0
                 should_send = True
-            elif level != "ok" and (now - last_sent_ts) >= repeat_s:
+            elif level != "ok" and (level, sig) == (notified_level, notified_sig) and (now - last_sent_ts) >= repeat_s:
+                repeat_seq += 1
                 should_send = True
 
-            if should_send:
-                title, body = alerts_message(summary, is_recovery=is_recovery)
-                ok, report = alerts_send_all(aenv, title, body)
-                st["last_sent_ts"] = now
-                st["last_send_ok"] = bool(ok)
-                st["last_send_msg"] = str(report or "")
-                _append_alert_log(("已发送" if ok else "发送失败") + "：\n" + report)
+            # Digest window: hold new transitions for a few seconds so a cascade becomes one message.
+            window_s = env_int(aenv, "ALERT_DIGEST_WINDOW_S", 15, 0, 600)
+            timeline = ""
+            if window_s > 0 and should_send and not repeat_seq:
+                prev_keys = set(filter(None, last_sig.split(",")))
+                cur_issues = {str(i.get("key")): i for i in summary["issues"]}
+                tracked0 = st.get("issues") if isinstance(st.get("issues"), dict) else {}
+                changes = [(k, str(cur_issues[k].get("title") or k), "down") for k in cur_issues if k not in prev_keys]
+                changes += [
+                    (k, str(((tracked0.get(k.split("~")[0]) or {}).get("last") or {}).get("title") or k), "up")
+                    for k in prev_keys - set(cur_issues)
+                ]
+                alerts_digest_add(changes, window_s)
+                should_send = False
+            if alerts_digest_due():
+                timeline = alerts_digest_take()
+                if level == notified_level and sig == notified_sig:
+                    _append_alert_log("聚合窗口内已恢复原状，未发送")
+                elif level == "ok":
+                    is_recovery = True
+                    should_send = bool(send_recovery)
+                else:
+                    should_send = True
 
-            st["last_level"] = level
-            st["last_signature"] = sig
-            _save_json(ALERTS_STATE_FILE, st)
+            if should_send:
+                # Never block the evaluation loop on delivery: the outbox sender takes it from here.
+                title, body = alerts_message(summary, is_recovery=is_recovery, timeline=timeline)
+                key = f"{sig}|{level}|{transition_id}"
+                if repeat_seq and alerts_outbox_pending_for(key):
+                    # This incident is still waiting in the outbox; don't stack reminders behind it.
+                    repeat_seq -= 1
+                elif alerts_outbox_enqueue(
+                    key + (f"|r{repeat_seq}" if repeat_seq else ""),
+                    title,
+                    body,
+                    is_recovery=is_recovery,
+                    channels=None if is_recovery else _alerts_channels_for(summary["issues"]),
+                ):
+                    _append_alert_log(f"已加入发送队列：{title}")
+                    notified_level, notified_sig = level, sig
+
+            # Optional daily summary (ALERT_DAILY_SUMMARY_AT=HH:MM).
+            alerts_daily_tick(st, level)
+            daily_at = parse_hhmm(str(aenv.get("ALERT_DAILY_SUMMARY_AT") or ""))
+            today = time.strftime("%Y-%m-%d")
+            lt = time.localtime()
+            # First run: start counting today, the first summary goes out tomorrow.
+            daily_sent = str(st.get("daily_sent_date") or today)
+            if daily_at is not None and daily_sent != today and (lt.tm_hour * 60 + lt.tm_min) >= daily_at:
+                d_title, d_body = alerts_daily_message(st, aenv)
+                alerts_outbox_enqueue(f"daily|{today}", d_title, d_body)
+                daily_sent = today
+                st["daily"] = {"since": int(time.time()), "last_ts": time.time(), "last_level": level}
+            daily = st.get("daily")
+
+            seen = st.get("seen") if isinstance(st.get("seen"), dict) else {}
+            tracked = st.get("issues") if isinstance(st.get("issues"), dict) else {}
+
+            def _upd(cur: Dict[str, Any]) -> None:
+                cur["seen"] = seen
+                cur["issues"] = tracked
+                cur["last_level"] = level
+                cur["last_signature"] = sig
+                cur["transition_id"] = transition_id
+                cur["repeat_seq"] = repeat_seq
+                cur["notified_level"] = notified_level
+                cur["notified_signature"] = notified_sig
+                cur["digest"] = alerts_digest_saved()
+                cur["daily"] = daily
+                cur["daily_sent_date"] = daily_sent
+
+            alerts_state_update(_upd)
+            _ALERTS_TRIGGER["transitional"] = bool(hyst["transitional"])
+            trig_ts = float(_ALERTS_TRIGGER.get("ts") or 0.0)
+            _ALERTS_TRIGGER["last_eval_ts"] = time.time()
+            _ALERTS_TRIGGER["last_eval_ms"] = int((time.time() - t_eval) * 1000.0)
+            # trigger -> verdict: how long it took from noticing a change to an evaluated alert state
+            _ALERTS_TRIGGER["detect_ms"] = int(max(0.0, time.time() - trig_ts) * 1000.0) if trig_ts > 0 else 0
         except Exception as e:
             _append_alert_log("告警守护异常：" + humanize_error(str(e)))
 
         # Re-read env each loop to make config changes take effect quickly.
         try:
             aenv2 = read_env_file(ALERTS_ENV_FILE)
-            sleep_s = env_int(aenv2, "ALERT_INTERVAL_S", 30, 10, 600)
+            sleep_s = env_int(aenv2, "ALERT_SWEEP_S", 120, 10, 3600)
+            if _ALERTS_TRIGGER.get("transitional"):
+                # An issue is waiting to trip/clear: recheck at alert cadence, not the slow sweep.
+                sleep_s = min(sleep_s, env_int(aenv2, "ALERT_INTERVAL_S", 30, 10, 600))
+            if _DIGEST["deadline"]:
+                sleep_s = max(1, min(sleep_s, int(float(_DIGEST["deadline"]) - time.time()) + 1))
         except Exception:
-            sleep_s = 30
-        time.sleep(int(sleep_s))
+            sleep_s = 120
+        # Safety-net sweep; probe changes / docker events wake us earlier.
+        if _ALERTS_WAKE.wait(int(sleep_s)):
+            time.sleep(0.3)  # let a burst of related changes settle into one evaluation
+        else:
+            _ALERTS_TRIGGER["reason"] = "sweep"
+            _ALERTS_TRIGGER["ts"] = time.time()
 
 
 def alerts_config_payload() -> Dict[str, Any]:
@@ -3162,10 +6495,16 @@ INDEX_HTML = """<!doctype html>
 	      let lastCardId = '';
         let refreshInFlight = false;
         const LS_STATUS_KEY = 'naibao_ops_last_status_v1';
+        const CORE_SECTIONS = 'docker,api,frontend,tunnel,alerts,mobile_preview';
+        const SLOW_SECTIONS = 'host,dns,git,startup';
+        const SLOW_SECTIONS_EVERY_MS = 60000;
+        let lastStatus = null;
+        let lastSlowFetch = 0;
 
       const ACTION_LABELS = {
         docker_up: '启动/修复全部',
         docker_restart_all: '重启全部',
+        backend_rolling_restart: '滚动重启后端',
         docker_down: '停止全部',
         set_backend_port: '设置后端端口',
         tunnel_start: '启动外网通道',
@@ -3195,6 +6534,7 @@ INDEX_HTML = """<!doctype html>
             {type:'refresh', label:'刷新'},
             {type:'toggle', label:'只看需处理：' + (issuesOnly ? '开' : '关'), key:'issuesOnly'},
             {type:'toggle', label:'自动刷新：' + (auto ? '开' : '关'), key:'auto'},
+            {type:'api', label:'强制重新构建后端', action:'docker_up', service:'rebuild', confirm:'一键修复在后端代码没变时会跳过构建。确认要强制重新构建后端镜像？'},
             {type:'api', label:'停止全部服务', action:'docker_down', kind:'danger', confirm:'确认停止全部服务？停止后外网/本机 API 都将不可用。'},
             {type:'api', label:'关闭运营台', action:'ops_shutdown', kind:'danger', confirm:'确认关闭运营台？关闭后将无法打开本页。'},
           ]
@@ -3205,6 +6545,7 @@ INDEX_HTML = """<!doctype html>
         const a = String(action || '').trim();
         const s = String(service || '').trim();
         if(a === 'docker_restart' && s){ return '重启' + prettySvcName(s); }
+        if(a === 'docker_up' && s === 'rebuild'){ return '重新构建后端'; }
         if(a === 'docker_stop_container' && s){ return '停止：' + prettyContainerName(s); }
         if(ACTION_LABELS[a]){ return ACTION_LABELS[a]; }
         return a || '操作';
@@ -3686,6 +7027,8 @@ INDEX_HTML = """<!doctype html>
         });
 
         const tunnelAlive = !!(data && data.tunnel && data.tunnel.alive);
+        // connected: true/false from cloudflared /ready; null when unknown (older connector without metrics).
+        const tunnelDisconnected = tunnelAlive && data.tunnel.connected === false;
         const tunMode = (data && data.tunnel && data.tunnel.mode) ? String(data.tunnel.mode) : '-';
         const tunHost = (data && data.tunnel && data.tunnel.hostname) ? String(data.tunnel.hostname) : '';
         const tunUrl = (data && data.tunnel && data.tunnel.url) ? String(data.tunnel.url) : '';
@@ -3732,8 +7075,8 @@ INDEX_HTML = """<!doctype html>
           group:'setup',
           order:50,
           title:'5. 外网通道',
-          status: tunnelAlive ? 'ok' : 'bad',
-          value: tunnelAlive ? '运行中' : '未运行',
+          status: tunnelAlive ? (tunnelDisconnected ? 'warn' : 'ok') : 'bad',
+          value: tunnelAlive ? (tunnelDisconnected ? '运行中（未连上 Cloudflare）' : '运行中') : '未运行',
           sub: `${tunModeZh} · ${tunWhere} · 配置${tunCfgZh}`,
           actions: [tunTodo]
         });
@@ -4438,6 +7781,9 @@ INDEX_HTML = """<!doctype html>
             acts.push({type:'api', label:'修复全部', action:'docker_up'});
           }else{
             acts.push({type:'api', label:'重启', action:'docker_restart', service:name});
+            if(name === 'backend'){
+              acts.push({type:'api', label:'滚动重启', action:'backend_rolling_restart', confirm:'先在备用端口起一个临时后端接住外网流量，再重启正式后端，外网基本不中断（约 1-3 分钟）。继续？'});
+            }
           }
           acts.push({type:'log', label:'日志', target:'docker', service:name});
           const meta = SVC_META[name] || {title:('服务 · ' + name), order:30};
@@ -4540,8 +7886,39 @@ INDEX_HTML = """<!doctype html>
             sub: (data && data.host && data.host.platform) ? String(data.host.platform) : '',
             actions: []
           });
-        }else{
-          cards.push({id:'uptime', group:'host', order:40, title:'主机运行', status:'warn', value:'—', sub:(up && up.msg) ? up.msg : '', actions:[]});
+        }else{
+          cards.push({id:'uptime', group:'host', order:40, title:'主机运行', status:'warn', value:'—', sub:(up && up.msg) ? up.msg : '', actions:[]});
+        }
+
+        const startup = data && data.startup;
+        const sv = (startup && startup.services) ? startup.services : {};
+        const svNames = ['db','redis','backend'].filter(k => sv[k]);
+        if(svNames.length){
+          const slow = svNames.filter(k => sv[k].regressed);
+          const fmtS = v => (v === null || v === undefined) ? '—' : (Number(v).toFixed(1) + 's');
+          const lines = [];
+          (startup.recent || []).forEach(r => {
+            const when = r.ts ? new Date(Number(r.ts) * 1000).toLocaleString() : '';
+            const parts = Object.keys(r.services || {}).filter(k => r.services[k] && r.services[k].restarted)
+              .map(k => `${prettySvcName(k)} ${fmtS(r.services[k].total_s)}（启动 ${fmtS(r.services[k].start_s)} + 就绪 ${fmtS(r.services[k].ready_s)}）`);
+            lines.push(`${when}  ${actionLabel(String(r.op || '').split(':')[0], String(r.op || '').split(':')[1] || '')}\n  ` + parts.join('\n  '));
+          });
+          const trend = svNames.map(k => `${prettySvcName(k)}：${(sv[k].trend || []).map(fmtS).join(' → ')}`);
+          cards.push({
+            id:'startup',
+            group:'host',
+            order:45,
+            title:'启动性能',
+            status: slow.length ? 'warn' : 'ok',
+            value: svNames.map(k => `${prettySvcName(k)} ${fmtS(sv[k].latest_s)}`).join(' · '),
+            sub: slow.length
+              ? ('比平时慢：' + slow.map(k => `${prettySvcName(k)}（平时约 ${fmtS(sv[k].median_s)}）`).join('、'))
+              : ('最近一次：' + (startup.last_ts ? new Date(Number(startup.last_ts) * 1000).toLocaleString() : '—')),
+            actions: [
+              {type:'guide', label:'查看最近记录', title:'启动性能（从开始操作到服务就绪）', text: ['趋势（旧 → 新）：', ...trend, '', '最近记录：', ...lines].join('\n')},
+              {type:'log', label:'数据库日志', target:'docker', service:'db'},
+            ]
+          });
         }
 
         const commit = (data && data.git && data.git.commit) ? String(data.git.commit) : '';
@@ -4785,7 +8162,10 @@ INDEX_HTML = """<!doctype html>
             headers:{'Content-Type':'application/json'},
             body: JSON.stringify({action, service})
           });
-          const data = await r.json();
+          let data = await r.json();
+          if(data && data.pending && data.job){
+            data = await followJob(data.job, lbl, !!data.attached);
+          }
           const ok = !!(data && data.ok);
           const msg = String((data && data.message) || '').trim();
           const detail = String((data && data.detail) || '').trim();
@@ -4805,9 +8185,44 @@ INDEX_HTML = """<!doctype html>
           setAuto(false);
           return;
         }
+        lastSlowFetch = 0;
         await refresh();
       }
 
+      async function followJob(jobId, lbl, attached){
+        // 慢操作在后台执行：弹窗里滚动显示进度，完成后返回与 /api/action 相同结构的结果
+        toast((attached ? '已在执行，接上进度：' : '已开始：') + lbl, 'ok');
+        const progTitle = '进行中：' + lbl;
+        openText(progTitle, '正在后台执行…（关闭窗口不影响执行，完成后会弹出结果）');
+        let since = 0;
+        let out = '';
+        while(true){
+          await new Promise(res => setTimeout(res, 1000));
+          let j = null;
+          try{
+            const r = await fetch('/api/jobs/' + encodeURIComponent(jobId) + '?since=' + since, {cache:'no-store'});
+            j = await r.json();
+          }catch(e){
+            continue;
+          }
+          if(!j || !j.id){
+            return {ok:false, message: String((j && j.msg) || '任务已丢失（运营台可能已重启）'), detail:''};
+          }
+          since = Number(j.next || since);
+          if(j.output){ out = (out ? out + '\n' : '') + j.output; }
+          if(j.state === 'done'){ return j; }
+          const modal = document.getElementById('modal');
+          if(modal.style.display !== 'none' && document.getElementById('modalTitle').textContent === progTitle){
+            const head = j.state === 'queued'
+              ? `排队中（前面还有 ${Math.max(0, Number(j.position || 1) - 1)} 个任务）`
+              : `执行中，已用时 ${Math.round(Number(j.elapsed_ms || 0) / 1000)} 秒`;
+            openText(progTitle, head + '\n\n' + out);
+            const pre = document.querySelector('#modalBody pre');
+            if(pre){ pre.scrollTop = pre.scrollHeight; }
+          }
+        }
+      }
+
       function openResult(titleText, msgText, detailText){
         const modal = document.getElementById('modal');
         const title = document.getElementById('modalTitle');
@@ -5586,135 +9001,1357 @@ INDEX_HTML = """<!doctype html>
         }
       }
 
+      async function fetchStatus(sections, signal){
+        const r = await fetch('/api/status?sections=' + encodeURIComponent(sections), {cache:'no-store', signal});
+        return await r.json();
+      }
+
+      function applyStatus(data){
+        // Only persist a usable snapshot. (When status is still warming up, server returns a placeholder.)
+        try{ localStorage.setItem(LS_STATUS_KEY, JSON.stringify(data)); }catch(e){}
+        const cards = buildCards(data);
+        updateOverall(cards);
+        lastPreparedCards = prepareCards(cards);
+        render(lastPreparedCards);
+        updateFoot(data);
+      }
+
       async function refresh(){
         if(refreshInFlight){ return; }
         refreshInFlight = true;
         const ctrl = new AbortController();
         const to = setTimeout(() => ctrl.abort(), 8000);
         try{
-          const r = await fetch('/api/status', {cache:'no-store', signal: ctrl.signal});
-          const data = await r.json();
+          // Cards load progressively: core sections every tick, slow ones (git/dns/host) less often.
+          const core = await fetchStatus(CORE_SECTIONS, ctrl.signal);
+          const meta = (core && core._meta) ? core._meta : null;
+          if(meta && meta.has_data === false){
+            showLoading(meta);
+            return;
+          }
+          lastStatus = Object.assign({}, lastStatus || {}, core);
+          applyStatus(lastStatus);
+
+          if(Date.now() - lastSlowFetch >= SLOW_SECTIONS_EVERY_MS){
+            const slow = await fetchStatus(SLOW_SECTIONS, ctrl.signal);
+            if(slow && slow._meta && slow._meta.has_data){
+              lastSlowFetch = Date.now();
+              lastStatus = Object.assign({}, lastStatus, slow, {ts: core.ts, _meta: core._meta});
+              applyStatus(lastStatus);
+            }
+          }
+        }catch(e){
+          const isAbort = !!(e && e.name === 'AbortError');
+          const msg = isAbort ? '加载超时（请稍后重试）' : ('加载失败：' + (e && e.message ? e.message : String(e)));
+          toast(isAbort ? '加载超时' : '加载失败', 'bad');
+          if(!lastPreparedCards || lastPreparedCards.length === 0){
+            showError(msg);
+          }
+        }finally{
+          clearTimeout(to);
+          refreshInFlight = false;
+        }
+      }
+
+      // Hidden tabs stop polling so the console can drop to alert-only probing.
+      document.addEventListener('visibilitychange', () => {
+        if(document.hidden){
+          if(timer){ clearInterval(timer); timer = null; }
+        }else if(auto){
+          setAuto(true);
+          refresh();
+        }
+      });
+
+      // Instant render with last snapshot, then refresh in background.
+      tryRenderCached();
+      setAuto(true);
+      refresh();
+    </script>
+  </body>
+</html>
+"""
+
+
+def pretty_svc_name(svc: str) -> str:
+    s = (svc or "").strip()
+    if not s:
+        return ""
+    m = {
+        "backend": "后端(API)",
+        "db": "数据库",
+        "redis": "缓存(Redis)",
+    }
+    return m.get(s, s)
+
+
+def normalize_action_result(action: str, service: str, ok: bool, message: str, detail: str) -> Tuple[bool, str, str]:
+    """
+    Make action responses "product-like":
+    - message: short, clear, user-facing (shown immediately)
+    - detail: long, raw output (hidden behind details, copyable)
+    """
+    a = (action or "").strip()
+    svc = (service or "").strip()
+
+    msg_raw = (message or "").strip()
+    det_raw = (detail or "").strip()
+
+    # Always keep raw detail for debugging/copying (capped; the full output is in the job progress).
+    det = cap_output(det_raw or msg_raw)
+
+    if not ok:
+        short = humanize_error(msg_raw)
+        if not short or (short == msg_raw and (len(msg_raw) > 240 or "\n" in msg_raw)):
+            short = "操作失败（请展开详情查看原因）"
+        return False, short, det
+
+    # OK messages: prefer explicit labels per action.
+    if a == "docker_up":
+        port = ""
+        m = re.search(r"已自动选择可用端口：(\d+)", det)
+        if m:
+            port = m.group(1)
+        m2 = re.search(r"就绪用时 ([\d.]+) 秒", det)
+        extra = [
+            x
+            for x in [
+                f"端口 {port}" if port else "",
+                "代码未变，已跳过构建" if "跳过构建" in det else "",
+                f"就绪用时 {m2.group(1)} 秒" if m2 else "",
+            ]
+            if x
+        ]
+        return True, ("已启动/修复完成" + (f"（{'，'.join(extra)}）" if extra else "")), det
+    if a == "docker_down":
+        return True, "已停止全部服务", det
+    if a == "docker_restart_all":
+        return True, "已重启全部服务", det
+    if a == "docker_restart":
+        return True, ("已重启" + (pretty_svc_name(svc) or "服务")), det
+    if a == "backend_rolling_restart":
+        return True, (msg_raw or "后端已滚动重启"), det
+    if a == "docker_prune":
+        return True, "已清理 Docker 缓存", det
+    if a == "docker_stop_container":
+        return True, ("已停止占用容器" + (f"：{svc}" if svc else "")), det
+
+    if a == "mobile_preview_start":
+        return True, "手机外网验收已启动", det
+    if a == "mobile_preview_stop":
+        return True, "手机外网验收已停止", det
+    if a == "mobile_preview_restart":
+        return True, "手机外网验收已重启", det
+
+    if a in ("tunnel_start", "tunnel_restart"):
+        done = "外网通道已启动" if a == "tunnel_start" else "外网通道已重启"
+        m = re.search(r"就绪用时 ([\d.]+) 秒", det)
+        if m:
+            return True, f"{done}（就绪用时 {m.group(1)} 秒）", det
+        if "还没连上" in det:
+            return True, f"{done}，但还没连上 Cloudflare（稍后刷新查看）", det
+        return True, done, det
+    if a == "tunnel_stop":
+        return True, "外网通道已停止", det
+    if a == "named_tunnel_init":
+        # message already human-friendly (browser login etc)
+        return True, (msg_raw or "固定外网初始化已开始"), det
+
+    if a == "open_docker":
+        return True, (msg_raw or "已打开 Docker"), det
+    if a == "set_backend_port":
+        return True, (msg_raw or "已生效"), det
+
+    if a.startswith("git_"):
+        return True, (msg_raw or "已推送到 GitHub"), det
+
+    # fallback: use raw if it's short; otherwise show a generic completion.
+    if msg_raw and len(msg_raw) <= 80 and "\n" not in msg_raw:
+        return True, msg_raw, det
+    return True, "操作已完成", det
+
+
+def run_action(action: str, service: str) -> Tuple[bool, str, str]:
+    """Run one /api/action operation to completion; returns the normalized (ok, message, detail)."""
+    ensure_home_env_file()
+    env = read_env_file(HOME_ENV_FILE)
+
+    res: Any
+    if action == "docker_up":
+        res = docker_up(force_build=(service == "rebuild"))
+    elif action == "docker_down":
+        res = docker_down()
+    elif action == "docker_restart":
+        res = docker_restart(service)
+    elif action == "docker_restart_all":
+        res = docker_restart_all()
+    elif action == "backend_rolling_restart":
+        res = backend_rolling_restart(env)
+    elif action == "docker_prune":
+        res = docker_prune()
+    elif action == "docker_stop_container":
+        res = docker_stop_container(service)
+    elif action == "mobile_preview_start":
+        res = mobile_preview_start()
+    elif action == "mobile_preview_stop":
+        res = mobile_preview_stop()
+    elif action == "mobile_preview_restart":
+        ok1, out1 = mobile_preview_stop()
+        ok2, out2 = mobile_preview_start()
+        res = (bool(ok1 and ok2), (out1 + "\n\n" + out2).strip())
+    elif action == "tunnel_start":
+        res = start_tunnel(env)
+    elif action == "tunnel_restart":
+        ok1, out1 = stop_tunnel()
+        ok2, out2 = start_tunnel(env)
+        res = (bool(ok1 and ok2), (out1 + "\n\n" + out2).strip())
+    elif action == "tunnel_stop":
+        res = stop_tunnel()
+    elif action == "named_tunnel_init":
+        res = named_tunnel_init()
+    elif action == "git_publish_workflow":
+        res = git_publish([".github/workflows/pages.yml"], service, kind="workflow")
+    elif action == "git_publish_frontend":
+        res = git_publish(
+            [
+                "frontend/src",
+                "frontend/index.html",
+                "frontend/package.json",
+                "frontend/package-lock.json",
+                "frontend/vite.config.js",
+                "frontend/.npmrc",
+                ".github/workflows/pages.yml",
+            ],
+            service,
+            kind="frontend",
+        )
+    elif action == "alerts_open_config":
+        ensure_alerts_env_file()
+        res = open_text_file(ALERTS_ENV_FILE)
+    elif action == "alerts_enable":
+        ensure_alerts_env_file()
+        changed = set_env_kv(ALERTS_ENV_FILE, "ALERT_ENABLED", "1")
+        res = (True, "告警已开启" if changed else "告警已开启（无需修改）")
+    elif action == "alerts_disable":
+        ensure_alerts_env_file()
+        changed = set_env_kv(ALERTS_ENV_FILE, "ALERT_ENABLED", "0")
+        res = (True, "告警已关闭" if changed else "告警已关闭（无需修改）")
+    elif action == "alerts_test":
+        ensure_alerts_env_file()
+        aenv = read_env_file(ALERTS_ENV_FILE)
+        # Build a friendly test message, not tied to current health.
+        env2 = read_env_file(HOME_ENV_FILE) if HOME_ENV_FILE.exists() else {}
+        public_domain = (env2.get("NB_PUBLIC_DOMAIN") or "naibao.me").strip()
+        api_public = (env2.get("NB_TUNNEL_HOSTNAME") or "api.naibao.me").strip()
+        title = "奶宝：告警测试"
+        body = "\n".join(
+            [
+                f"时间：{time.strftime('%Y-%m-%d %H:%M')}",
+                "说明：这是一条测试消息，用于确认告警渠道可用。",
+                "",
+                f"前端：https://{public_domain}",
+                f"API：https://{api_public}/api/health",
+            ]
+        ).strip()
+        ok, report = alerts_send_all(aenv, title, body)
+        alerts_record_send(ok, report)
+        detail = "\n".join(
+            [
+                "== 发送结果 ==",
+                report or "",
+                "",
+                "== 消息内容 ==",
+                title,
+                "",
+                body,
+            ]
+        ).strip()
+        msg = "已发送测试消息" if ok else (report or "测试发送失败")
+        res = (bool(ok), msg, detail)
+    elif action == "open_docker":
+        res = open_docker_desktop()
+    elif action == "set_backend_port":
+        res = set_backend_host_port(service)
+    else:
+        res = (False, f"未知操作：{action}", f"未知操作：{action}")
+
+    ok = False
+    message = ""
+    detail = ""
+    if isinstance(res, tuple):
+        if len(res) == 3:
+            ok, message, detail = bool(res[0]), str(res[1] or ""), str(res[2] or "")
+        elif len(res) == 2:
+            ok, message = bool(res[0]), str(res[1] or "")
+            detail = message
+        else:
+            ok, message, detail = False, "操作失败（返回格式异常）", str(res)
+    else:
+        ok, message, detail = False, "操作失败（返回值异常）", str(res)
+
+    ok, message, detail = normalize_action_result(action, service, ok, message, detail)
+    status_invalidate()
+    return ok, message, detail
+
+
+# ---------------------------------------------------------------------------
+# 后台任务
+#
+# 构建镜像、推送代码这类操作动辄几分钟：/api/action 只负责提交任务，短操作在同一个请求里
+# 直接返回结果；超过 JOB_INLINE_WAIT_S 仍未完成的，返回任务编号，页面再通过 /api/jobs/<id>
+# 查看进度与结果，慢操作不再占着一个 HTTP 连接直到超时。
+# 开关告警、停止通道这类秒级操作走单独的 fast 通道，不会排在构建/推送后面。
+# ---------------------------------------------------------------------------
+
+# Worker threads per lane; actions in JOB_FAST_ACTIONS use "fast", everything else "slow".
+# Only actions that finish in about a second belong here: the fast lane has one slot, so a
+# network call (alerts_test waits on every webhook, up to ~15s) would hold up tunnel_stop.
+JOB_LANES: Dict[str, int] = {"slow": 2, "fast": 1}
+JOB_FAST_ACTIONS = {
+    "alerts_enable",
+    "alerts_disable",
+    "alerts_open_config",
+    "tunnel_stop",
+    "mobile_preview_stop",
+    "docker_stop_container",
+    "open_docker",
+    "set_backend_port",
+}
+JOB_KEEP = 50
+JOB_OUTPUT_MAX_LINES = 2000
+JOB_OUTPUT_MAX_BYTES = 512 * 1024
+JOB_LINE_MAX_CHARS = 2000
+JOB_STREAM_MAX_S = 900  # one /api/jobs/<id>/events stream; EventSource reconnects with Last-Event-ID
+JOB_INLINE_WAIT_S = 1.5
+
+_JOBS_LOCK = threading.Lock()
+_JOBS: Dict[str, Dict[str, Any]] = {}
+_JOB_QUEUES: Dict[str, List[Dict[str, Any]]] = {lane: [] for lane in JOB_LANES}
+_JOB_QUEUE_COND = threading.Condition(_JOBS_LOCK)
+_JOB_WORKERS: Dict[str, List[threading.Thread]] = {lane: [] for lane in JOB_LANES}
+
+# Actions that touch the same resource never run together: an identical in-flight action is
+# attached to (no second build), a different one on a busy resource is rejected with the reason.
+ACTION_RESOURCES: Dict[str, List[str]] = {
+    "docker_up": ["compose"],
+    "docker_down": ["compose"],
+    "docker_restart": ["compose"],
+    "docker_restart_all": ["compose"],
+    "backend_rolling_restart": ["compose", "tunnel"],
+    "docker_prune": ["compose"],
+    "docker_stop_container": ["compose"],
+    "set_backend_port": ["compose"],
+    "tunnel_start": ["tunnel"],
+    "tunnel_restart": ["tunnel"],
+    "tunnel_stop": ["tunnel"],
+    "named_tunnel_init": ["tunnel"],
+    "mobile_preview_start": ["mobile_preview"],
+    "mobile_preview_stop": ["mobile_preview"],
+    "mobile_preview_restart": ["mobile_preview"],
+    "git_publish_workflow": ["git"],
+    "git_publish_frontend": ["git"],
+}
+RESOURCE_LABELS = {"compose": "Docker 服务", "tunnel": "外网通道", "mobile_preview": "手机外网验收", "git": "Git 推送"}
+_RESOURCE_LOCKS: Dict[str, threading.Lock] = {r: threading.Lock() for r in RESOURCE_LABELS}
+
+
+def job_log(line: str) -> None:
+    """Append progress output to the job running on this thread (no-op outside a job)."""
+    job = getattr(_JOB_LOCAL, "job", None)
+    if job is None:
+        return
+    with _JOBS_LOCK:
+        out = job["out"]
+        for ln in str(line or "").splitlines() or [""]:
+            if len(ln) > JOB_LINE_MAX_CHARS:
+                ln = ln[:JOB_LINE_MAX_CHARS] + "…"
+            out.append(ln)
+            job["out_bytes"] += len(ln) + 1
+        # Ring buffer: drop the oldest lines past either cap; offsets keep counting from the job start.
+        drop = 0
+        while len(out) - drop > JOB_OUTPUT_MAX_LINES or (job["out_bytes"] > JOB_OUTPUT_MAX_BYTES and len(out) - drop > 1):
+            job["out_bytes"] -= len(out[drop]) + 1
+            drop += 1
+        if drop:
+            del out[:drop]
+            job["out_base"] += drop
+        job["changed"].notify_all()
+
+
+def _job_run(job: Dict[str, Any]) -> None:
+    _JOB_LOCAL.job = job
+    with _JOBS_LOCK:
+        job["state"] = "running"
+        job["started_ts"] = time.time()
+    job_log(f"[{time.strftime('%H:%M:%S')}] 开始：{job['action']}" + (f"（{job['service']}）" if job["service"] else ""))
+    # Sorted, so two jobs can never hold one lock each and wait for the other.
+    locks = [_RESOURCE_LOCKS[r] for r in sorted(job["resources"])]
+    for lk in locks:
+        lk.acquire()
+    try:
+        ok, message, detail = run_action(job["action"], job["service"])
+    except Exception as e:
+        ok, message, detail = False, humanize_error(str(e)), str(e)
+    finally:
+        for lk in reversed(locks):
+            lk.release()
+        _JOB_LOCAL.job = None
+    with _JOBS_LOCK:
+        job.update(state="done", ok=bool(ok), message=str(message or ""), detail=str(detail or ""), finished_ts=time.time())
+        job["out"].append(f"[{time.strftime('%H:%M:%S')}] " + ("完成" if ok else "失败") + f"：{message}")
+        job["changed"].notify_all()
+    job["done"].set()
+
+
+def _job_worker(lane: str) -> None:
+    queue = _JOB_QUEUES[lane]
+    while True:
+        with _JOB_QUEUE_COND:
+            while not queue:
+                _JOB_QUEUE_COND.wait()
+            job = queue.pop(0)
+        _job_run(job)
+
+
+def job_submit(action: str, service: str = "") -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Queue an action on its lane's bounded worker pool (JOB_LANES threads per lane).
+    Returns (job, "") for a new job, (job, "attached") when the same action is already in flight,
+    and (None, reason) when another action holds one of its resources.
+    """
+    now = time.time()
+    resources = list(ACTION_RESOURCES.get(action) or [])
+    lane = "fast" if action in JOB_FAST_ACTIONS else "slow"
+    job: Dict[str, Any] = {
+        "id": secrets.token_hex(6),
+        "action": action,
+        "service": service,
+        "resources": resources,
+        "lane": lane,
+        "state": "queued",
+        "ok": False,
+        "message": "",
+        "detail": "",
+        "created_ts": now,
+        "started_ts": 0.0,
+        "finished_ts": 0.0,
+        "out": [],
+        "out_base": 0,
+        "out_bytes": 0,
+        "changed": threading.Condition(_JOBS_LOCK),
+        "done": threading.Event(),
+    }
+    with _JOB_QUEUE_COND:
+        for other in _JOBS.values():
+            if other["state"] == "done":
+                continue
+            if other["action"] == action and other["service"] == service:
+                return other, "attached"
+            busy = [r for r in resources if r in other["resources"]]
+            if busy:
+                what = other["action"] + (f"（{other['service']}）" if other["service"] else "")
+                return None, f"{RESOURCE_LABELS.get(busy[0], busy[0])}正在执行其他操作：{what}，请等它完成后再试"
+        _JOBS[job["id"]] = job
+        finished = sorted((j for j in _JOBS.values() if j["state"] == "done"), key=lambda j: j["finished_ts"])
+        for old in finished[: max(0, len(finished) - JOB_KEEP)]:
+            _JOBS.pop(old["id"], None)
+        _JOB_QUEUES[lane].append(job)
+        # One condition for both lanes: wake everyone, the other lane's workers go back to waiting.
+        _JOB_QUEUE_COND.notify_all()
+        workers = _JOB_WORKERS[lane]
+        if len(workers) < JOB_LANES[lane]:
+            t = threading.Thread(target=_job_worker, args=(lane,), name=f"job-{lane}-{len(workers) + 1}", daemon=True)
+            workers.append(t)
+            t.start()
+    return job, ""
+
+
+def job_view(job: Dict[str, Any], since: int = 0) -> Dict[str, Any]:
+    """
+    Public view of a job. `output` holds the lines from offset `since` on (offsets count from the
+    start of the job, even after old lines were dropped); poll again with since=next.
+    """
+    with _JOBS_LOCK:
+        now = time.time()
+        base = int(job["out_base"])
+        start = max(0, int(since) - base)
+        lines = list(job["out"][start:])
+        queued = job["state"] == "queued"
+        return {
+            "id": job["id"],
+            "action": job["action"],
+            "service": job["service"],
+            "resources": list(job["resources"]),
+            "lane": job["lane"],
+            "state": job["state"],
+            "ok": bool(job["ok"]),
+            "message": job["message"],
+            "detail": job["detail"],
+            "created_ts": int(job["created_ts"]),
+            "elapsed_ms": int(((job["finished_ts"] or now) - (job["started_ts"] or now)) * 1000) if not queued else 0,
+            "position": next((i + 1 for i, j in enumerate(_JOB_QUEUES[job["lane"]]) if j is job), 0) if queued else 0,
+            "output": "\n".join(lines),
+            "truncated": int(since) < base,
+            "next": base + len(job["out"]),
+        }
+
+
+def job_wait_output(job: Dict[str, Any], since: int, timeout_s: float) -> None:
+    """Block until the job has output past offset `since`, finishes, or timeout_s passes."""
+    with _JOBS_LOCK:
+        if job["state"] != "done" and int(job["out_base"]) + len(job["out"]) <= int(since):
+            job["changed"].wait(timeout_s)
+
+
+def job_get(job_id: str) -> Optional[Dict[str, Any]]:
+    with _JOBS_LOCK:
+        return _JOBS.get(str(job_id or ""))
+
+
+def jobs_summary() -> List[Dict[str, Any]]:
+    with _JOBS_LOCK:
+        jobs = sorted(_JOBS.values(), key=lambda j: j["created_ts"], reverse=True)
+    return [{k: v for k, v in job_view(j, since=1 << 30).items() if k not in ("output", "detail")} for j in jobs]
+
+
+# ---------------------------------------------------------------------------
+# 探测子进程（可选）
+#
+# 开启后（--probe-worker 或 deploy/.env.home 里 NB_OPS_PROBE_WORKER=1），探测、状态分区计算和
+# 告警守护都放到一个独立子进程里跑，解析 docker ps 的 JSON、Git 摘要的正则这类突发开销不再和
+# 网页请求抢同一个 GIL。子进程把每一版状态预先序列化好写进一块 mmap 文件，网页请求只读这块
+# 内存、按需拼接字节，不加锁也不再做 JSON 解析；哪些分区有人在看、哪些需要失效，反向写在一个
+# 小 JSON 文件里。任何一边挂了都单独重启，不影响另一边。
+#
+# Region layout: a 64-byte header, then two equal data slots. The writer fills the slot that is
+# not being served, then bumps seq to odd, rewrites slot/length/crc, and bumps seq to even again
+# (a seqlock). Readers retry while seq is odd or changed under them, and drop data whose crc32
+# doesn't match, so a torn read is never served.
+PROBE_SNAPSHOT_BYTES = 8 * 1024 * 1024
+PROBE_WORKER_TICK_S = 0.25
+PROBE_WORKER_HEARTBEAT_S = 1.0
+# No heartbeat for this long: the console kills the worker and starts a new one.
+PROBE_WORKER_STALL_S = 30.0
+# No demand heartbeat from the console for this long: the worker exits on its own.
+PROBE_WORKER_ORPHAN_S = 60.0
+PROBE_DEMAND_HEARTBEAT_S = 5.0
+# A restarted worker keeps the previous snapshot on screen until its core sections are ready (at most this long).
+PROBE_WORKER_WARMUP_S = 5.0
+PROBE_WORKER_BACKOFF_MAX_S = 30.0
+PROBE_WORKER_LOG_MAX_BYTES = 1024 * 1024
+
+_SNAP_MAGIC = b"NBSNAP01"
+_SNAP_HDR = struct.Struct("<8sQIIIIdd")  # magic, seq, slot, length, crc32, pid, published_ts, heartbeat_ts
+_SNAP_HDR_AREA = 64
+_SNAP_SEQ_OFF = 8
+_SNAP_HB_OFF = 40
+
+
+class ProbeSnapshotRegion:
+    """The mmap'ed snapshot file: one writer (the probe worker), any number of lock-free readers."""
+
+    def __init__(self, path: Path, writer: bool = False, size: int = PROBE_SNAPSHOT_BYTES) -> None:
+        if writer:
+            ensure_runtime_dir()
+            with open(path, "a+b") as f:
+                if os.fstat(f.fileno()).st_size < int(size):
+                    f.truncate(int(size))
+        fd = os.open(str(path), os.O_RDWR if writer else os.O_RDONLY)
+        try:
+            st = os.fstat(fd)
+            self.ino = int(st.st_ino)
+            self.mm = mmap.mmap(fd, int(st.st_size), access=mmap.ACCESS_WRITE if writer else mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        self.slot_size = (len(self.mm) - _SNAP_HDR_AREA) // 2
+        self._last: Tuple[int, bytes] = (0, b"")
+
+    def header(self) -> Tuple[Any, ...]:
+        return _SNAP_HDR.unpack_from(self.mm, 0)
+
+    def heartbeat(self) -> Tuple[int, float]:
+        """(worker pid, last heartbeat ts); (0, 0.0) before the first publish."""
+        magic, _, _, _, _, pid, _, hb_ts = self.header()
+        return (int(pid), float(hb_ts)) if magic == _SNAP_MAGIC else (0, 0.0)
+
+    def publish(self, blob: bytes) -> bool:
+        if len(blob) > self.slot_size:
+            return False
+        magic, seq, slot, _, _, _, _, _ = self.header()
+        if magic != _SNAP_MAGIC or slot not in (0, 1):
+            seq, slot = 0, 1
+        seq += seq % 2  # a previous writer died mid-publish
+        nslot = 1 - int(slot)
+        off = _SNAP_HDR_AREA + nslot * self.slot_size
+        self.mm[off : off + len(blob)] = blob
+        now = time.time()
+        struct.pack_into("<Q", self.mm, _SNAP_SEQ_OFF, seq + 1)
+        _SNAP_HDR.pack_into(self.mm, 0, _SNAP_MAGIC, seq + 1, nslot, len(blob), zlib.crc32(blob), os.getpid(), now, now)
+        struct.pack_into("<Q", self.mm, _SNAP_SEQ_OFF, seq + 2)
+        return True
+
+    def beat(self) -> None:
+        struct.pack_into("<d", self.mm, _SNAP_HB_OFF, time.time())
+
+    def read(self, retries: int = 50) -> Optional[Tuple[int, bytes]]:
+        """(seq, blob) of the latest complete snapshot, or None when there is none (yet)."""
+        for _ in range(int(retries)):
+            magic, seq, slot, length, crc, _, _, _ = self.header()
+            if magic != _SNAP_MAGIC or seq == 0:
+                return None
+            last = self._last
+            if seq == last[0]:
+                return last
+            if seq % 2 or slot not in (0, 1) or length > self.slot_size:
+                time.sleep(0.001)
+                continue
+            off = _SNAP_HDR_AREA + int(slot) * self.slot_size
+            blob = self.mm[off : off + int(length)]
+            if struct.unpack_from("<Q", self.mm, _SNAP_SEQ_OFF)[0] != seq or zlib.crc32(blob) != crc:
+                continue
+            self._last = (int(seq), blob)
+            return self._last
+        return None
+
+
+def probe_worker_enabled(args_flag: bool = False) -> bool:
+    return bool(args_flag) or env_bool(read_env_file(HOME_ENV_FILE), "NB_OPS_PROBE_WORKER", False)
+
+
+def _probe_worker_lock_held() -> bool:
+    """True while some probe worker process holds PROBE_WORKER_LOCK."""
+    if fcntl is None or not PROBE_WORKER_LOCK.exists():
+        return False
+    try:
+        with PROBE_WORKER_LOCK.open("a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return False
+    except OSError:
+        return True
+
+
+def _probe_worker_snapshot(frag_cache: Dict[str, Tuple[Any, bytes]]) -> bytes:
+    """
+    One pre-serialized snapshot: a JSON index line, then the fragments it points at.
+    Section fragments are the inside of the section's JSON object, so the console can splice
+    several of them into one response without decoding anything.
+    """
+    frags: List[bytes] = []
+    pos = 0
+
+    def _add(raw: bytes) -> List[int]:
+        nonlocal pos
+        frags.append(raw)
+        pos += len(raw)
+        return [pos - len(raw), len(raw)]
+
+    try:
+        base = status_base(probe_context())
+    except Exception:
+        base = {"root_dir": str(ROOT_DIR)}
+    base.pop("ts", None)
+    index: Dict[str, Any] = {"base": _add(json.dumps(base, ensure_ascii=False).encode("utf-8")[1:-1]), "sections": {}}
+    now = time.time()
+    rows = []
+    with _STATUS_LOCK:
+        for name in STATUS_SECTIONS:
+            st = _status_section_state(name)
+            rows.append((name, _status_meta_entry(st, now), st.get("data"), float(st.get("ts") or 0.0)))
+    for name, entry, data, ts in rows:
+        raw = b""
+        if entry["has_data"]:
+            hit = frag_cache.get(name)
+            # A refresh replaces the data dict, so identity tells whether the cached bytes are current.
+            if hit is not None and hit[0] is data:
+                raw = hit[1]
+            else:
+                raw = json.dumps(data, ensure_ascii=False).encode("utf-8")[1:-1]
+                frag_cache[name] = (data, raw)
+        entry.pop("age_s", None)
+        entry["ts"] = ts
+        entry["frag"] = _add(raw)
+        index["sections"][name] = entry
+    index["probes"] = _add(json.dumps(probes_summary(probe_snapshot()), ensure_ascii=False).encode("utf-8"))
+    index["scheduler"] = {"mode": str(_SCHEDULER_STATE.get("mode") or "idle"), "since": float(_SCHEDULER_STATE.get("since") or 0.0)}
+    return json.dumps(index, ensure_ascii=False).encode("utf-8") + b"\n" + b"".join(frags)
+
+
+def probe_worker_main() -> int:
+    """Entry point of the probe worker process (--run-probe-worker)."""
+    ensure_runtime_dir()
+    lock_f = PROBE_WORKER_LOCK.open("a")
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock_f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            print("[probe-worker] another probe worker is running", flush=True)
+            return 0
+    region = ProbeSnapshotRegion(PROBE_SNAPSHOT_FILE, writer=True)
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    print(f"[probe-worker] started pid={os.getpid()}", flush=True)
+
+    ensure_status_update(force=True, sections=STATUS_CORE_SECTIONS)
+    for target in (alerts_worker, alerts_outbox_worker, docker_events_watcher, probe_scheduler):
+        threading.Thread(target=target, args=(stop_event,), daemon=True).start()
+
+    started = time.time()
+    demand: Dict[str, Any] = {}
+    demand_mtime = 0.0
+    served: Dict[str, float] = {}
+    applied: Dict[str, float] = {}
+    frag_cache: Dict[str, Tuple[Any, bytes]] = {}
+    last_blob = b""
+    last_beat = 0.0
+    too_big_logged = False
+    try:
+        while not stop_event.is_set():
+            now = time.time()
+            try:
+                mtime = PROBE_DEMAND_FILE.stat().st_mtime
+            except OSError:
+                mtime = 0.0
+            if mtime != demand_mtime:
+                demand_mtime = mtime
+                demand = _load_json(PROBE_DEMAND_FILE)
+            demand_ts = float(demand.get("ts") or 0.0)
+            if now - max(demand_ts, started) > PROBE_WORKER_ORPHAN_S:
+                print("[probe-worker] console is gone, exiting", flush=True)
+                break
+            if int(demand.get("viewers") or 0) > 0:
+                viewer_touch("ops-console")
+            sent = demand.get("send_result") or {}
+            if float(sent.get("ts") or 0) > float(alerts_state().get("console_send_ts") or 0):
+                # Recorded in the state itself, so a restarted worker neither loses nor repeats it.
+                alerts_state_update(
+                    lambda st: st.update(
+                        console_send_ts=float(sent.get("ts") or 0),
+                        last_send_ok=bool(sent.get("ok")),
+                        last_send_msg=str(sent.get("msg") or ""),
+                        **({"last_sent_ts": int(float(sent.get("ts") or 0))} if sent.get("ok") else {}),
+                    )
+                )
+            # Invalidations from actions run by the console.
+            stale = []
+            for name, ts in (demand.get("invalidate") or {}).items():
+                if name in STATUS_SECTIONS and float(ts or 0) > applied.get(name, 0.0):
+                    applied[name] = float(ts or 0)
+                    stale.append(name)
+            if stale:
+                status_invalidate(stale)
+            # Sections requested since we last looked: same rule as an in-process /api/status call.
+            wanted = []
+            for name, ts in (demand.get("sections") or {}).items():
+                if name in STATUS_SECTIONS and float(ts or 0) > served.get(name, 0.0):
+                    served[name] = float(ts or 0)
+                    wanted.append(name)
+            if wanted:
+                ensure_status_update(force=False, sections=wanted)
+
+            if not last_blob and (now - started) < PROBE_WORKER_WARMUP_S:
+                with _STATUS_LOCK:
+                    warm = all(_status_section_state(n).get("data") for n in STATUS_CORE_SECTIONS)
+                if not warm:
+                    region.beat()
+                    stop_event.wait(PROBE_WORKER_TICK_S)
+                    continue
+            blob = _probe_worker_snapshot(frag_cache)
+            if blob != last_blob:
+                if region.publish(blob):
+                    last_blob = blob
+                    last_beat = now
+                elif not too_big_logged:
+                    too_big_logged = True
+                    print(f"[probe-worker] snapshot too large ({len(blob)} bytes), not published", flush=True)
+            if now - last_beat >= PROBE_WORKER_HEARTBEAT_S:
+                region.beat()
+                last_beat = now
+            stop_event.wait(PROBE_WORKER_TICK_S)
+    finally:
+        stop_event.set()
+        _VIEWER_WAKE.set()
+        _OUTBOX_WAKE.set()
+        _ALERTS_WAKE.set()
+        try:
+            alerts_state_flush()
+        except Exception:
+            pass
+        print("[probe-worker] stopped", flush=True)
+    return 0
+
+
+class ProbeWorkerLink:
+    """
+    Console side of the probe worker: serves /api/status from the snapshot region, tells the
+    worker what is being watched, and restarts the worker when it dies or stops beating.
+    """
+
+    def __init__(self) -> None:
+        self.sections: Dict[str, float] = {}
+        self.invalidated: Dict[str, float] = {}
+        self.last_send: Dict[str, Any] = {}
+        self.dirty = threading.Event()
+        self.region: Optional[ProbeSnapshotRegion] = None
+        self._index: Tuple[int, Dict[str, Any], int] = (0, {}, 0)
+        self.proc: Optional[subprocess.Popen] = None
+        self.pid = 0
+        self.adopted = False
+        self.started_ts = 0.0
+        self.next_start_ts = 0.0
+        self.backoff_s = 1.0
+        self.restarts = 0
+        self.last_error = ""
+
+    # -- demand (console -> worker) --
+    def want(self, names: List[str]) -> None:
+        now = time.time()
+        for name in names:
+            self.sections[name] = now
+        self.dirty.set()
+
+    def invalidate(self, names: List[str]) -> None:
+        now = time.time()
+        for name in names:
+            self.invalidated[name] = now
+        self.dirty.set()
+
+    def send_result(self, ok: bool, report: str) -> None:
+        # Test sends happen in the console; the worker writes them into alerts_state.json.
+        self.last_send = {"ts": time.time(), "ok": bool(ok), "msg": str(report or "")}
+        self.dirty.set()
+
+    def _write_demand(self) -> None:
+        obj = {
+            "ts": time.time(),
+            "console_pid": os.getpid(),
+            "viewers": viewers_active(),
+            "sections": dict(self.sections),
+            "invalidate": dict(self.invalidated),
+            "send_result": dict(self.last_send),
+        }
+        try:
+            ensure_runtime_dir()
+            _write_atomic(PROBE_DEMAND_FILE, json.dumps(obj, ensure_ascii=False), durable=False)
+        except Exception:
+            pass
+
+    # -- snapshot (worker -> console), lock-free --
+    def _region(self) -> Optional[ProbeSnapshotRegion]:
+        region = self.region
+        if region is None:
+            try:
+                region = self.region = ProbeSnapshotRegion(PROBE_SNAPSHOT_FILE)
+            except (OSError, ValueError):
+                return None
+        return region
+
+    def snapshot(self) -> Optional[Tuple[int, bytes, Dict[str, Any], int]]:
+        region = self._region()
+        if region is None:
+            return None
+        got = region.read()
+        if got is None:
+            return None
+        seq, blob = got
+        cached = self._index
+        if cached[0] != seq:
+            nl = blob.find(b"\n")
+            try:
+                cached = (seq, json.loads(blob[:nl].decode("utf-8")), nl + 1)
+            except Exception:
+                return None
+            self._index = cached
+        return seq, blob, cached[1], cached[2]
+
+    def summary(self) -> Dict[str, Any]:
+        region = self.region
+        pid, hb_ts = region.heartbeat() if region is not None else (0, 0.0)
+        return {
+            "pid": int(self.pid or pid),
+            "alive": self._alive(),
+            "heartbeat_age_s": round(max(0.0, time.time() - hb_ts), 1) if hb_ts else None,
+            "restarts": int(self.restarts),
+            "last_error": self.last_error,
+        }
+
+    # -- supervision --
+    def _alive(self) -> bool:
+        if self.proc is not None:
+            return self.proc.poll() is None
+        if self.adopted and self.pid:
+            return _probe_worker_lock_held() if fcntl is not None else is_pid_alive(self.pid)
+        return False
+
+    def _spawn(self) -> None:
+        ensure_runtime_dir()
+        try:
+            if PROBE_WORKER_LOG.exists() and PROBE_WORKER_LOG.stat().st_size > PROBE_WORKER_LOG_MAX_BYTES:
+                os.replace(str(PROBE_WORKER_LOG), str(PROBE_WORKER_LOG) + ".1")
+        except Exception:
+            pass
+        self._write_demand()
+        with PROBE_WORKER_LOG.open("a", encoding="utf-8") as f:
+            # Own session: a console crash doesn't take the worker with it; the next console adopts it.
+            self.proc = subprocess.Popen(
+                [sys.executable, str(Path(__file__).resolve()), "--run-probe-worker"],
+                cwd=str(ROOT_DIR),
+                stdin=subprocess.DEVNULL,
+                stdout=f,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+        self.pid = int(self.proc.pid)
+        self.adopted = False
+        self.started_ts = time.time()
+
+    def _kill(self) -> None:
+        try:
+            if self.proc is not None:
+                self.proc.kill()
+                self.proc.wait(5)
+            elif self.pid and is_pid_alive(self.pid) and (fcntl is None or _probe_worker_lock_held()):
+                os.kill(self.pid, signal.SIGKILL)
+        except Exception:
+            pass
+        self.proc = None
+        self.adopted = False
+
+    def _supervise(self, now: float) -> None:
+        region = self._region()
+        if region is not None:
+            try:
+                if PROBE_SNAPSHOT_FILE.stat().st_ino != region.ino:
+                    self.region = region = None
+            except OSError:
+                self.region = region = None
+        hb_pid, hb_ts = region.heartbeat() if region is not None else (0, 0.0)
+        if self.proc is None and not self.adopted and hb_pid and hb_pid != self.pid:
+            # A worker left running by a previous console: keep it if it's still beating.
+            if is_pid_alive(hb_pid) and (now - hb_ts) < PROBE_WORKER_STALL_S:
+                self.pid, self.adopted, self.started_ts = hb_pid, True, now
+        alive = self._alive()
+        if alive and (now - self.started_ts) > PROBE_WORKER_STALL_S and (now - max(hb_ts, self.started_ts)) > PROBE_WORKER_STALL_S:
+            self.last_error = f"探测子进程 {int(PROBE_WORKER_STALL_S)} 秒没有心跳，已重启"
+            print(f"[ops] probe worker pid={self.pid} stalled, restarting", flush=True)
+            self._kill()
+            alive = False
+        if alive:
+            if (now - self.started_ts) > 60:
+                self.backoff_s = 1.0
+            return
+        if self.proc is not None:
+            code = self.proc.poll()
+            self.last_error = f"探测子进程已退出（退出码 {code}），已重启"
+            print(f"[ops] probe worker pid={self.pid} exited with {code}, restarting", flush=True)
+            self.proc = None
+        elif self.adopted:
+            self.last_error = "探测子进程已退出，已重启"
+            print(f"[ops] probe worker pid={self.pid} is gone, restarting", flush=True)
+            self.adopted = False
+        if now < self.next_start_ts:
+            return
+        if self.started_ts:
+            self.restarts += 1
+        self.next_start_ts = now + self.backoff_s
+        self.backoff_s = min(PROBE_WORKER_BACKOFF_MAX_S, self.backoff_s * 2)
+        try:
+            self._spawn()
+        except Exception as e:
+            self.last_error = humanize_error(str(e))
+
+    def run(self, stop_event: threading.Event) -> None:
+        last_write = 0.0
+        while not stop_event.is_set():
+            now = time.time()
+            try:
+                self._supervise(now)
+            except Exception as e:
+                self.last_error = humanize_error(str(e))
+            if self.dirty.is_set() or (now - last_write) >= PROBE_DEMAND_HEARTBEAT_S:
+                self.dirty.clear()
+                self._write_demand()
+                last_write = now
+            self.dirty.wait(PROBE_WORKER_TICK_S)
+            # Coalesce a burst of requests into one demand write.
+            time.sleep(0.02)
+
+    def stop(self) -> None:
+        pid = self.pid
+        try:
+            if self.proc is not None:
+                self.proc.terminate()
+                self.proc.wait(5)
+            elif self.adopted and pid and is_pid_alive(pid):
+                os.kill(pid, signal.SIGTERM)
+        except Exception:
+            self._kill()
+
+
+_PROBE_WORKER: Optional[ProbeWorkerLink] = None
+
+
+def probe_worker_status(names: List[str]) -> bytes:
+    """
+    /api/status body assembled from the worker's snapshot: same fields as status_payload_cached(),
+    but the section data is spliced in as already-encoded bytes.
+    """
+    link = _PROBE_WORKER
+    assert link is not None
+    if names:
+        link.want(names)
+    snap = link.snapshot()
+    now = time.time()
+    parts: List[bytes] = []
+    per: Dict[str, Dict[str, Any]] = {}
+    oldest = 0.0
+    sched: Dict[str, Any] = {}
+    probes_raw = b"{}"
+    if snap is not None:
+        _, blob, index, start = snap
+
+        def _frag(ref: List[int]) -> bytes:
+            return blob[start + int(ref[0]) : start + int(ref[0]) + int(ref[1])]
+
+        parts.append(_frag(index["base"]))
+        for name in names:
+            e = dict((index.get("sections") or {}).get(name) or {})
+            ts = float(e.pop("ts", 0.0) or 0.0)
+            ref = e.pop("frag", [0, 0])
+            if e.get("has_data"):
+                parts.append(_frag(ref))
+                oldest = ts if not oldest else min(oldest, ts)
+            e["age_s"] = int(max(0.0, now - ts)) if ts > 0 else 0
+            per[name] = e
+        probes_raw = _frag(index["probes"])
+        sched = dict(index.get("scheduler") or {})
+    else:
+        try:
+            base = status_base(probe_context())
+        except Exception:
+            base = {"root_dir": str(ROOT_DIR)}
+        base.pop("ts", None)
+        parts.append(json.dumps(base, ensure_ascii=False).encode("utf-8")[1:-1])
+    for name in names:
+        if name not in per or not per[name].get("has_data"):
+            # The worker picks the request up within a tick; the UI shows its loading state meanwhile.
+            base_e = per.get(name) or {"has_data": False, "age_s": 0, "last_ok": False, "last_error": "", "last_duration_ms": 0}
+            base_e["updating"] = True
+            per[name] = base_e
+    meta = _status_meta_merge(per)
+    since = float(sched.get("since") or 0.0)
+    meta["scheduler"] = {
+        "mode": str(sched.get("mode") or "idle"),
+        "viewers": int(viewers_active()),
+        "since_s": int(max(0.0, now - since)) if since > 0 else 0,
+    }
+    meta["worker"] = link.summary()
+    parts.append(b'"ts": ' + str(int(oldest) if names else int(now)).encode("ascii"))
+    parts.append(b'"probes": ' + probes_raw)
+    parts.append(b'"_meta": ' + json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+    return b"{" + b", ".join(p for p in parts if p) + b"}"
+
+
+# ---- debug endpoints (/api/debug/*) ----
+# Off by default: start with --debug-endpoints or set NB_OPS_DEBUG_ENDPOINTS=1 in deploy/.env.home.
+# Even when on, they only answer requests coming from this machine (see Handler._debug_allowed).
+OPS_DEBUG_ENDPOINTS = False
+DEBUG_PROFILE_MAX_S = 60
+DEBUG_PROFILE_HZ = 100
+DEBUG_MEMORY_FRAMES = 1
 
-          const meta = (data && data._meta) ? data._meta : null;
-          if(meta && meta.has_data === false){
-            showLoading(meta);
-            return;
-          }
-          // Only persist a usable snapshot. (When status is still warming up, server returns a placeholder.)
-          try{ localStorage.setItem(LS_STATUS_KEY, JSON.stringify(data)); }catch(e){}
+_DEBUG_PROFILE_LOCK = threading.Lock()
+_DEBUG_MEM_LOCK = threading.Lock()
+_DEBUG_MEM: Dict[str, Any] = {"snapshot": None, "ts": 0.0, "since": 0.0}
 
-          const cards = buildCards(data);
-          updateOverall(cards);
-          lastPreparedCards = prepareCards(cards);
-          render(lastPreparedCards);
-          updateFoot(data);
-        }catch(e){
-          const isAbort = !!(e && e.name === 'AbortError');
-          const msg = isAbort ? '加载超时（请稍后重试）' : ('加载失败：' + (e && e.message ? e.message : String(e)));
-          toast(isAbort ? '加载超时' : '加载失败', 'bad');
-          if(!lastPreparedCards || lastPreparedCards.length === 0){
-            showError(msg);
-          }
-        }finally{
-          clearTimeout(to);
-          refreshInFlight = false;
-        }
-      }
 
-      // Instant render with last snapshot, then refresh in background.
-      tryRenderCached();
-      setAuto(true);
-      refresh();
-    </script>
-  </body>
-</html>
-"""
+def _frame_label(code: Any) -> str:
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
 
 
-def pretty_svc_name(svc: str) -> str:
-    s = (svc or "").strip()
-    if not s:
-        return ""
-    m = {
-        "backend": "后端(API)",
-        "db": "数据库",
-        "redis": "缓存(Redis)",
-    }
-    return m.get(s, s)
+def _thread_names() -> Dict[int, str]:
+    # Handler/job threads are numbered ("Thread-12 (process_request_thread)"); drop the number so they aggregate.
+    return {int(t.ident or 0): re.sub(r"-\d+", "", t.name) for t in threading.enumerate()}
 
 
-def normalize_action_result(action: str, service: str, ok: bool, message: str, detail: str) -> Tuple[bool, str, str]:
+def debug_profile(seconds: float, hz: int = DEBUG_PROFILE_HZ) -> Tuple[Dict[str, int], int]:
     """
-    Make action responses "product-like":
-    - message: short, clear, user-facing (shown immediately)
-    - detail: long, raw output (hidden behind details, copyable)
+    Sample every thread's stack via sys._current_frames() for `seconds`.
+    Returns ({collapsed stack: samples}, rounds); stacks are "thread;outer;...;inner" as flamegraph.pl expects.
     """
-    a = (action or "").strip()
-    svc = (service or "").strip()
+    me = threading.get_ident()
+    interval = 1.0 / max(1, int(hz))
+    end = time.time() + float(seconds)
+    stacks: Dict[str, int] = {}
+    names = _thread_names()
+    rounds = 0
+    while time.time() < end:
+        rounds += 1
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            parts: List[str] = []
+            f: Any = frame
+            while f is not None:
+                parts.append(_frame_label(f.f_code))
+                f = f.f_back
+            if ident not in names:
+                names = _thread_names()
+            parts.append(names.get(ident, f"thread-{ident}"))
+            key = ";".join(reversed(parts))
+            stacks[key] = stacks.get(key, 0) + 1
+        time.sleep(interval)
+    return stacks, rounds
+
+
+def debug_threads() -> str:
+    frames = sys._current_frames()
+    out: List[str] = []
+    for t in sorted(threading.enumerate(), key=lambda t: t.name):
+        out.append(f"--- {t.name} (ident={t.ident}, daemon={t.daemon})")
+        f = frames.get(int(t.ident or 0))
+        out.append("".join(traceback.format_stack(f)).rstrip() if f is not None else "  (no frame)")
+        out.append("")
+    return "\n".join(out)
 
-    msg_raw = (message or "").strip()
-    det_raw = (detail or "").strip()
 
-    # Always keep raw detail for debugging/copying.
-    det = det_raw or msg_raw
+def debug_memory(top: int = 20, stop: bool = False) -> Dict[str, Any]:
+    """
+    tracemalloc top-N growth since the previous call. The first call only starts tracing
+    (it slows allocations down a bit); stop=True turns it off again.
+    """
+    with _DEBUG_MEM_LOCK:
+        if stop:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            _DEBUG_MEM.update(snapshot=None, ts=0.0, since=0.0)
+            return {"ok": True, "tracing": False, "msg": "已停止内存跟踪"}
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(DEBUG_MEMORY_FRAMES)
+        now = time.time()
+        snap = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"))
+        )
+        prev = _DEBUG_MEM["snapshot"]
+        prev_ts = float(_DEBUG_MEM["ts"] or 0.0)
+        _DEBUG_MEM["snapshot"] = snap
+        _DEBUG_MEM["ts"] = now
+        if not _DEBUG_MEM["since"]:
+            _DEBUG_MEM["since"] = now
+        cur, peak = tracemalloc.get_traced_memory()
+        out: Dict[str, Any] = {
+            "ok": True,
+            "tracing": True,
+            "tracing_since": int(_DEBUG_MEM["since"]),
+            "current_kb": int(cur / 1024),
+            "peak_kb": int(peak / 1024),
+        }
+        if prev is None:
+            out["msg"] = "已开始内存跟踪；稍后再请求一次，查看这段时间里增长最多的位置"
+            out["top"] = []
+            return out
+        out["interval_s"] = round(now - prev_ts, 1)
+        out["top"] = [
+            {
+                "where": str(d.traceback[0]) if d.traceback else "?",
+                "size_kb": round(d.size / 1024, 1),
+                "size_diff_kb": round(d.size_diff / 1024, 1),
+                "count": int(d.count),
+                "count_diff": int(d.count_diff),
+            }
+            for d in snap.compare_to(prev, "lineno")[: max(1, int(top))]
+        ]
+        return out
 
-    if not ok:
-        short = humanize_error(msg_raw)
-        if not short or (short == msg_raw and (len(msg_raw) > 240 or "\n" in msg_raw)):
-            short = "操作失败（请展开详情查看原因）"
-        return False, short, det
 
-    # OK messages: prefer explicit labels per action.
-    if a == "docker_up":
-        port = ""
-        m = re.search(r"已自动选择可用端口：(\d+)", det)
-        if m:
-            port = m.group(1)
-        return True, ("已启动/修复完成" + (f"（端口 {port}）" if port else "")), det
-    if a == "docker_down":
-        return True, "已停止全部服务", det
-    if a == "docker_restart_all":
-        return True, "已重启全部服务", det
-    if a == "docker_restart":
-        return True, ("已重启" + (pretty_svc_name(svc) or "服务")), det
-    if a == "docker_prune":
-        return True, "已清理 Docker 缓存", det
-    if a == "docker_stop_container":
-        return True, ("已停止占用容器" + (f"：{svc}" if svc else "")), det
+# ---- request access log / latency metrics ----
+# Every request to the ops console is appended to ops_access.jsonl (rotated to .1 past the cap) and
+# folded into a per-route latency histogram served at /api/metrics. Requests slower than
+# OPS_SLOW_REQUEST_MS also go to ops_slow_requests.jsonl together with the spans they waited on.
+OPS_ACCESS_LOG_MAX_BYTES = 2 * 1024 * 1024
+OPS_SLOW_LOG_MAX_BYTES = 512 * 1024
+OPS_SLOW_REQUEST_MS = 1000
+OPS_SLOW_KEEP = 50
+OPS_METRICS_MAX_ROUTES = 100
+OPS_LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Long-lived by design (streams); their duration says nothing about slowness.
+OPS_SLOW_EXEMPT_ROUTES = {"GET /api/jobs/:id/events", "GET /api/debug/profile"}
+
+_REQ_METRICS_LOCK = threading.Lock()
+_REQ_METRICS: Dict[str, Dict[str, Any]] = {}
+_REQ_METRICS_SINCE = time.time()
+_REQ_SLOW: deque = deque(maxlen=OPS_SLOW_KEEP)
+_REQ_LOG_LOCK = threading.Lock()
+_REQ_LOG_SIZES: Dict[str, int] = {}
+
+
+def request_route(method: str, path: str) -> str:
+    """Route key for metrics: ids are collapsed so the number of histograms stays bounded."""
+    p = urllib.parse.urlparse(path or "").path or "/"
+    if p.startswith("/api/jobs/"):
+        p = "/api/jobs/:id/events" if p.endswith("/events") else "/api/jobs/:id"
+    elif p.startswith("/api/status/") and p[len("/api/status/") :].strip("/") not in STATUS_SECTIONS:
+        p = "/api/status/:unknown"
+    elif not p.startswith("/api/") and p != "/":
+        p = "/:other"
+    return f"{method} {p}"
+
+
+def _append_capped(path: Path, rec: Dict[str, Any], max_bytes: int) -> None:
+    line = json.dumps(rec, ensure_ascii=False) + "\n"
+    try:
+        with _REQ_LOG_LOCK:
+            key = str(path)
+            size = _REQ_LOG_SIZES.get(key)
+            if size is None:
+                ensure_runtime_dir()
+                size = path.stat().st_size if path.exists() else 0
+            if size > max_bytes:
+                os.replace(str(path), str(path) + ".1")
+                size = 0
+            with path.open("a", encoding="utf-8") as f:
+                f.write(line)
+            _REQ_LOG_SIZES[key] = size + len(line.encode("utf-8"))
+    except Exception:
+        _REQ_LOG_SIZES.pop(str(path), None)
+
+
+def _span_summary(spans: List[Any], top: int = 5) -> List[Dict[str, Any]]:
+    agg: Dict[Any, List[float]] = {}
+    for kind, name, sec in spans:
+        a = agg.setdefault((kind, name), [0.0, 0])
+        a[0] += sec
+        a[1] += 1
+    items = sorted(agg.items(), key=lambda kv: kv[1][0], reverse=True)[:top]
+    return [{"kind": k, "name": n, "ms": int(v[0] * 1000), "count": int(v[1])} for (k, n), v in items]
+
+
+def request_record(
+    method: str,
+    path: str,
+    status: int,
+    nbytes: int,
+    duration_s: float,
+    wait_s: float,
+    client: str,
+    spans: List[Any],
+) -> None:
+    route = request_route(method, path)
+    ms = max(0.0, duration_s * 1000.0)
+    wait_ms = max(0.0, wait_s * 1000.0)
+    rec: Dict[str, Any] = {
+        "ts": round(time.time(), 3),
+        "method": method,
+        "path": (path or "")[:200],
+        "route": route,
+        "status": int(status),
+        "bytes": int(nbytes),
+        "ms": round(ms, 1),
+        "wait_ms": round(wait_ms, 1),
+        "client": client,
+    }
+    slow = ms >= OPS_SLOW_REQUEST_MS and route not in OPS_SLOW_EXEMPT_ROUTES
+    if slow:
+        rec["spans"] = _span_summary(spans)
+    with _REQ_METRICS_LOCK:
+        m = _REQ_METRICS.get(route)
+        if m is None:
+            if len(_REQ_METRICS) >= OPS_METRICS_MAX_ROUTES:
+                route = "other"
+            m = _REQ_METRICS.setdefault(
+                route,
+                {"count": 0, "errors": 0, "sum_ms": 0.0, "max_ms": 0.0, "wait_sum_ms": 0.0, "buckets": [0] * (len(OPS_LATENCY_BUCKETS_MS) + 1)},
+            )
+        m["count"] += 1
+        m["errors"] += 1 if int(status) >= 500 else 0
+        m["sum_ms"] += ms
+        m["max_ms"] = max(m["max_ms"], ms)
+        m["wait_sum_ms"] += wait_ms
+        m["buckets"][next((i for i, b in enumerate(OPS_LATENCY_BUCKETS_MS) if ms <= b), len(OPS_LATENCY_BUCKETS_MS))] += 1
+        if slow:
+            _REQ_SLOW.append(rec)
+    _append_capped(OPS_ACCESS_LOG, rec, OPS_ACCESS_LOG_MAX_BYTES)
+    if slow:
+        _append_capped(OPS_SLOW_LOG, rec, OPS_SLOW_LOG_MAX_BYTES)
+
+
+def _bucket_quantile(buckets: List[int], count: int, q: float) -> Optional[float]:
+    # Upper bound of the bucket holding the q-th request; None when it fell in the open-ended bucket.
+    need = q * count
+    acc = 0
+    for i, n in enumerate(buckets):
+        acc += n
+        if acc >= need and n:
+            return float(OPS_LATENCY_BUCKETS_MS[i]) if i < len(OPS_LATENCY_BUCKETS_MS) else None
+    return None
 
-    if a == "mobile_preview_start":
-        return True, "手机外网验收已启动", det
-    if a == "mobile_preview_stop":
-        return True, "手机外网验收已停止", det
-    if a == "mobile_preview_restart":
-        return True, "手机外网验收已重启", det
 
-    if a == "tunnel_start":
-        return True, "外网通道已启动", det
-    if a == "tunnel_restart":
-        return True, "外网通道已重启", det
-    if a == "tunnel_stop":
-        return True, "外网通道已停止", det
-    if a == "named_tunnel_init":
-        # message already human-friendly (browser login etc)
-        return True, (msg_raw or "固定外网初始化已开始"), det
+def request_metrics() -> Dict[str, Any]:
+    with _REQ_METRICS_LOCK:
+        items = [(k, dict(v, buckets=list(v["buckets"]))) for k, v in _REQ_METRICS.items()]
+        slow = list(_REQ_SLOW)
+    routes: Dict[str, Any] = {}
+    for route, m in sorted(items, key=lambda kv: kv[1]["sum_ms"], reverse=True):
+        n = max(1, int(m["count"]))
+        routes[route] = {
+            "count": int(m["count"]),
+            "errors": int(m["errors"]),
+            "mean_ms": round(m["sum_ms"] / n, 1),
+            "p50_ms": _bucket_quantile(m["buckets"], n, 0.50),
+            "p95_ms": _bucket_quantile(m["buckets"], n, 0.95),
+            "p99_ms": _bucket_quantile(m["buckets"], n, 0.99),
+            "max_ms": round(m["max_ms"], 1),
+            "mean_wait_ms": round(m["wait_sum_ms"] / n, 1),
+            "buckets": m["buckets"],
+        }
+    return {
+        "since": int(_REQ_METRICS_SINCE),
+        "buckets_ms": list(OPS_LATENCY_BUCKETS_MS) + ["+Inf"],
+        "slow_threshold_ms": OPS_SLOW_REQUEST_MS,
+        "routes": routes,
+        "slow": list(reversed(slow)),
+        "access_log": str(OPS_ACCESS_LOG),
+        "slow_log": str(OPS_SLOW_LOG),
+    }
 
-    if a == "open_docker":
-        return True, (msg_raw or "已打开 Docker"), det
-    if a == "set_backend_port":
-        return True, (msg_raw or "已生效"), det
 
-    if a.startswith("git_"):
-        return True, (msg_raw or "已推送到 GitHub"), det
+class _CountingWriter:
+    """Wraps the handler's wfile to count the bytes sent back."""
 
-    # fallback: use raw if it's short; otherwise show a generic completion.
-    if msg_raw and len(msg_raw) <= 80 and "\n" not in msg_raw:
-        return True, msg_raw, det
-    return True, "操作已完成", det
+    def __init__(self, raw: Any) -> None:
+        self._raw = raw
+        self.n = 0
+
+    def write(self, b: Any) -> int:
+        r = self._raw.write(b)
+        self.n += len(b)
+        return r
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._raw, name)
 
 
 class OpsHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
     daemon_threads = True
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        # accept time per connection; the handler thread turns it into "thread wait" time
+        self.accepted: Dict[int, float] = {}
+        self.accepted_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        with self.accepted_lock:
+            self.accepted[id(request)] = time.time()
+        super().process_request(request, client_address)
+
+    def finish_request(self, request: Any, client_address: Any) -> None:
+        # Runs on the handler thread: the gap since accept is time spent waiting for it.
+        with self.accepted_lock:
+            ts = self.accepted.pop(id(request), None)
+        _REQ_LOCAL.accept_wait_s = max(0.0, time.time() - ts) if ts is not None else 0.0
+        super().finish_request(request, client_address)
+
     # Python 标准库 http.server.HTTPServer 会在 bind 时做一次 `socket.getfqdn(host)`，
     # 某些 DNS/反向解析配置下可能卡住，导致服务“永远起不来”（尤其在新版本 Python 上更明显）。
     # 运营台不需要反向解析，直接跳过即可。
@@ -5728,8 +10365,51 @@ class OpsHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
 class Handler(BaseHTTPRequestHandler):
     server_version = "naibao-ops/1.0"
 
+    def setup(self) -> None:
+        super().setup()
+        self._accept_wait_s = float(getattr(_REQ_LOCAL, "accept_wait_s", 0.0) or 0.0)
+        self.wfile = _CountingWriter(self.wfile)
+
+    def parse_request(self) -> bool:
+        # The request line has been read: start the clock here so keep-alive idle time isn't counted.
+        self._t0 = time.time()
+        return super().parse_request()
+
+    def send_response(self, code: int, message: Optional[str] = None) -> None:
+        self._status = int(code)
+        super().send_response(code, message)
+
+    def handle_one_request(self) -> None:
+        self._status = 0
+        self._t0 = 0.0
+        self.command = ""
+        self.path = ""
+        wfile = self.wfile
+        sent0 = wfile.n if isinstance(wfile, _CountingWriter) else 0
+        _REQ_LOCAL.spans = []
+        try:
+            super().handle_one_request()
+        finally:
+            spans = _REQ_LOCAL.spans
+            _REQ_LOCAL.spans = None
+            if self.command and self._t0:
+                # Only the first request on a connection waited for a thread; keep-alive ones didn't.
+                wait_s, self._accept_wait_s = self._accept_wait_s, 0.0
+                request_record(
+                    self.command,
+                    self.path,
+                    self._status,
+                    (wfile.n if isinstance(wfile, _CountingWriter) else 0) - sent0,
+                    time.time() - self._t0,
+                    wait_s,
+                    str(self.client_address[0]) if self.client_address else "",
+                    spans,
+                )
+
     def _json(self, code: int, data: Any) -> None:
-        raw = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self._json_raw(code, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    def _json_raw(self, code: int, raw: bytes) -> None:
         self.send_response(code)
         self.send_header("Content-Type", "application/json; charset=utf-8")
         self.send_header("Content-Length", str(len(raw)))
@@ -5744,6 +10424,101 @@ class Handler(BaseHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(raw)
 
+    def _debug_allowed(self) -> bool:
+        """Debug endpoints: opt-in, and only for loopback clients addressing the console as localhost."""
+        if not OPS_DEBUG_ENDPOINTS:
+            self._json(404, {"ok": False, "msg": "调试接口未开启（启动时加 --debug-endpoints，或在 deploy/.env.home 设置 NB_OPS_DEBUG_ENDPOINTS=1）"})
+            return False
+        client = str(self.client_address[0]) if self.client_address else ""
+        host = str(self.headers.get("Host") or "").rsplit(":", 1)[0].strip("[]").lower()
+        local_client = client.startswith("127.") or client in ("::1", "localhost") or client.startswith("::ffff:127.")
+        # The Host check keeps web pages that rebind a domain to 127.0.0.1 from reading these.
+        if not local_client or host not in ("127.0.0.1", "localhost", "::1"):
+            self._json(403, {"ok": False, "msg": "调试接口只允许本机访问（http://127.0.0.1:端口/）"})
+            return False
+        return True
+
+    def _debug_get(self) -> None:
+        u = urllib.parse.urlparse(self.path)
+        q = urllib.parse.parse_qs(u.query)
+        what = u.path[len("/api/debug/") :].strip("/")
+        if what == "threads":
+            self._text(200, debug_threads())
+            return
+        if what == "memory":
+            try:
+                top = max(1, min(200, int(q.get("top", ["20"])[0] or "20")))
+            except Exception:
+                top = 20
+            stop = str(q.get("stop", [""])[0] or "") in ("1", "true")
+            try:
+                self._json(200, debug_memory(top=top, stop=stop))
+            except Exception as e:
+                self._json(500, {"ok": False, "msg": humanize_error(str(e))})
+            return
+        if what == "profile":
+            try:
+                seconds = max(0.5, min(float(DEBUG_PROFILE_MAX_S), float(q.get("seconds", ["10"])[0] or "10")))
+                hz = max(1, min(1000, int(q.get("hz", [str(DEBUG_PROFILE_HZ)])[0] or DEBUG_PROFILE_HZ)))
+            except Exception:
+                self._json(400, {"ok": False, "msg": "参数无效：seconds 为秒数（最多 60），hz 为每秒采样次数"})
+                return
+            if not _DEBUG_PROFILE_LOCK.acquire(blocking=False):
+                self._json(409, {"ok": False, "msg": "已有一次采样在进行，请稍后再试"})
+                return
+            try:
+                stacks, rounds = debug_profile(seconds, hz)
+            finally:
+                _DEBUG_PROFILE_LOCK.release()
+            if str(q.get("format", [""])[0] or "") == "json":
+                top = sorted(stacks.items(), key=lambda kv: kv[1], reverse=True)
+                self._json(200, {"ok": True, "seconds": seconds, "hz": hz, "rounds": rounds, "stacks": dict(top)})
+                return
+            # Collapsed stacks, one "stack count" per line: pipe into flamegraph.pl or drop into speedscope.
+            self._text(200, "".join(f"{k} {v}\n" for k, v in sorted(stacks.items())))
+            return
+        self._json(404, {"ok": False, "msg": "未知调试接口", "endpoints": ["profile", "threads", "memory"]})
+
+    def _job_events(self, job: Dict[str, Any], since: int) -> None:
+        """
+        Server-sent events for one job: `output` events carry new lines (id = next offset, so a
+        reconnecting EventSource resumes where it stopped), then one `done` event with the result.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        end = time.time() + JOB_STREAM_MAX_S
+        last_write = time.time()
+        # An open stream counts as a viewer: the scheduler stays live while a tab follows the job.
+        viewer_stream(+1)
+        try:
+            while time.time() < end:
+                view = job_view(job, since=since)
+                if view["output"]:
+                    data = json.dumps({"output": view["output"], "truncated": view["truncated"]}, ensure_ascii=False)
+                    self.wfile.write(f"id: {view['next']}\nevent: output\ndata: {data}\n\n".encode("utf-8"))
+                    since = int(view["next"])
+                    last_write = time.time()
+                if view["state"] == "done":
+                    final = {k: v for k, v in view.items() if k != "output"}
+                    self.wfile.write(f"event: done\ndata: {json.dumps(final, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    return
+                if time.time() - last_write >= 15:
+                    self.wfile.write(b": ping\n\n")
+                    last_write = time.time()
+                self.wfile.flush()
+                job_wait_output(job, since, 5.0)
+        except (BrokenPipeError, ConnectionResetError):
+            return
+        finally:
+            viewer_stream(-1)
+
+    def _touch_viewer(self) -> None:
+        # One viewer per browser (address + user agent); health checks like ?sections=meta don't count.
+        viewer_touch(f"{self.client_address[0]}|{self.headers.get('User-Agent') or ''}")
+
     def do_GET(self) -> None:  # noqa: N802
         if self.path == "/" or self.path.startswith("/?"):
             raw = INDEX_HTML.encode("utf-8")
@@ -5755,13 +10530,91 @@ class Handler(BaseHTTPRequestHandler):
             return
 
         if self.path.startswith("/api/status"):
-            self._json(200, status_payload_cached())
+            u = urllib.parse.urlparse(self.path)
+            sub = u.path[len("/api/status") :].strip("/")
+            if sub:
+                if sub not in STATUS_SECTIONS:
+                    self._json(400, status_unknown_sections_error([sub]))
+                    return
+                self._touch_viewer()
+                if _PROBE_WORKER is not None:
+                    self._json_raw(200, probe_worker_status([sub]))
+                    return
+                self._json(200, status_payload_cached([sub]))
+                return
+            q = urllib.parse.parse_qs(u.query)
+            names, unknown = parse_status_sections(q.get("sections", [""])[0] or "")
+            if unknown:
+                self._json(400, status_unknown_sections_error(unknown))
+                return
+            if names:
+                self._touch_viewer()
+            if _PROBE_WORKER is not None:
+                self._json_raw(200, probe_worker_status(names))
+                return
+            self._json(200, status_payload_cached(names))
             return
 
         if self.path.startswith("/api/alerts/config"):
             self._json(200, alerts_config_payload())
             return
 
+        if self.path.startswith("/api/debug/"):
+            if self._debug_allowed():
+                self._debug_get()
+            return
+
+        if self.path.startswith("/api/metrics"):
+            self._json(200, request_metrics())
+            return
+
+        if self.path.startswith("/api/history"):
+            q = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+            try:
+                limit = max(1, min(OPS_HISTORY_KEEP, int(q.get("limit", ["50"])[0] or "50")))
+            except Exception:
+                limit = 50
+            self._json(200, {"items": ops_history(str(q.get("kind", [""])[0] or ""), limit)})
+            return
+
+        if self.path.startswith("/api/jobs"):
+            u = urllib.parse.urlparse(self.path)
+            job_id = u.path[len("/api/jobs") :].strip("/")
+            events = job_id.endswith("/events")
+            if events:
+                job_id = job_id[: -len("/events")]
+            if not job_id:
+                self._json(200, {"jobs": jobs_summary()})
+                return
+            job = job_get(job_id)
+            if job is None:
+                self._json(404, {"ok": False, "msg": f"任务不存在或已过期：{job_id}"})
+                return
+            q = urllib.parse.parse_qs(u.query)
+            try:
+                since = int(q.get("since", [""])[0] or self.headers.get("Last-Event-ID") or "0")
+            except Exception:
+                since = 0
+            if events:
+                self._job_events(job, since)
+                return
+            self._json(200, job_view(job, since=since))
+            return
+
+        if self.path.startswith("/api/logs/search"):
+            q = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+            query = (q.get("q", [""])[0] or "").strip()
+            since_ms = parse_since_ms(q.get("since", [""])[0] or "")
+            try:
+                limit = int(q.get("limit", ["200"])[0] or "200")
+            except Exception:
+                limit = 200
+            try:
+                self._json(200, log_search(query, since_ms=since_ms, limit=limit))
+            except Exception as e:
+                self._json(200, {"ok": False, "msg": humanize_error(str(e)), "results": []})
+            return
+
         if self.path.startswith("/api/logs"):
             from urllib.parse import parse_qs, urlparse
 
@@ -5838,126 +10691,362 @@ class Handler(BaseHTTPRequestHandler):
             threading.Thread(target=_shutdown, daemon=True).start()
             return
 
-        ensure_home_env_file()
-        env = read_env_file(HOME_ENV_FILE)
-
-        res: Any
-        if action == "docker_up":
-            res = docker_up()
-        elif action == "docker_down":
-            res = docker_down()
-        elif action == "docker_restart":
-            res = docker_restart(service)
-        elif action == "docker_restart_all":
-            res = docker_restart_all()
-        elif action == "docker_prune":
-            res = docker_prune()
-        elif action == "docker_stop_container":
-            res = docker_stop_container(service)
-        elif action == "mobile_preview_start":
-            res = mobile_preview_start()
-        elif action == "mobile_preview_stop":
-            res = mobile_preview_stop()
-        elif action == "mobile_preview_restart":
-            ok1, out1 = mobile_preview_stop()
-            ok2, out2 = mobile_preview_start()
-            res = (bool(ok1 and ok2), (out1 + "\n\n" + out2).strip())
-        elif action == "tunnel_start":
-            res = start_tunnel(env)
-        elif action == "tunnel_restart":
-            ok1, out1 = stop_tunnel()
-            ok2, out2 = start_tunnel(env)
-            res = (bool(ok1 and ok2), (out1 + "\n\n" + out2).strip())
-        elif action == "tunnel_stop":
-            res = stop_tunnel()
-        elif action == "named_tunnel_init":
-            res = named_tunnel_init()
-        elif action == "git_publish_workflow":
-            res = git_publish([".github/workflows/pages.yml"], service, kind="workflow")
-        elif action == "git_publish_frontend":
-            res = git_publish(
-                [
-                    "frontend/src",
-                    "frontend/index.html",
-                    "frontend/package.json",
-                    "frontend/package-lock.json",
-                    "frontend/vite.config.js",
-                    "frontend/.npmrc",
-                    ".github/workflows/pages.yml",
-                ],
-                service,
-                kind="frontend",
+        job, note = job_submit(action, service)
+        if job is None:
+            self._json(200, {"ok": False, "busy": True, "message": note, "detail": note})
+            return
+        attached = note == "attached"
+        with req_span("job_wait", f"{action}:{service}" if service else action):
+            done = job["done"].wait(JOB_INLINE_WAIT_S)
+        view = job_view(job)
+        if done:
+            self._json(
+                200,
+                {"ok": bool(view["ok"]), "message": view["message"], "detail": view["detail"], "job": view["id"], "attached": attached},
             )
-        elif action == "alerts_open_config":
-            ensure_alerts_env_file()
-            res = open_text_file(ALERTS_ENV_FILE)
-        elif action == "alerts_enable":
-            ensure_alerts_env_file()
-            changed = set_env_kv(ALERTS_ENV_FILE, "ALERT_ENABLED", "1")
-            res = (True, "告警已开启" if changed else "告警已开启（无需修改）")
-        elif action == "alerts_disable":
-            ensure_alerts_env_file()
-            changed = set_env_kv(ALERTS_ENV_FILE, "ALERT_ENABLED", "0")
-            res = (True, "告警已关闭" if changed else "告警已关闭（无需修改）")
-        elif action == "alerts_test":
-            ensure_alerts_env_file()
-            aenv = read_env_file(ALERTS_ENV_FILE)
-            st0 = alerts_state()
-            # Build a friendly test message, not tied to current health.
-            env2 = read_env_file(HOME_ENV_FILE) if HOME_ENV_FILE.exists() else {}
-            public_domain = (env2.get("NB_PUBLIC_DOMAIN") or "naibao.me").strip()
-            api_public = (env2.get("NB_TUNNEL_HOSTNAME") or "api.naibao.me").strip()
-            title = "奶宝：告警测试"
-            body = "\n".join(
-                [
-                    f"时间：{time.strftime('%Y-%m-%d %H:%M')}",
-                    "说明：这是一条测试消息，用于确认告警渠道可用。",
-                    "",
-                    f"前端：https://{public_domain}",
-                    f"API：https://{api_public}/api/health",
-                ]
-            ).strip()
-            ok, report = alerts_send_all(aenv, title, body)
-            st0["last_sent_ts"] = int(time.time())
-            st0["last_send_ok"] = bool(ok)
-            st0["last_send_msg"] = str(report or "")
-            _save_json(ALERTS_STATE_FILE, st0)
-            detail = "\n".join(
+            return
+        msg = "同样的操作正在执行，已接上它的进度" if attached else "已开始，正在后台执行"
+        self._json(200, {"ok": True, "pending": True, "attached": attached, "job": view["id"], "message": msg, "detail": ""})
+
+
+def _bench_dist(xs: List[float]) -> Dict[str, Any]:
+    v = sorted(float(x) for x in xs)
+    if not v:
+        return {"n": 0}
+
+    def _q(q: float) -> float:
+        return round(v[min(len(v) - 1, int(round(q * (len(v) - 1))))], 1)
+
+    return {"n": len(v), "min": round(v[0], 1), "p50": _q(0.5), "p95": _q(0.95), "max": round(v[-1], 1), "mean": round(sum(v) / len(v), 1)}
+
+
+def _bench_parse_map(raw: str, cast) -> Dict[str, Any]:
+    # "wecom=50,telegram=300" -> {"wecom": 50, "telegram": 300}; a bare value applies to every channel.
+    out: Dict[str, Any] = {}
+    for part in (raw or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "=" in part:
+            k, v = part.split("=", 1)
+            out[k.strip()] = cast(v.strip())
+        else:
+            for c in ALERT_CHANNEL_LABELS:
+                out[c] = cast(part)
+    return out
+
+
+# Module globals alerts_benchmark rebinds / empties for its run, and restores afterwards.
+_BENCH_REBOUND = (
+    "RUNTIME_DIR",
+    "HOME_ENV_FILE",
+    "ALERTS_ENV_FILE",
+    "ALERTS_STATE_FILE",
+    "ALERTS_LOG",
+    "ALERTS_OUTBOX",
+    "ALERT_RULES_FILE",
+    "alerts_evaluate",
+    "alerts_message",
+    "alerts_outbox_enqueue",
+    "alerts_send_all",
+    "_OUTBOX_PENDING",
+)
+_BENCH_STATE = (
+    "_PROBE_RESULTS",
+    "_PROBE_STATS",
+    "_STATUS_SECTION_STATE",
+    "_SLO_STATE",
+    "_ALERTS_STATE_MEM",
+    "_ALERT_RULES_CACHE",
+    "_DIGEST",
+    "_ALERT_CHANNEL_STATS",
+    "_OUTBOX_STATS",
+    "_ALERTS_TRIGGER",
+)
+
+
+def alerts_benchmark(
+    runs: int = 20,
+    latency_ms: Optional[Dict[str, float]] = None,
+    fail_rate: Optional[Dict[str, float]] = None,
+    fault: str = "container_die",
+    poll_ms: int = 1000,
+    digest_s: int = 0,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    End-to-end alert pipeline benchmark: fault injected -> detected -> evaluated -> message built ->
+    queued -> accepted by a channel. Runs against local stand-ins for WeCom / Telegram / Bark and a
+    fake backend (docker state + /health), in a throw-away runtime dir. Paths, pipeline functions, fake
+    probes and in-memory alert/probe state are swapped in for the run and put back (temp dir removed) afterwards.
+    fault: "container_die" (detected via a docker event) or "health_fail" (/health starts failing,
+    detected by probe polling every poll_ms, like an open dashboard).
+    """
+    global RUNTIME_DIR, HOME_ENV_FILE, ALERTS_ENV_FILE, ALERTS_STATE_FILE, ALERTS_LOG, ALERTS_OUTBOX, ALERT_RULES_FILE
+    global alerts_evaluate, alerts_message, alerts_outbox_enqueue, alerts_send_all, _OUTBOX_PENDING
+
+    saved_globals = {n: globals()[n] for n in _BENCH_REBOUND}
+    saved_probe_fns = {n: PROBES[n]["fn"] for n in ("docker_daemon", "containers")}
+    saved_state = {n: dict(globals()[n]) for n in _BENCH_STATE}
+    rnd = random.Random(seed)
+    lat = {c: 0.0 for c in ALERT_CHANNEL_LABELS}
+    lat.update(latency_ms or {})
+    fails = {c: 0.0 for c in ALERT_CHANNEL_LABELS}
+    fails.update(fail_rate or {})
+    target = {"healthy": True, "running": True}
+    accepted: List[Tuple[str, float, str]] = []  # (channel, ts, title)
+    injected = {c: 0 for c in ALERT_CHANNEL_LABELS}
+    acc_lock = threading.Lock()
+
+    class _StandIn(BaseHTTPRequestHandler):
+        def log_message(self, *a: Any) -> None:
+            pass
+
+        def _reply(self, code: int, body: bytes = b"") -> None:
+            self.send_response(code)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _handle(self) -> None:
+            n = int(self.headers.get("Content-Length") or "0")
+            raw = self.rfile.read(n) if n > 0 else b""
+            path = urllib.parse.urlparse(self.path).path
+            if path == "/health":
+                self._reply(200 if target["healthy"] and target["running"] else 503, b"ok")
+                return
+            ch = "wecom" if path.startswith("/wecom") else ("telegram" if path.startswith("/tg/") else "bark")
+            time.sleep(float(lat.get(ch) or 0.0) / 1000.0)
+            if rnd.random() < float(fails.get(ch) or 0.0):
+                with acc_lock:
+                    injected[ch] += 1
+                self._reply(503)
+                return
+            if ch == "bark":
+                title = urllib.parse.unquote(path.split("/")[3] if path.count("/") >= 3 else "")
+            else:
+                try:
+                    obj = json.loads(raw.decode("utf-8") or "{}")
+                except Exception:
+                    obj = {}
+                text = str((obj.get("markdown") or {}).get("content") or obj.get("text") or "")
+                title = text.replace("*", "").strip().split("\n")[0]
+            with acc_lock:
+                accepted.append((ch, time.time(), title))
+            self._reply(200, b"{}")
+
+        do_GET = _handle
+        do_POST = _handle
+
+    srv = OpsHTTPServer(("127.0.0.1", 0), _StandIn)
+    port = int(srv.server_address[1])
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{port}"
+
+    tmp_dir = tempfile.TemporaryDirectory(prefix="naibao-alert-bench-")
+    tmp = Path(tmp_dir.name)
+    stop = threading.Event()
+    poll_stop = threading.Event()
+    workers: List[threading.Thread] = []
+    samples: List[Dict[str, Any]] = []
+    try:
+        # Start from empty caches so nothing from the real runtime (or a previous run) leaks into the samples.
+        for n in _BENCH_STATE:
+            globals()[n].clear()
+        _ALERTS_STATE_MEM.update({"state": None, "written": None, "written_ts": 0.0, "file_sig": None})
+        _ALERT_RULES_CACHE.update({"sig": None, "rules": [], "probes": [], "error": ""})
+        _DIGEST.update({"deadline": 0.0, "t0": 0.0, "events": [], "restored": False})
+        _OUTBOX_STATS.update({"delivered": 0, "expired": 0, "retries": 0, "last_latency_ms": 0, "last_done_ts": 0})
+        _ALERTS_TRIGGER.update({"reason": "", "ts": 0.0})
+        _OUTBOX_PENDING = None
+        RUNTIME_DIR = tmp
+        HOME_ENV_FILE = tmp / ".env.home"
+        ALERTS_ENV_FILE = tmp / "alerts.env"
+        ALERTS_STATE_FILE = tmp / "alerts_state.json"
+        ALERTS_LOG = tmp / "alerts.log"
+        ALERTS_OUTBOX = tmp / "alerts_outbox.jsonl"
+        ALERT_RULES_FILE = tmp / "alert_rules.json"
+        HOME_ENV_FILE.write_text(f"NB_BACKEND_HOST_PORT={port}\nNB_TUNNEL_MODE=quick\n", encoding="utf-8")
+        ALERTS_ENV_FILE.write_text(
+            "\n".join(
                 [
-                    "== 发送结果 ==",
-                    report or "",
-                    "",
-                    "== 消息内容 ==",
-                    title,
-                    "",
-                    body,
+                    "ALERT_ENABLED=1",
+                    f"ALERT_WECOM_WEBHOOK={base}/wecom",
+                    "ALERT_TG_BOT_TOKEN=bench",
+                    "ALERT_TG_CHAT_ID=1",
+                    f"ALERT_TG_API_BASE={base}/tg",
+                    f"ALERT_BARK_URL={base}/bark/key",
+                    f"ALERT_DIGEST_WINDOW_S={int(digest_s)}",
+                    "ALERT_SWEEP_S=3600",
+                    "ALERT_SEND_RECOVERY=1",
+                    "ALERT_RETRIES=2",
+                    "ALERT_CHANNEL_DEADLINE_S=10",
                 ]
-            ).strip()
-            msg = "已发送测试消息" if ok else (report or "测试发送失败")
-            res = (bool(ok), msg, detail)
-        elif action == "open_docker":
-            res = open_docker_desktop()
-        elif action == "set_backend_port":
-            res = set_backend_host_port(service)
-        else:
-            res = (False, f"未知操作：{action}", f"未知操作：{action}")
+            )
+            + "\n",
+            encoding="utf-8",
+        )
+        ALERT_RULES_FILE.write_text(
+            json.dumps({"rules": [r for r in DEFAULT_ALERT_RULES if r["key"] in ("docker", "api_local")]}, ensure_ascii=False),
+            encoding="utf-8",
+        )
 
-        ok = False
-        message = ""
-        detail = ""
-        if isinstance(res, tuple):
-            if len(res) == 3:
-                ok, message, detail = bool(res[0]), str(res[1] or ""), str(res[2] or "")
-            elif len(res) == 2:
-                ok, message = bool(res[0]), str(res[1] or "")
-                detail = message
+        # Fake docker: the daemon is always up; the backend container follows target["running"].
+        PROBES["docker_daemon"]["fn"] = lambda ctx, t: {"ok": True, "msg": ""}
+        PROBES["containers"]["fn"] = lambda ctx, t: (
+            {"ok": True, "msg": "", "items": []} if target["running"] else {"ok": False, "msg": "后端容器未运行", "items": []}
+        )
+
+        # Stage timestamps, collected by wrapping the pipeline functions.
+        marks: Dict[str, List[float]] = {"eval_start": [], "eval_end": [], "built": [], "queued": [], "send_start": []}
+        orig_eval, orig_msg, orig_enqueue, orig_send = alerts_evaluate, alerts_message, alerts_outbox_enqueue, alerts_send_all
+
+        def _mark(name: str) -> None:
+            marks[name].append(time.time())
+
+        def _eval(*a: Any, **k: Any) -> Dict[str, Any]:
+            _mark("eval_start")
+            try:
+                return orig_eval(*a, **k)
+            finally:
+                _mark("eval_end")
+
+        def _msg(*a: Any, **k: Any) -> Tuple[str, str]:
+            r = orig_msg(*a, **k)
+            _mark("built")
+            return r
+
+        def _enqueue(*a: Any, **k: Any) -> bool:
+            r = orig_enqueue(*a, **k)
+            _mark("queued")
+            return r
+
+        def _send(*a: Any, **k: Any) -> Tuple[bool, str]:
+            _mark("send_start")
+            return orig_send(*a, **k)
+
+        alerts_evaluate, alerts_message, alerts_outbox_enqueue, alerts_send_all = _eval, _msg, _enqueue, _send
+
+        def _poller() -> None:
+            while not poll_stop.is_set():
+                try:
+                    probe_run(["api_local"], force=True)
+                except Exception:
+                    pass
+                poll_stop.wait(max(0.05, poll_ms / 1000.0))
+
+        workers.append(threading.Thread(target=alerts_worker, args=(stop,), daemon=True))
+        workers.append(threading.Thread(target=alerts_outbox_worker, args=(stop,), daemon=True))
+        if fault == "health_fail":
+            workers.append(threading.Thread(target=_poller, daemon=True))
+        for t in workers:
+            t.start()
+
+        def _after(name: str, t: float) -> Optional[float]:
+            return next((x for x in marks[name] if x >= t), None)
+
+        def _wait_level(level: str, timeout_s: float = 30.0) -> bool:
+            end = time.time() + timeout_s
+            while time.time() < end:
+                if str(alerts_state().get("notified_level") or "") == level and not alerts_outbox_summary()["pending"]:
+                    return True
+                time.sleep(0.02)
+            return False
+
+        probe_run(["api_local"], force=True)
+        time.sleep(0.5)
+        for i in range(max(1, int(runs))):
+            # Fresh alert history each run, so hysteresis / flap detection measure a first incident.
+            with _ALERTS_STATE_LOCK:
+                _ALERTS_STATE_MEM.update({"state": None, "written": None, "written_ts": 0.0, "file_sig": None})
+                try:
+                    ALERTS_STATE_FILE.unlink()
+                except Exception:
+                    pass
+            alerts_state_update(lambda st: st.update(notified_level="ok", last_level="ok"))
+            for v in marks.values():
+                v.clear()
+
+            t0 = time.time()
+            if fault == "health_fail":
+                target["healthy"] = False
             else:
-                ok, message, detail = False, "操作失败（返回格式异常）", str(res)
-        else:
-            ok, message, detail = False, "操作失败（返回值异常）", str(res)
+                target["running"] = False
+                # what docker_events_watcher does on a "die" event
+                probe_invalidate(["containers", "api_local", "port_backend_docker"])
+                alerts_wake("docker:backend:die")
+            ok = _wait_level("bad")
+            with acc_lock:
+                acc = [(c, ts) for (c, ts, title) in accepted if ts >= t0 and title.startswith("奶宝：异常")]
+            first = {c: min([ts for (cc, ts) in acc if cc == c] or [0.0]) for c in ALERT_CHANNEL_LABELS}
+            es, ee, bt, qd, ss = (_after(n, t0) for n in ("eval_start", "eval_end", "built", "queued", "send_start"))
+            fastest = min([ts for ts in first.values() if ts] or [0.0])
+            samples.append(
+                {
+                    "run": i + 1,
+                    "ok": bool(ok and fastest),
+                    "detect_ms": round((es - t0) * 1000.0, 1) if es else None,
+                    "evaluate_ms": round((ee - es) * 1000.0, 1) if es and ee else None,
+                    "build_ms": round((bt - ee) * 1000.0, 1) if ee and bt else None,
+                    "queue_ms": round((ss - qd) * 1000.0, 1) if qd and ss else None,
+                    "send_ms": round((fastest - ss) * 1000.0, 1) if ss and fastest else None,
+                    "end_to_end_ms": round((fastest - t0) * 1000.0, 1) if fastest else None,
+                    "channels_ms": {c: round((ts - t0) * 1000.0, 1) for c, ts in first.items() if ts},
+                }
+            )
 
-        ok, message, detail = normalize_action_result(action, service, ok, message, detail)
-        self._json(200, {"ok": bool(ok), "message": str(message or ""), "detail": str(detail or "")})
+            # Recovery needs ALERT_CLEAR_COUNT clean evaluations; nudge the loop instead of waiting for its cadence.
+            target["healthy"] = True
+            target["running"] = True
+            end = time.time() + 30.0
+            while time.time() < end and not _wait_level("ok", timeout_s=0.5):
+                probe_invalidate(["containers", "api_local"])
+                alerts_wake("bench:recover")
+    finally:
+        stop.set()
+        poll_stop.set()
+        _ALERTS_WAKE.set()
+        _OUTBOX_WAKE.set()
+        # Let the bench workers finish their current pass before their paths and state are swapped back.
+        for t in workers:
+            if t.is_alive():
+                t.join(timeout=15.0)
+        srv.shutdown()
+        srv.server_close()
+        for n, fn in saved_probe_fns.items():
+            PROBES[n]["fn"] = fn
+        for n, v in saved_state.items():
+            globals()[n].clear()
+            globals()[n].update(v)
+        globals().update(saved_globals)
+        tmp_dir.cleanup()
+
+    stages = {
+        k: _bench_dist([s[k] for s in samples if s.get(k) is not None])
+        for k in ("detect_ms", "evaluate_ms", "build_ms", "queue_ms", "send_ms", "end_to_end_ms")
+    }
+    return {
+        "ok": all(s["ok"] for s in samples),
+        "ts": int(time.time()),
+        "config": {
+            "runs": int(runs),
+            "fault": fault,
+            "poll_ms": int(poll_ms),
+            "digest_s": int(digest_s),
+            "latency_ms": lat,
+            "fail_rate": fails,
+            "seed": seed,
+        },
+        "stages": stages,
+        "channels": {
+            c: {
+                "accept_ms": _bench_dist([s["channels_ms"][c] for s in samples if c in s["channels_ms"]]),
+                "failures_injected": injected[c],
+            }
+            for c in ALERT_CHANNEL_LABELS
+        },
+        "samples": samples,
+    }
 
 
 def main() -> int:
@@ -5965,8 +11054,41 @@ def main() -> int:
     parser.add_argument("--bind", default="127.0.0.1", help="bind address (default: 127.0.0.1)")
     parser.add_argument("--port", type=int, default=17623, help="port (default: 17623)")
     parser.add_argument("--open", action="store_true", help="open browser automatically")
+    parser.add_argument("--probe-worker", action="store_true", help="run probes and alerts in a separate worker process")
+    parser.add_argument("--run-probe-worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--debug-endpoints", action="store_true", help="enable /api/debug/* (profile, threads, memory; localhost only)")
+    parser.add_argument("--bench-alerts", action="store_true", help="benchmark the alert pipeline against local stand-ins, print JSON")
+    parser.add_argument("--bench-runs", type=int, default=20, help="benchmark: number of injected faults (default: 20)")
+    parser.add_argument(
+        "--bench-fault",
+        choices=["container_die", "health_fail"],
+        default="container_die",
+        help="benchmark: container_die (docker event) or health_fail (/health polling)",
+    )
+    parser.add_argument("--bench-poll-ms", type=int, default=1000, help="benchmark: probe polling interval for health_fail")
+    parser.add_argument("--bench-latency-ms", default="wecom=80,telegram=250,bark=40", help="benchmark: channel latency, e.g. wecom=80,telegram=250")
+    parser.add_argument("--bench-fail-rate", default="", help="benchmark: channel 503 rate, e.g. telegram=0.3")
+    parser.add_argument("--bench-digest-s", type=int, default=0, help="benchmark: ALERT_DIGEST_WINDOW_S to use (default: 0)")
+    parser.add_argument("--bench-seed", type=int, default=None, help="benchmark: random seed for failure injection")
+    parser.add_argument("--bench-out", default="", help="benchmark: also write the JSON result to this file")
     args = parser.parse_args()
 
+    if args.bench_alerts:
+        res = alerts_benchmark(
+            runs=int(args.bench_runs),
+            latency_ms=_bench_parse_map(args.bench_latency_ms, float),
+            fail_rate=_bench_parse_map(args.bench_fail_rate, float),
+            fault=str(args.bench_fault),
+            poll_ms=int(args.bench_poll_ms),
+            digest_s=int(args.bench_digest_s),
+            seed=args.bench_seed,
+        )
+        raw = json.dumps(res, ensure_ascii=False, indent=2)
+        if args.bench_out:
+            Path(args.bench_out).write_text(raw + "\n", encoding="utf-8")
+        print(raw)
+        return 0 if res.get("ok") else 1
+
     if not HOME_COMPOSE_FILE.exists():
         print(f"ERROR: missing {HOME_COMPOSE_FILE}", file=sys.stderr)
         return 2
@@ -5974,6 +11096,12 @@ def main() -> int:
     ensure_runtime_dir()
     ensure_home_env_file()
 
+    if args.run_probe_worker:
+        return probe_worker_main()
+
+    global OPS_DEBUG_ENDPOINTS, _PROBE_WORKER
+    OPS_DEBUG_ENDPOINTS = bool(args.debug_endpoints) or env_bool(read_env_file(HOME_ENV_FILE), "NB_OPS_DEBUG_ENDPOINTS", False)
+
     bind = str(args.bind)
     port = int(args.port)
     addr = (bind, port)
@@ -6003,20 +11131,34 @@ def main() -> int:
 
     print(f"[ops] running: {url}")
     write_ops_runtime_files(int(addr[1]))
-    # Warm-up status snapshot so the first page load is never a blank screen.
-    ensure_status_update(force=True)
+    stop_event = threading.Event()
+    if probe_worker_enabled(bool(args.probe_worker)):
+        # Probes, status sections and the alerts watchdog live in the worker process (it warms the core sections).
+        _PROBE_WORKER = ProbeWorkerLink()
+        threading.Thread(target=_PROBE_WORKER.run, args=(stop_event,), daemon=True).start()
+        print("[ops] probes run in a separate worker process")
+    else:
+        # Warm-up status snapshot so the first page load is never a blank screen.
+        # Slow sections (git/dns/host) are only computed once a page asks for them.
+        ensure_status_update(force=True, sections=STATUS_CORE_SECTIONS)
     if args.open:
         try:
             webbrowser.open(url)
         except Exception:
             pass
 
-    stop_event = threading.Event()
-    # Start alerts watchdog in-process. It only sends when enabled in alerts.env.
-    try:
-        threading.Thread(target=alerts_worker, args=(stop_event,), daemon=True).start()
-    except Exception:
-        pass
+    if _PROBE_WORKER is None:
+        # Start alerts watchdog in-process. It only sends when enabled in alerts.env.
+        try:
+            threading.Thread(target=alerts_worker, args=(stop_event,), daemon=True).start()
+            threading.Thread(target=alerts_outbox_worker, args=(stop_event,), daemon=True).start()
+            threading.Thread(target=docker_events_watcher, args=(stop_event,), daemon=True).start()
+        except Exception:
+            pass
+        try:
+            threading.Thread(target=probe_scheduler, args=(stop_event,), daemon=True).start()
+        except Exception:
+            pass
 
     try:
         httpd.serve_forever()
@@ -6025,6 +11167,14 @@ def main() -> int:
     finally:
         try:
             stop_event.set()
+            if _PROBE_WORKER is not None:
+                _PROBE_WORKER.stop()
+            _VIEWER_WAKE.set()
+            _OUTBOX_WAKE.set()
+            _ALERTS_WAKE.set()
+            if _PROBE_WORKER is None:
+                # In worker mode alerts_state.json belongs to the worker (it flushes on its own exit).
+                alerts_state_flush()
         except Exception:
             pass
         cleanup_ops_runtime_files()
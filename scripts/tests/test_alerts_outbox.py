@@ -0,0 +1,152 @@
+"""
+告警发件箱（outbox）测试：重启后从日志重放待发条目、去重、严格按入队顺序发送。
+
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import json
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import local_ops_console as ops  # noqa: E402
+
+
+class _OutboxDir(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        d = Path(self._tmp.name)
+        (d / "alerts.env").write_text("ALERT_ENABLED=1\nALERT_WECOM_WEBHOOK=http://127.0.0.1:9/wecom\n", encoding="utf-8")
+        patches = {
+            "RUNTIME_DIR": d,
+            "ALERTS_OUTBOX": d / "alerts_outbox.jsonl",
+            "ALERTS_LOG": d / "alerts.log",
+            "ALERTS_ENV_FILE": d / "alerts.env",
+            "ALERTS_STATE_FILE": d / "alerts_state.json",
+            "_OUTBOX_PENDING": None,
+            "_OUTBOX_STATS": {"delivered": 0, "expired": 0, "retries": 0, "last_latency_ms": 0, "last_done_ts": 0},
+            "_ALERTS_STATE_MEM": {"state": None, "written": None, "written_ts": 0.0, "file_sig": None},
+            "_PROBE_WORKER": None,
+        }
+        for name, value in patches.items():
+            p = mock.patch.object(ops, name, value)
+            p.start()
+            self.addCleanup(p.stop)
+
+    def _restart(self) -> None:
+        # What a new console process sees: nothing in memory, only the journal.
+        with ops._OUTBOX_LOCK:
+            ops._OUTBOX_PENDING = None
+
+    def _pending(self):
+        with ops._OUTBOX_LOCK:
+            return sorted(ops._outbox_load_locked().values(), key=lambda e: e["ts"])
+
+
+class OutboxReplayTest(_OutboxDir):
+    def test_pending_entries_survive_restart(self) -> None:
+        self.assertTrue(ops.alerts_outbox_enqueue("a|bad|trip", "A", "body a"))
+        self.assertTrue(ops.alerts_outbox_enqueue("b|bad|trip", "B", "body b"))
+        self.assertTrue(ops.alerts_outbox_enqueue("c|bad|trip", "C", "body c"))
+        a, b, _ = self._pending()
+        ops._outbox_done(a, True, "ok")
+        with ops._OUTBOX_LOCK:
+            ops._outbox_append({"op": "retry", "id": b["id"], "attempts": 2, "next_ts": 123.0, "msg": "HTTP 503"})
+        with ops.ALERTS_OUTBOX.open("a", encoding="utf-8") as f:
+            f.write('{"op": "enqueue", "id": "torn')  # crash mid-write
+
+        self._restart()
+        pending = self._pending()
+        self.assertEqual([e["title"] for e in pending], ["B", "C"])
+        self.assertEqual(pending[0]["attempts"], 2)
+        self.assertEqual(pending[0]["next_ts"], 123.0)
+        self.assertEqual(pending[1]["attempts"], 0)
+
+    def test_same_key_is_not_queued_twice(self) -> None:
+        self.assertTrue(ops.alerts_outbox_enqueue("k|bad|trip", "A", "x"))
+        self.assertFalse(ops.alerts_outbox_enqueue("k|bad|trip", "A again", "x"))
+        self._restart()
+        self.assertFalse(ops.alerts_outbox_enqueue("k|bad|trip", "A after restart", "x"))
+        self.assertTrue(ops.alerts_outbox_pending_for("k"))
+
+    def test_compaction_keeps_only_pending(self) -> None:
+        with mock.patch.object(ops, "ALERTS_OUTBOX_COMPACT_BYTES", 1):
+            ops.alerts_outbox_enqueue("a|bad|trip", "A", "x")
+            ops.alerts_outbox_enqueue("b|bad|trip", "B", "x")
+            a, _ = self._pending()
+            ops._outbox_done(a, True, "ok")
+        recs = [json.loads(ln) for ln in ops.ALERTS_OUTBOX.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual([r.get("title") for r in recs], ["B"])
+        self._restart()
+        self.assertEqual([e["title"] for e in self._pending()], ["B"])
+
+
+class OutboxOrderTest(_OutboxDir):
+    def setUp(self) -> None:
+        super().setUp()
+        self.sent = []
+        self.fail_next = 1
+
+        def _send(aenv, title, body, only=None):
+            self.sent.append(title)
+            if self.fail_next:
+                self.fail_next -= 1
+                return False, "企业微信：失败（HTTP 503）"
+            return True, "企业微信：成功"
+
+        p = mock.patch.object(ops, "alerts_send_all", _send)
+        p.start()
+        self.addCleanup(p.stop)
+        self.stop = threading.Event()
+        self.worker = threading.Thread(target=ops.alerts_outbox_worker, args=(self.stop,), daemon=True)
+
+        def _stop() -> None:
+            self.stop.set()
+            ops._OUTBOX_WAKE.set()
+            self.worker.join(timeout=5)
+
+        self.addCleanup(_stop)
+
+    def _wait(self, cond, timeout_s: float = 5.0) -> bool:
+        end = time.time() + timeout_s
+        while time.time() < end:
+            if cond():
+                return True
+            time.sleep(0.02)
+        return False
+
+    def test_failed_entry_holds_back_younger_ones(self) -> None:
+        ops.alerts_outbox_enqueue("a|bad|trip", "incident", "x")
+        ops.alerts_outbox_enqueue("a|ok|clear", "recovery", "x", is_recovery=True)
+        self.worker.start()
+        self.assertTrue(self._wait(lambda: self.sent == ["incident"]))
+        time.sleep(0.3)
+        self.assertEqual(self.sent, ["incident"])  # the recovery waits for the incident's retry
+        first = self._pending()[0]
+        self.assertEqual((first["title"], first["attempts"]), ("incident", 1))
+
+        with ops._OUTBOX_LOCK:
+            ops._outbox_load_locked()[first["id"]]["next_ts"] = 0.0  # retry is due now
+        ops._OUTBOX_WAKE.set()
+        self.assertTrue(self._wait(lambda: not self._pending()))
+        self.assertEqual(self.sent, ["incident", "incident", "recovery"])
+
+    def test_replayed_entries_go_out_oldest_first(self) -> None:
+        self.fail_next = 0
+        for t in ("one", "two", "three"):
+            ops.alerts_outbox_enqueue(f"{t}|bad|trip", t, "x")
+        self._restart()
+        self.worker.start()
+        self.assertTrue(self._wait(lambda: not self._pending()))
+        self.assertEqual(self.sent, ["one", "two", "three"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+"""
+告警规则测试：规则编译与校验报错、条件求值，以及每个问题的触发 / 恢复 / 反复波动（flapping）判定。
+
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import local_ops_console as ops  # noqa: E402
+
+
+class CompileRulesTest(unittest.TestCase):
+    def test_default_rules_compile(self) -> None:
+        rules = ops._compile_rules({"rules": ops.DEFAULT_ALERT_RULES})
+        self.assertEqual([r["key"] for r in rules], [r["key"] for r in ops.DEFAULT_ALERT_RULES])
+        api_public = next(r for r in rules if r["key"] == "api_public")
+        # Condition inputs plus the placeholders used in detail / fix.
+        self.assertIn("probe.api_public.ok", api_public["inputs"])
+        self.assertIn("probe.api_public.msg", api_public["inputs"])
+        self.assertIn("seen.api_public", api_public["inputs"])
+
+    def test_conditions_evaluate(self) -> None:
+        fn, keys = ops._compile_cond(
+            {
+                "all": [
+                    {"any": [{"fact": "include_setup"}, {"ever_ok": "api_local"}]},
+                    {"not": {"probe": "api_local", "ok": True}},
+                    {"probe": "api_local", "latency_ms_gt": 100},
+                ]
+            }
+        )
+        self.assertEqual(sorted(set(keys)), ["fact.include_setup", "probe.api_local.latency_ms", "probe.api_local.ok", "seen.api_local"])
+        base = {"fact.include_setup": False, "seen.api_local": True, "probe.api_local.ok": False, "probe.api_local.latency_ms": 250}
+        self.assertTrue(fn(base))
+        self.assertFalse(fn(dict(base, **{"seen.api_local": False})))
+        self.assertFalse(fn(dict(base, **{"probe.api_local.ok": True})))
+        self.assertFalse(fn(dict(base, **{"probe.api_local.latency_ms": 50})))
+
+    def test_fact_eq(self) -> None:
+        fn, _ = ops._compile_cond({"fact": "tunnel_alive", "eq": False})
+        self.assertTrue(fn({"fact.tunnel_alive": False}))
+        self.assertFalse(fn({"fact.tunnel_alive": True}))
+
+    def test_validation_errors(self) -> None:
+        bad = [
+            ({"rules": {"key": "x"}}, "rules"),
+            ({"rules": [{"title": "no key", "when": {"fact": "config_ok"}}]}, "缺少 key"),
+            ({"rules": [{"key": "x", "when": {"fact": "nope"}}]}, "未知条件项 fact：nope"),
+            ({"rules": [{"key": "x", "when": {"probe": "nope", "ok": False}}]}, "未知探测项：nope"),
+            ({"rules": [{"key": "x", "when": {"slo": "nope"}}]}, "未知 SLO：nope"),
+            ({"rules": [{"key": "x", "when": {"probe": "api_local"}}]}, "无法识别的条件"),
+            ({"rules": [{"key": "x", "when": "fact config_ok"}]}, "条件格式错误"),
+            ({"rules": [{"key": "x", "when": {"all": [{"fact": "config_ok"}, {"fact": "bogus"}]}}]}, "bogus"),
+        ]
+        for raw, msg in bad:
+            with self.subTest(raw=raw):
+                with self.assertRaises(ValueError) as cm:
+                    ops._compile_rules(raw)
+                self.assertIn(msg, str(cm.exception))
+
+    def test_unknown_channels_are_dropped(self) -> None:
+        rules = ops._compile_rules([{"key": "x", "when": {"fact": "config_ok"}, "channels": ["bark", "fax"], "severity": "odd"}])
+        self.assertEqual(rules[0]["channels"], ["bark"])
+        self.assertEqual(rules[0]["severity"], "bad")
+
+
+class AlertRulesFileTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        d = Path(self._tmp.name)
+        self.file = d / "alert_rules.json"
+        patches = {
+            "RUNTIME_DIR": d,
+            "ALERT_RULES_FILE": self.file,
+            "ALERTS_LOG": d / "alerts.log",
+            "_ALERT_RULES_CACHE": {"sig": None, "rules": [], "probes": [], "error": ""},
+        }
+        for name, value in patches.items():
+            p = mock.patch.object(ops, name, value)
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_broken_file_falls_back_to_defaults(self) -> None:
+        self.file.write_text(json.dumps({"rules": [{"key": "x", "when": {"fact": "nope"}}]}), encoding="utf-8")
+        c = ops.alert_rules()
+        self.assertIn("未知条件项 fact：nope", c["error"])
+        self.assertEqual(len(c["rules"]), len(ops.DEFAULT_ALERT_RULES))
+
+    def test_probes_follow_the_rules(self) -> None:
+        self.file.write_text(
+            json.dumps({"rules": [{"key": "x", "when": {"probe": "frontend", "ok": False}}, {"key": "y", "when": {"slo": "api_public"}}]}),
+            encoding="utf-8",
+        )
+        c = ops.alert_rules()
+        self.assertEqual(c["error"], "")
+        self.assertEqual(c["probes"], ["api_public", "frontend"])
+
+
+class HysteresisTest(unittest.TestCase):
+    ENV = {"ALERT_TRIP_COUNT": "2", "ALERT_CLEAR_COUNT": "2", "ALERT_FLAP_FLIPS": "6"}
+
+    def setUp(self) -> None:
+        self.state = {}
+
+    def _run(self, bad: bool):
+        raw = [{"key": "api", "title": "API 不可用", "detail": "d", "fix": "f", "severity": "bad"}] if bad else []
+        return ops.alerts_hysteresis(raw, self.state, self.ENV)
+
+    def _keys(self, res):
+        return [i["key"] for i in res["issues"]]
+
+    def test_trips_after_trip_count(self) -> None:
+        r = self._run(True)
+        self.assertEqual(self._keys(r), [])
+        self.assertTrue(r["transitional"])
+        r = self._run(True)
+        self.assertEqual(self._keys(r), ["api"])
+        self.assertEqual(r["issues"][0]["title"], "API 不可用")
+        self.assertEqual(self.state["issues"]["api"]["state"], "firing")
+
+    def test_single_bad_run_is_forgotten(self) -> None:
+        self._run(True)
+        r = self._run(False)
+        self.assertEqual(self._keys(r), [])
+        self.assertEqual(self.state["issues"]["api"]["state"], "ok")
+
+    def test_clears_after_clear_count(self) -> None:
+        self._run(True)
+        self._run(True)
+        r = self._run(False)
+        self.assertEqual(self._keys(r), ["api"])  # still firing, waiting to clear
+        self.assertTrue(r["transitional"])
+        r = self._run(False)
+        self.assertEqual(self._keys(r), [])
+        self.assertEqual(self.state["issues"]["api"]["state"], "ok")
+
+    def test_flapping_is_one_summarized_issue(self) -> None:
+        keys = []
+        for i in range(10):
+            keys = self._keys(self._run(i % 2 == 0))
+        self.assertEqual(keys, ["api~flap"])
+        self.assertEqual(self.state["issues"]["api"]["state"], "flapping")
+
+    def test_flapping_ends_once_stable(self) -> None:
+        for i in range(10):
+            self._run(i % 2 == 0)
+        for _ in range(6):
+            r = self._run(False)
+        self.assertEqual(self._keys(r), [])
+        self.assertEqual(self.state["issues"]["api"]["state"], "ok")
+
+    def test_quiet_issue_is_dropped_from_state(self) -> None:
+        self._run(True)
+        for _ in range(ops.ALERT_FLAP_WINDOW):
+            self._run(False)
+        self.assertNotIn("api", self.state["issues"])
+
+
+if __name__ == "__main__":
+    unittest.main()
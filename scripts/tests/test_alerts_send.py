@@ -0,0 +1,170 @@
+"""
+告警发送（alerts_send_all）测试：本地起 企业微信 / Telegram / Bark 的替身 HTTP 服务，不访问外网。
+
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import local_ops_console as ops  # noqa: E402
+
+
+class _StandIns:
+    """One local server for all three providers; each channel answers from its own script."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.plans = {"wecom": [], "telegram": [], "bark": []}
+        self.hits = {"wecom": [], "telegram": [], "bark": []}
+        owner = self
+
+        class _H(BaseHTTPRequestHandler):
+            def _serve(self) -> None:
+                path = self.path
+                ch = "wecom" if path.startswith("/wecom") else "telegram" if path.startswith("/tg/") else "bark"
+                n = int(self.headers.get("Content-Length") or "0")
+                if n:
+                    self.rfile.read(n)
+                with owner.lock:
+                    owner.hits[ch].append(time.time())
+                    plan = owner.plans[ch]
+                    step = plan.pop(0) if len(plan) > 1 else (plan[0] if plan else (0.0, 200))
+                delay, code = step
+                if delay:
+                    time.sleep(delay)
+                raw = b'{"errcode":0,"ok":true}'
+                try:
+                    self.send_response(code)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(raw)))
+                    self.end_headers()
+                    self.wfile.write(raw)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            do_GET = _serve
+            do_POST = _serve
+
+            def log_message(self, format: str, *args) -> None:  # noqa: A002
+                pass
+
+        self.srv = ThreadingHTTPServer(("127.0.0.1", 0), _H)
+        self.srv.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.srv.server_address[1]}"
+        threading.Thread(target=self.srv.serve_forever, daemon=True).start()
+
+    def plan(self, channel: str, *steps) -> None:
+        """steps: (delay_s, http_code) per request; the last one repeats."""
+        with self.lock:
+            self.plans[channel] = list(steps)
+            self.hits[channel] = []
+
+    def env(self, **extra: str) -> dict:
+        env = {
+            "ALERT_WECOM_WEBHOOK": f"{self.base}/wecom",
+            "ALERT_TG_BOT_TOKEN": "t0ken",
+            "ALERT_TG_CHAT_ID": "42",
+            "ALERT_TG_API_BASE": f"{self.base}/tg",
+            "ALERT_BARK_URL": f"{self.base}/bark/abcdefghijkl",
+            "ALERT_CHANNEL_DEADLINE_S": "10",
+            "ALERT_ATTEMPT_TIMEOUT_S": "3",
+            "ALERT_RETRIES": "2",
+        }
+        env.update(extra)
+        return env
+
+    def close(self) -> None:
+        self.srv.shutdown()
+        self.srv.server_close()
+
+
+class AlertsSendTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.si = _StandIns()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.si.close()
+
+    def setUp(self) -> None:
+        with ops._ALERT_STATS_LOCK:
+            ops._ALERT_CHANNEL_STATS.clear()
+        for ch in ("wecom", "telegram", "bark"):
+            self.si.plan(ch, (0.0, 200))
+
+    def test_fan_out_is_concurrent_and_pages_at_fastest_channel(self) -> None:
+        self.si.plan("wecom", (0.8, 200))
+        self.si.plan("telegram", (0.8, 200))
+        self.si.plan("bark", (0.05, 200))
+        t0 = time.time()
+        ok, report = ops.alerts_send_all(self.si.env(), "标题", "正文")
+        elapsed = time.time() - t0
+        self.assertTrue(ok, report)
+        # Sequential sending would take >= 1.65s.
+        self.assertLess(elapsed, 1.5)
+        page_ms = ops.alerts_channel_stats()["_page"]["time_to_page_ms"]
+        self.assertLess(page_ms, 500)
+        self.assertEqual(report.count("成功"), 3)
+
+    def test_5xx_is_retried_with_backoff(self) -> None:
+        self.si.plan("wecom", (0.0, 503), (0.0, 502), (0.0, 200))
+        ok, report = ops.alerts_send_all(self.si.env(), "t", "b", only=["wecom"])
+        self.assertTrue(ok, report)
+        hits = self.si.hits["wecom"]
+        self.assertEqual(len(hits), 3)
+        self.assertIn("重试2次", report)
+        # Backoff: 0.5s * 2^(n-1), jittered by 0.5..1.5.
+        self.assertGreaterEqual(hits[1] - hits[0], 0.2)
+        self.assertGreaterEqual(hits[2] - hits[1], 0.45)
+
+    def test_timeout_is_retried(self) -> None:
+        self.si.plan("telegram", (2.0, 200), (0.0, 200))
+        ok, report = ops.alerts_send_all(self.si.env(ALERT_ATTEMPT_TIMEOUT_S="1"), "t", "b", only=["telegram"])
+        self.assertTrue(ok, report)
+        self.assertEqual(len(self.si.hits["telegram"]), 2)
+        self.assertEqual(ops.alerts_channel_stats()["telegram"]["retries"], 1)
+
+    def test_4xx_is_not_retried(self) -> None:
+        self.si.plan("bark", (0.0, 400))
+        ok, report = ops.alerts_send_all(self.si.env(), "t", "b", only=["bark"])
+        self.assertFalse(ok)
+        self.assertEqual(len(self.si.hits["bark"]), 1)
+        self.assertIn("HTTP 400", report)
+
+    def test_retries_stop_at_channel_budget(self) -> None:
+        self.si.plan("wecom", (0.0, 500))
+        ok, _ = ops.alerts_send_all(self.si.env(ALERT_RETRIES="1"), "t", "b", only=["wecom"])
+        self.assertFalse(ok)
+        self.assertEqual(len(self.si.hits["wecom"]), 2)
+
+    def test_one_failing_channel_does_not_fail_the_page(self) -> None:
+        self.si.plan("wecom", (0.0, 404))
+        ok, report = ops.alerts_send_all(self.si.env(), "t", "b")
+        self.assertTrue(ok, report)
+        self.assertIn("失败", report)
+
+    def test_per_channel_stats(self) -> None:
+        self.si.plan("bark", (0.0, 403))
+        for _ in range(3):
+            ops.alerts_send_all(self.si.env(), "t", "b")
+        stats = ops.alerts_channel_stats()
+        self.assertEqual(stats["wecom"]["sent"], 3)
+        self.assertEqual(stats["telegram"]["sent"], 3)
+        self.assertEqual(stats["bark"]["failed"], 3)
+        self.assertFalse(stats["bark"]["last_ok"])
+        self.assertEqual(stats["bark"]["last_msg"], "HTTP 403")
+        self.assertGreater(stats["wecom"]["p95_ms"], 0)
+        self.assertLessEqual(stats["wecom"]["p50_ms"], stats["wecom"]["p95_ms"])
+        self.assertEqual(stats["bark"]["p50_ms"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+alerts_state.json 测试：内容没变不写盘、daily 计数按间隔落盘、原子替换，以及磁盘文件被删 / 手改后重新加载。
+
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import local_ops_console as ops  # noqa: E402
+
+
+class AlertsStateTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        d = Path(self._tmp.name)
+        self.file = d / "alerts_state.json"
+        patches = {
+            "RUNTIME_DIR": d,
+            "ALERTS_STATE_FILE": self.file,
+            "_ALERTS_STATE_MEM": {"state": None, "written": None, "written_ts": 0.0, "file_sig": None},
+            "_PROBE_WORKER": None,
+        }
+        for name, value in patches.items():
+            p = mock.patch.object(ops, name, value)
+            p.start()
+            self.addCleanup(p.stop)
+        self.writes = 0
+        real = ops._write_atomic
+
+        def _count(path, text, durable=True):
+            self.writes += 1
+            return real(path, text, durable=durable)
+
+        p = mock.patch.object(ops, "_write_atomic", _count)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def test_unchanged_state_is_not_written(self) -> None:
+        ops.alerts_state_update(lambda st: st.update(last_level="bad"))
+        self.assertEqual(self.writes, 1)
+        ops.alerts_state_update(lambda st: st.update(last_level="bad"))
+        ops.alerts_state_update(lambda st: None)
+        self.assertEqual(self.writes, 1)
+        ops.alerts_state_update(lambda st: st.update(last_level="ok"))
+        self.assertEqual(self.writes, 2)
+        self.assertEqual(json.loads(self.file.read_text(encoding="utf-8"))["last_level"], "ok")
+
+    def test_volatile_fields_wait_for_flush(self) -> None:
+        ops.alerts_state_update(lambda st: st.update(last_level="ok"))
+        ops.alerts_state_update(lambda st: st.update(daily={"sent": 1}))
+        self.assertEqual(self.writes, 1)
+        self.assertNotIn("daily", json.loads(self.file.read_text(encoding="utf-8")))
+        self.assertEqual(ops.alerts_state()["daily"], {"sent": 1})  # served from memory
+        ops.alerts_state_flush()
+        self.assertEqual(self.writes, 2)
+        self.assertEqual(json.loads(self.file.read_text(encoding="utf-8"))["daily"], {"sent": 1})
+
+    def test_volatile_fields_written_once_due(self) -> None:
+        ops.alerts_state_update(lambda st: st.update(last_level="ok"))
+        ops._ALERTS_STATE_MEM["written_ts"] = time.time() - ops.ALERTS_STATE_FLUSH_S - 1
+        ops.alerts_state_update(lambda st: st.update(daily={"sent": 2}))
+        self.assertEqual(self.writes, 2)
+
+    def test_write_is_an_atomic_replace(self) -> None:
+        ops.alerts_state_update(lambda st: st.update(last_level="bad"))
+        ino = self.file.stat().st_ino
+        ops.alerts_state_update(lambda st: st.update(last_level="ok"))
+        self.assertNotEqual(self.file.stat().st_ino, ino)  # new file renamed over the old one
+        self.assertEqual([p.name for p in self.file.parent.iterdir()], [self.file.name])
+
+    def test_deleted_file_is_reloaded(self) -> None:
+        ops.alerts_state_update(lambda st: st.update(last_level="bad", notified_level="bad"))
+        self.file.unlink()
+        st = ops.alerts_state()
+        self.assertEqual(st["last_level"], "ok")
+        self.assertNotIn("notified_level", st)
+
+    def test_hand_edit_is_picked_up(self) -> None:
+        ops.alerts_state_update(lambda st: st.update(last_level="bad"))
+        edited = json.loads(self.file.read_text(encoding="utf-8"))
+        edited["last_level"] = "warn"
+        self.file.write_text(json.dumps(edited) + "    \n", encoding="utf-8")
+        os.utime(self.file, ns=(time.time_ns(), time.time_ns() + 10**9))
+        self.assertEqual(ops.alerts_state()["last_level"], "warn")
+        n = self.writes
+        ops.alerts_state_update(lambda st: None)  # reloaded content counts as written
+        self.assertEqual(self.writes, n)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+后端构建上下文测试：.dockerignore 匹配规则，以及 backend_context_hash 只随“会发给 Docker 的内容”变化。
+
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import local_ops_console as ops  # noqa: E402
+
+
+class _Ctx(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.ctx = Path(self._tmp.name) / "backend"
+        self.ctx.mkdir()
+        self.compose = Path(self._tmp.name) / "docker-compose.home.yml"
+        self.compose.write_text("services: {}\n", encoding="utf-8")
+        p = mock.patch.object(ops, "HOME_COMPOSE_FILE", self.compose)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def _write(self, rel: str, text: str = "x") -> Path:
+        path = self.ctx / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    def _ignore(self, *lines: str) -> None:
+        self._write(".dockerignore", "\n".join(lines) + "\n")
+
+
+class DockerignoreTest(_Ctx):
+    def _excluded(self, rel: str) -> bool:
+        return ops.dockerignore_excluded(rel, ops.dockerignore_rules(self.ctx))
+
+    def test_patterns(self) -> None:
+        self._ignore(
+            "# comment",
+            "",
+            "*.log",
+            "/tmp/",
+            "./build",
+            "**/node_modules",
+            "docs/**/*.md",
+            "a?c.txt",
+            "[ab].bin",
+            "[!ab].dat",
+        )
+        cases = {
+            "app.log": True,
+            "sub/app.log": False,  # "*" never crosses "/"
+            "tmp/x.go": True,  # a matching parent directory excludes everything below
+            "src/tmp/x.go": False,
+            "build/out/bin": True,
+            "node_modules/x.js": True,
+            "web/node_modules/y/z.js": True,
+            "docs/a.md": True,
+            "docs/x/y/a.md": True,
+            "docs/a.txt": False,
+            "abc.txt": True,
+            "abbc.txt": False,
+            "a.bin": True,
+            "c.bin": False,
+            "c.dat": True,
+            "a.dat": False,
+            "main.go": False,
+        }
+        for rel, want in cases.items():
+            with self.subTest(rel=rel):
+                self.assertEqual(self._excluded(rel), want)
+
+    def test_last_match_wins(self) -> None:
+        self._ignore("*.log", "!keep.log", "keep*")
+        self.assertTrue(self._excluded("keep.log"))
+        self._ignore("*.log", "!keep.log")
+        self.assertFalse(self._excluded("keep.log"))
+        self.assertTrue(self._excluded("drop.log"))
+
+    def test_missing_file_means_nothing_ignored(self) -> None:
+        self.assertEqual(ops.dockerignore_rules(self.ctx), [])
+        self.assertFalse(self._excluded("anything/at/all"))
+
+
+class ContextHashTest(_Ctx):
+    def setUp(self) -> None:
+        super().setUp()
+        self._ignore("*.log", "tmp")
+        self._write("main.go", "package main\n")
+        self._write("internal/api/h.go", "package api\n")
+
+    def test_counts_only_context_files(self) -> None:
+        self._write("debug.log")
+        self._write("tmp/cache.bin")
+        _, files = ops.backend_context_hash(self.ctx)
+        self.assertEqual(files, 3)  # .dockerignore, main.go, internal/api/h.go
+
+    def test_ignored_changes_keep_the_hash(self) -> None:
+        h0, _ = ops.backend_context_hash(self.ctx)
+        self._write("debug.log", "noise")
+        self._write("tmp/x/y.bin", "noise")
+        self.assertEqual(ops.backend_context_hash(self.ctx)[0], h0)
+
+    def test_content_rename_mode_and_compose_change_the_hash(self) -> None:
+        seen = {ops.backend_context_hash(self.ctx)[0]}
+        self._write("main.go", "package main\n// edit\n")
+        seen.add(ops.backend_context_hash(self.ctx)[0])
+        os.replace(self.ctx / "internal/api/h.go", self.ctx / "internal/api/g.go")
+        seen.add(ops.backend_context_hash(self.ctx)[0])
+        os.chmod(self.ctx / "main.go", 0o755)
+        seen.add(ops.backend_context_hash(self.ctx)[0])
+        self.compose.write_text("services: {backend: {build: .}}\n", encoding="utf-8")
+        seen.add(ops.backend_context_hash(self.ctx)[0])
+        self.assertEqual(len(seen), 5)
+
+    def test_negation_reincludes_inside_ignored_dir(self) -> None:
+        self._ignore("tmp", "!tmp/keep.txt")
+        self._write("tmp/keep.txt", "a")
+        self._write("tmp/drop.txt", "a")
+        h0, files = ops.backend_context_hash(self.ctx)
+        self.assertEqual(files, 4)
+        self._write("tmp/keep.txt", "b")
+        self.assertNotEqual(ops.backend_context_hash(self.ctx)[0], h0)
+
+
+if __name__ == "__main__":
+    unittest.main()
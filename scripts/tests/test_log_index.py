@@ -0,0 +1,164 @@
+"""
+日志检索索引测试：varint / posting 编解码、segment 查找、增量索引与截断 / 轮转。
+
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import local_ops_console as ops  # noqa: E402
+
+
+class VarintTest(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        values = [0, 1, 127, 128, 300, 16383, 16384, 2**31, 2**40 + 5]
+        buf = bytearray()
+        for v in values:
+            ops._varint_put(buf, v)
+        pos = 0
+        out = []
+        for _ in values:
+            v, pos = ops._varint_get(bytes(buf), pos)
+            out.append(v)
+        self.assertEqual(out, values)
+        self.assertEqual(pos, len(buf))
+
+    def test_small_values_take_one_byte(self) -> None:
+        buf = bytearray()
+        ops._varint_put(buf, 127)
+        self.assertEqual(len(buf), 1)
+
+
+class _IndexDir(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.dir = Path(self._tmp.name)
+        idx = self.dir / "log_index"
+        idx.mkdir()
+        for name, value in (("LOG_INDEX_DIR", idx), ("LOG_INDEX_META", idx / "meta.json"), ("RUNTIME_DIR", self.dir)):
+            p = mock.patch.object(ops, name, value)
+            p.start()
+            self.addCleanup(p.stop)
+        with ops._LOG_SEG_MAPS_LOCK:
+            ops._LOG_SEG_MAPS.clear()
+        self.addCleanup(ops._LOG_SEG_MAPS.clear)
+
+
+class SegmentTest(_IndexDir):
+    def _write(self, lines, postings):
+        return ops._log_seg_write(ops.LOG_INDEX_DIR / "t.000000.seg", "t", lines[0][0], lines, postings)
+
+    def test_postings_and_lines_decode(self) -> None:
+        lines = [(i * 40, 1_700_000_000_000 + i * (1000 if i % 3 else -7)) for i in range(300)]
+        postings = {
+            "error": [0, 5, 299],
+            "同": [1, 2],
+            "sync": list(range(0, 300, 7)),
+        }
+        seg = self._write(lines, postings)
+        mm = ops._log_seg_map(seg["name"])
+        for tok, ids in postings.items():
+            self.assertEqual(ops._log_seg_postings(mm, seg, tok), ids)
+        self.assertEqual(ops._log_seg_postings(mm, seg, "missing"), [])
+        self.assertEqual(ops._log_seg_postings(mm, seg, "a"), [])
+        for i in (0, 1, 127, 128, 129, 255, 256, 299):
+            self.assertEqual(ops._log_seg_line(mm, seg, i), lines[i])
+
+    def test_read_all_matches_input(self) -> None:
+        lines = [(i * 10, 1000 + i) for i in range(50)]
+        postings = {"aa": [0, 49], "bb": [3]}
+        seg = self._write(lines, postings)
+        table, plist = ops._log_seg_read_all(seg)
+        self.assertEqual(table, lines)
+        self.assertEqual(plist, postings)
+
+
+class IndexUpdateTest(_IndexDir):
+    def setUp(self) -> None:
+        super().setUp()
+        self.log = self.dir / "app.log"
+        p = mock.patch.object(ops, "log_search_sources", lambda: {"app": self.log})
+        p.start()
+        self.addCleanup(p.stop)
+
+    def _append(self, *lines: str) -> None:
+        with self.log.open("a", encoding="utf-8") as f:
+            for ln in lines:
+                f.write(ln + "\n")
+
+    def _search(self, q: str):
+        with ops._LOG_INDEX_LOCK:
+            ops.log_index_update()
+        with mock.patch.object(ops, "log_index_kick") as kick:
+            kick.return_value.is_alive.return_value = False
+            return [r["line"] for r in ops.log_search(q)["results"]]
+
+    def test_incremental_index_keeps_partial_line(self) -> None:
+        self._append("2026-01-01T00:00:00Z sync failed user=1")
+        with self.log.open("a", encoding="utf-8") as f:
+            f.write("2026-01-01T00:00:01Z sync fai")
+        self.assertEqual(self._search("sync failed"), ["2026-01-01T00:00:00Z sync failed user=1"])
+        with self.log.open("a", encoding="utf-8") as f:
+            f.write("led user=2\n")
+        self.assertEqual(len(self._search("sync failed")), 2)
+        info = ops._load_json(ops.LOG_INDEX_META)["sources"]["app"]
+        self.assertEqual(info["offset"], self.log.stat().st_size)
+        self.assertEqual(len(info["segments"]), 2)
+
+    def test_truncation_reindexes_from_start(self) -> None:
+        self._append("2026-01-01T00:00:00Z oldtoken", "2026-01-01T00:00:01Z oldtoken again")
+        self.assertEqual(len(self._search("oldtoken")), 2)
+        self.log.write_text("2026-01-02T00:00:00Z newtoken\n", encoding="utf-8")
+        self.assertEqual(self._search("oldtoken"), [])
+        self.assertEqual(len(self._search("newtoken")), 1)
+
+    def test_rotation_reindexes_new_file(self) -> None:
+        self._append("2026-01-01T00:00:00Z beforerotate " + "x" * 200)
+        self.assertEqual(len(self._search("beforerotate")), 1)
+        os.replace(self.log, self.dir / "app.log.1")
+        self._append("2026-01-02T00:00:00Z afterrotate")
+        self.assertEqual(self._search("beforerotate"), [])
+        self.assertEqual(len(self._search("afterrotate")), 1)
+        meta = ops._load_json(ops.LOG_INDEX_META)
+        self.assertEqual(len(meta["trash"]), 1)
+
+    def test_compaction_merges_small_segments(self) -> None:
+        with mock.patch.object(ops, "LOG_INDEX_MAX_SEGMENTS", 3):
+            for i in range(5):
+                self._append(f"2026-01-01T00:00:0{i}Z batch{i} common")
+                with ops._LOG_INDEX_LOCK:
+                    ops.log_index_update()
+        segs = ops._load_json(ops.LOG_INDEX_META)["sources"]["app"]["segments"]
+        self.assertLessEqual(len(segs), 3)
+        self.assertEqual(len(self._search("common")), 5)
+
+    def test_since_filters_by_line_time(self) -> None:
+        self._append("2026-01-01T00:00:00Z tick one", "2026-01-01T01:00:00Z tick two")
+        with ops._LOG_INDEX_LOCK:
+            ops.log_index_update()
+        since = ops._log_line_ts_ms("2026-01-01T00:30:00Z")
+        with mock.patch.object(ops, "log_index_kick") as kick:
+            kick.return_value.is_alive.return_value = False
+            res = ops.log_search("tick", since_ms=since)
+        self.assertEqual([r["line"] for r in res["results"]], ["2026-01-01T01:00:00Z tick two"])
+
+
+class DockerTimestampTest(unittest.TestCase):
+    def test_trimmed_fractions_compare_numerically(self) -> None:
+        a = ops._docker_ts_key("2026-01-01T00:00:01.5Z")
+        b = ops._docker_ts_key("2026-01-01T00:00:01.123456789Z")
+        self.assertGreater(a, b)
+        self.assertEqual(ops._docker_ts_key("2026-01-01T08:00:00+08:00"), ops._docker_ts_key("2026-01-01T00:00:00Z"))
+        self.assertIsNone(ops._docker_ts_key("not a stamp"))
+
+
+if __name__ == "__main__":
+    unittest.main()